@@ -1,40 +1,202 @@
 import { NextResponse } from 'next/server'
 import { supabase } from '@/lib/supabase'
+import { getCheckerPool, getJobQueuePool } from '@/lib/worker-pool'
+import { BatchWriter } from '@/lib/batch-writer'
 import { spawn } from 'child_process'
 import path from 'path'
 
-// Helper function to call Python script for AI checks
-function callPythonAI(keyword, brand, competitors) {
+const JOB_POLL_MS = parseInt(process.env.CHECKS_JOB_POLL_MS || '1000')
+const SCHEDULE_LOOKBACK_DAYS = parseInt(process.env.CHECKS_SCHEDULE_LOOKBACK_DAYS || '30')
+
+// Helper function to run an AI check on the persistent Python worker pool.
+// Resolves to a result per engine; engines backed by the same model share
+// one LLM call.
+function callPythonAI(keyword, brand, competitors, engines) {
+  return getCheckerPool().request({
+    keyword,
+    brand,
+    competitors: competitors || [],
+    engines
+  })
+}
+
+// Helper function to run a Python CLI in lib/ that prints one JSON result,
+// with an optional JSON request on stdin
+function callPythonCli(script, args, input) {
   return new Promise((resolve, reject) => {
-    const pythonProcess = spawn('python3', [
-      path.join(process.cwd(), 'lib', 'ai_checker.py'),
-      keyword,
-      brand,
-      JSON.stringify(competitors || [])
+    const cliProcess = spawn('python3', [
+      path.join(process.cwd(), 'lib', script),
+      ...args
     ])
 
     let result = ''
     let errorOutput = ''
 
-    pythonProcess.stdout.on('data', (data) => {
+    cliProcess.stdout.on('data', (data) => {
       result += data.toString()
     })
 
-    pythonProcess.stderr.on('data', (data) => {
+    cliProcess.stderr.on('data', (data) => {
       errorOutput += data.toString()
     })
 
-    pythonProcess.on('close', (code) => {
-      if (code !== 0) {
-        reject(new Error(`Python script failed: ${errorOutput}`))
-      } else {
-        try {
-          resolve(JSON.parse(result))
-        } catch (e) {
-          reject(new Error(`Failed to parse Python output: ${result}`))
-        }
+    cliProcess.on('error', reject)
+
+    cliProcess.on('close', () => {
+      try {
+        resolve(JSON.parse(result))
+      } catch (e) {
+        reject(new Error(`${script} failed: ${errorOutput || result}`))
       }
     })
+
+    cliProcess.stdin.end(input === undefined ? '' : JSON.stringify(input))
+  })
+}
+
+// Helper function to call the SQLite-backed job queue through its persistent
+// `job_queue.py serve` process, so status polls never spawn an interpreter
+function callJobQueue(op, request = {}) {
+  return getJobQueuePool().request({ op, ...request })
+}
+
+// Stream job progress as server-sent events until the job is done
+function jobEventStream(jobId) {
+  const encoder = new TextEncoder()
+  let cancelled = false
+
+  return new ReadableStream({
+    async start(controller) {
+      const send = (event, data) => {
+        controller.enqueue(encoder.encode(`event: ${event}\ndata: ${JSON.stringify(data)}\n\n`))
+      }
+
+      let cursor = 0
+      try {
+        while (!cancelled) {
+          const status = await callJobQueue('status', { jobId, since: cursor })
+          if (status.error) {
+            send('error', status)
+            break
+          }
+
+          cursor = status.cursor
+          send('progress', status)
+          if (status.status === 'done') {
+            send('done', { id: jobId, completed: status.completed, failed: status.failed })
+            break
+          }
+          await new Promise(resolve => setTimeout(resolve, JOB_POLL_MS))
+        }
+      } catch (err) {
+        send('error', { error: err.message })
+      }
+      if (!cancelled) controller.close()
+    },
+    cancel() {
+      cancelled = true
+    }
+  })
+}
+
+const HISTORY_FIELDS = [
+  'id', 'projectId', 'engine', 'keyword', 'position', 'presence',
+  'answerSnippet', 'citationsCount', 'observedUrls', 'competitorsMentioned',
+  'answerHash', 'timestamp', 'createdAt'
+]
+const HISTORY_PAGE_SIZE = 500
+const HISTORY_MAX_PAGE_SIZE = 1000
+
+// History cursors are the (timestamp, id) of the last row of a page
+function encodeHistoryCursor(row) {
+  return Buffer.from(JSON.stringify([row.timestamp, row.id])).toString('base64url')
+}
+
+function decodeHistoryCursor(value) {
+  try {
+    const [timestamp, id] = JSON.parse(Buffer.from(value, 'base64url').toString())
+    if (typeof timestamp !== 'string' || typeof id !== 'string') return null
+    // Both values are spliced into a PostgREST filter, so keep them strict
+    if (isNaN(Date.parse(timestamp)) || timestamp.includes('"')) return null
+    if (!/^[0-9a-fA-F-]+$/.test(id)) return null
+    return { timestamp, id }
+  } catch (e) {
+    return null
+  }
+}
+
+// Fetch one keyset page of checks, newest first, ordered by (timestamp, id)
+async function fetchHistoryPage({ projectId, since, columns, limit }, cursor) {
+  let query = supabase
+    .from('visibility_checks')
+    .select(columns.join(','))
+    .eq('projectId', projectId)
+    .gte('timestamp', since)
+
+  if (cursor) {
+    query = query.or(
+      `timestamp.lt."${cursor.timestamp}",and(timestamp.eq."${cursor.timestamp}",id.lt.${cursor.id})`
+    )
+  }
+
+  const { data, error } = await query
+    .order('timestamp', { ascending: false })
+    .order('id', { ascending: false })
+    .limit(limit)
+
+  if (error) {
+    return { data: null, error, nextCursor: null }
+  }
+
+  const nextCursor = data.length === limit ? encodeHistoryCursor(data[data.length - 1]) : null
+  return { data, error: null, nextCursor }
+}
+
+// Plan an incremental run: the scheduler picks the keyword/engine pairs that
+// are due from the project's recent history, within its daily budget
+async function planRun(project, engines) {
+  const since = new Date(Date.now() - SCHEDULE_LOOKBACK_DAYS * 24 * 60 * 60 * 1000).toISOString()
+  const query = {
+    projectId: project.id,
+    since,
+    columns: ['id', 'engine', 'keyword', 'presence', 'position', 'timestamp'],
+    limit: HISTORY_MAX_PAGE_SIZE
+  }
+
+  const history = []
+  let cursor = null
+  do {
+    const { data, error, nextCursor } = await fetchHistoryPage(query, cursor)
+    if (error) throw new Error(error.message)
+    history.push(...data)
+    cursor = nextCursor ? decodeHistoryCursor(nextCursor) : null
+  } while (cursor)
+
+  return callPythonCli('scheduler.py', [], { project, engines, history })
+}
+
+function historyNdjsonStream(query, cursor) {
+  const encoder = new TextEncoder()
+  let cancelled = false
+
+  return new ReadableStream({
+    async start(controller) {
+      let page = cursor
+      do {
+        const { data, error, nextCursor } = await fetchHistoryPage(query, page)
+        if (error) {
+          controller.enqueue(encoder.encode(JSON.stringify({ error: error.message }) + '\n'))
+          break
+        }
+        controller.enqueue(encoder.encode(data.map(row => JSON.stringify(row) + '\n').join('')))
+        page = nextCursor ? decodeHistoryCursor(nextCursor) : null
+      } while (page && !cancelled)
+
+      if (!cancelled) controller.close()
+    },
+    cancel() {
+      cancelled = true
+    }
   })
 }
 
@@ -121,7 +283,7 @@ export async function POST(request) {
 
     // Run visibility checks
     if (path.startsWith('/checks/run')) {
-      const { projectId } = await request.json()
+      const { projectId, wait, incremental } = await request.json()
 
       // Get project details
       const { data: project, error: projectError } = await supabase
@@ -136,51 +298,140 @@ export async function POST(request) {
       }
 
       const engines = ['ChatGPT', 'Perplexity', 'Gemini', 'Claude']
-      const results = []
-
-      // Run checks for each keyword and engine
-      for (const keyword of project.keywords) {
-        for (const engine of engines) {
-          try {
-            // Call Python AI checker
-            const checkResult = await callPythonAI(
-              keyword,
-              project.brand,
-              project.competitors
-            )
-
-            const checkData = {
-              projectId: project.id,
-              engine,
-              keyword,
-              position: checkResult.position,
-              presence: checkResult.presence,
-              answerSnippet: checkResult.answer_snippet,
-              citationsCount: checkResult.citations_count,
-              observedUrls: checkResult.observed_urls,
-              competitorsMentioned: checkResult.competitors_mentioned,
-              timestamp: new Date().toISOString()
-            }
 
-            const { data, error } = await supabase
-              .from('visibility_checks')
-              .insert([checkData])
-              .select()
-              .single()
+      // Manual runs check every keyword on every engine. Scheduled callers pass
+      // { incremental: true } so only the pairs the scheduler finds due are checked.
+      let runPlan = project.keywords.map(keyword => ({ keyword, engines }))
+      let planSummary = null
+      if (incremental) {
+        const plan = await planRun(project, engines)
+        runPlan = plan.keywords
+        planSummary = {
+          planned: plan.planned,
+          due: plan.due,
+          notDue: plan.notDue,
+          overBudget: plan.overBudget,
+          budget: plan.budget,
+          nextDueAt: plan.nextDueAt,
+          reason: plan.reason
+        }
 
-            if (!error) {
-              results.push(data)
+        if (plan.planned === 0) {
+          return NextResponse.json({
+            success: true,
+            checksCreated: 0,
+            results: [],
+            failures: [],
+            message: plan.reason,
+            plan: planSummary
+          })
+        }
+      }
+
+      // By default the run is queued for the Python workers and the job id
+      // returned immediately; pass { wait: true } to run it inline
+      if (!wait) {
+        const job = await callJobQueue('submit', {
+          project,
+          engines,
+          plan: runPlan,
+          userId: user.id
+        })
+        if (job.error) {
+          return NextResponse.json({ error: job.error }, { status: job.queueFull ? 503 : 500 })
+        }
+
+        return NextResponse.json({
+          success: true,
+          jobId: job.jobId,
+          status: 'queued',
+          statusUrl: `/api/checks/jobs/${job.jobId}`,
+          eventsUrl: `/api/checks/jobs/${job.jobId}/events`,
+          plan: planSummary
+        }, { status: 202 })
+      }
+
+      const checkFailures = []
+      const runStarted = Date.now()
+
+      // Rows are buffered and inserted in batches of CHECKS_INSERT_BATCH_SIZE
+      const writer = new BatchWriter(supabase, 'visibility_checks')
+
+      const saveCheck = (keyword, engine, checkResult) => {
+        const checkData = {
+          projectId: project.id,
+          engine,
+          keyword,
+          position: checkResult.position,
+          presence: checkResult.presence,
+          answerSnippet: checkResult.answer_snippet,
+          citationsCount: checkResult.citations_count,
+          observedUrls: checkResult.observed_urls,
+          competitorsMentioned: checkResult.competitors_mentioned,
+          timestamp: new Date().toISOString()
+        }
+
+        // Full answers live in the blob store when AI_CHECKER_BLOB_DIR is set
+        if (checkResult.answer_hash) {
+          checkData.answerHash = checkResult.answer_hash
+        }
+
+        writer.add(checkData)
+      }
+
+      // Run one check per keyword for its planned engines; identical queries
+      // are coalesced by the checker and keywords run concurrently on the pool
+      const runKeyword = async ({ keyword, engines: keywordEngines }) => {
+        try {
+          // Call Python AI checker
+          const byEngine = await callPythonAI(
+            keyword,
+            project.brand,
+            project.competitors,
+            keywordEngines
+          )
+
+          // Engines fail one by one; the others' rows are still saved
+          keywordEngines.forEach(engine => {
+            const checkResult = byEngine[engine]
+            if (!checkResult || checkResult.error) {
+              const error = checkResult ? checkResult.error : 'No result'
+              console.error(`Error checking ${keyword} on ${engine}:`, error)
+              checkFailures.push({ keyword, engine, error })
+            } else {
+              saveCheck(keyword, engine, checkResult)
             }
-          } catch (err) {
-            console.error(`Error checking ${keyword} on ${engine}:`, err)
-          }
+          })
+        } catch (err) {
+          console.error(`Error checking ${keyword}:`, err)
+          checkFailures.push({ keyword, error: err.message })
         }
       }
 
+      await Promise.all(runPlan.map(runKeyword))
+      const { inserted, failures, insertMs } = await writer.close()
+
+      failures.forEach(({ row, error }) => {
+        console.error(`Error saving ${row.keyword} on ${row.engine}:`, error)
+      })
+
       return NextResponse.json({ 
         success: true, 
-        checksCreated: results.length,
-        results 
+        checksCreated: inserted.length,
+        results: inserted,
+        failures: [
+          ...checkFailures,
+          ...failures.map(({ row, error }) => ({
+            keyword: row.keyword,
+            engine: row.engine,
+            error
+          }))
+        ],
+        plan: planSummary,
+        // Per-check stage timings are on each result; this splits the run
+        timings: process.env.AI_CHECKER_METRICS_PATH
+          ? { totalMs: Date.now() - runStarted, insertMs }
+          : undefined
       })
     }
 
@@ -248,6 +499,30 @@ export async function GET(request) {
       return NextResponse.json(data || [])
     }
 
+    // Background check job progress: JSON polling or server-sent events
+    const jobMatch = path.match(/^\/checks\/jobs\/([^/]+)(\/events)?$/)
+    if (jobMatch) {
+      const [, jobId, events] = jobMatch
+      const since = parseInt(searchParams.get('since') || '0')
+
+      const status = await callJobQueue('status', { jobId, since })
+      if (status.error || status.userId !== user.id) {
+        return NextResponse.json({ error: 'Job not found' }, { status: 404 })
+      }
+
+      if (!events) {
+        return NextResponse.json(status)
+      }
+
+      return new Response(jobEventStream(jobId), {
+        headers: {
+          'Content-Type': 'text/event-stream',
+          'Cache-Control': 'no-cache',
+          'Connection': 'keep-alive'
+        }
+      })
+    }
+
     // Get checks history
     if (path.startsWith('/checks/history')) {
       const projectId = searchParams.get('projectId')
@@ -272,17 +547,48 @@ export async function GET(request) {
       const cutoffDate = new Date()
       cutoffDate.setDate(cutoffDate.getDate() - days)
 
-      const { data, error } = await supabase
-        .from('visibility_checks')
-        .select('*')
-        .eq('projectId', projectId)
-        .gte('timestamp', cutoffDate.toISOString())
-        .order('timestamp', { ascending: false })
+      // Column projection: answerSnippet is only sent when asked for
+      const requested = searchParams.get('fields')
+      const fields = requested
+        ? requested.split(',').map(f => f.trim()).filter(f => HISTORY_FIELDS.includes(f))
+        : HISTORY_FIELDS.filter(f => f !== 'answerSnippet')
+      // id and timestamp are always returned because they form the cursor
+      const columns = [...new Set(['id', 'timestamp', ...fields])]
+
+      const requestedLimit = parseInt(searchParams.get('limit'))
+      const limit = Math.min(
+        Math.max(Number.isFinite(requestedLimit) ? requestedLimit : HISTORY_PAGE_SIZE, 1),
+        HISTORY_MAX_PAGE_SIZE
+      )
+
+      let cursor = null
+      if (searchParams.get('cursor')) {
+        cursor = decodeHistoryCursor(searchParams.get('cursor'))
+        if (!cursor) {
+          return NextResponse.json({ error: 'Invalid cursor' }, { status: 400 })
+        }
+      }
+
+      const query = { projectId, since: cutoffDate.toISOString(), columns, limit }
+
+      // NDJSON mode streams every page, one check per line
+      if (searchParams.get('format') === 'ndjson') {
+        return new Response(historyNdjsonStream(query, cursor), {
+          headers: { 'Content-Type': 'application/x-ndjson' }
+        })
+      }
+
+      const { data, error, nextCursor } = await fetchHistoryPage(query, cursor)
 
       if (error) {
         return NextResponse.json({ error: error.message }, { status: 500 })
       }
-      return NextResponse.json(data || [])
+
+      const response = NextResponse.json(data)
+      if (nextCursor) {
+        response.headers.set('X-Next-Cursor', nextCursor)
+      }
+      return response
     }
 
     // Dashboard stats
@@ -305,39 +611,39 @@ export async function GET(request) {
         return NextResponse.json({ error: 'Project not found' }, { status: 404 })
       }
 
-      // Get recent checks
+      // Get the daily per-engine rollups for the last 30 days
       const thirtyDaysAgo = new Date()
       thirtyDaysAgo.setDate(thirtyDaysAgo.getDate() - 30)
 
-      const { data: checks, error } = await supabase
-        .from('visibility_checks')
-        .select('*')
+      const { data: rollups, error } = await supabase
+        .from('visibility_daily_engine_rollup')
+        .select('engine, total, present')
         .eq('projectId', projectId)
-        .gte('timestamp', thirtyDaysAgo.toISOString())
+        .gte('day', thirtyDaysAgo.toISOString().slice(0, 10))
 
       if (error) {
         return NextResponse.json({ error: error.message }, { status: 500 })
       }
 
-      // Calculate stats
-      const totalChecks = checks.length
-      const presenceCount = checks.filter(c => c.presence).length
-      const visibilityScore = totalChecks > 0 
-        ? Math.round((presenceCount / totalChecks) * 100) 
-        : 0
-
       // Group by engine
       const byEngine = {}
-      checks.forEach(check => {
-        if (!byEngine[check.engine]) {
-          byEngine[check.engine] = { total: 0, present: 0 }
-        }
-        byEngine[check.engine].total++
-        if (check.presence) {
-          byEngine[check.engine].present++
+      let totalChecks = 0
+      let presenceCount = 0
+      rollups.forEach(row => {
+        if (!byEngine[row.engine]) {
+          byEngine[row.engine] = { total: 0, present: 0 }
         }
+        byEngine[row.engine].total += row.total
+        byEngine[row.engine].present += row.present
+        totalChecks += row.total
+        presenceCount += row.present
       })
 
+      // Calculate stats
+      const visibilityScore = totalChecks > 0 
+        ? Math.round((presenceCount / totalChecks) * 100) 
+        : 0
+
       const engineStats = Object.entries(byEngine).map(([engine, stats]) => ({
         engine,
         score: Math.round((stats.present / stats.total) * 100),
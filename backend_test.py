@@ -2,14 +2,29 @@
 """
 AEO Tracker Backend API Test Suite
 Tests all backend endpoints for the AI search visibility tracker
+
+Usage:
+  python3 backend_test.py                       # functional tests
+  python3 backend_test.py --load --token ACCESS_TOKEN --users 20 --rate 50 --duration 60
+  python3 backend_test.py --load --token ACCESS_TOKEN --seed --database-url postgresql://...
 """
 
 import requests
+import argparse
+import asyncio
 import json
 import os
+import random
 import sys
+import time
+from collections import Counter
 from datetime import datetime
 
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
 # Get base URL from environment
 BASE_URL = os.environ.get('NEXT_PUBLIC_BASE_URL', 'https://seoai-pulse.preview.emergentagent.com')
 API_BASE = f"{BASE_URL}/api"
@@ -360,7 +375,278 @@ class AEOTrackerTester:
         
         return passed == total
 
-if __name__ == "__main__":
+# Relative weights of the endpoints in the load mix
+DEFAULT_LOAD_MIX = 'stats=4,history=4,projects=2'
+# /checks/history is requested with one of these windows
+HISTORY_DAYS = [1, 7, 14, 30, 90]
+# Upper bounds of the latency histogram buckets
+LATENCY_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+def parse_mix(value):
+    """Parse "stats=4,history=4,projects=2" into {endpoint: weight}"""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ('stats', 'history', 'projects'):
+            raise ValueError(f"Unknown endpoint '{name}' in the load mix")
+        mix[name] = float(weight or 1)
+    return mix
+
+def seed_load_data(database_url, user_id, projects=5, keywords=25, days=30, seed=42):
+    """
+    Load synthetic projects and checks (lib/seed_data.py) owned by user_id with
+    the COPY loader (lib/import_seed.py). The same seed always produces the
+    same ids, so re-seeding is idempotent. Returns the project ids.
+    """
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lib'))
+    import numpy as np
+    import psycopg
+    from import_seed import CheckLoader, upsert_projects
+    from seed_data import columns_to_checks, iter_check_columns, synthetic_projects
+
+    project_rows = synthetic_projects(projects, keywords, np.random.default_rng(seed))
+    checks = (
+        check
+        for project, columns in iter_check_columns(project_rows, days, seed=seed + 1)
+        for check in columns_to_checks(project, columns)
+    )
+    with psycopg.connect(database_url, autocommit=True) as conn:
+        conn.execute("SET temp_buffers = '256MB'")
+        upsert_projects(conn, project_rows, user_id)
+        loaded, skipped = CheckLoader(conn).load(
+            f'load-test:{seed}:{projects}x{keywords}x{days}', checks)
+    print(f"🌱 Seeded {len(project_rows)} projects, {loaded + skipped} checks "
+          f"({skipped} already loaded)")
+    return [project['id'] for project in project_rows]
+
+class EndpointStats:
+    """Latencies and outcomes of one endpoint during a load run"""
+
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []
+        self.statuses = Counter()
+        self.errors = 0
+
+    def record(self, latency, status):
+        self.latencies.append(latency)
+        self.statuses[status] += 1
+        if not isinstance(status, int) or status >= 400:
+            self.errors += 1
+
+    def percentile(self, q):
+        ordered = sorted(self.latencies)
+        rank = max(1, min(len(ordered), int(-(-q * len(ordered) // 100))))
+        return ordered[rank - 1] * 1000
+
+    def histogram(self):
+        """(label, count) per latency bucket"""
+        counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        for latency in self.latencies:
+            ms = latency * 1000
+            index = next((i for i, bound in enumerate(LATENCY_BUCKETS_MS) if ms <= bound),
+                         len(LATENCY_BUCKETS_MS))
+            counts[index] += 1
+        labels = [f'<={bound}ms' for bound in LATENCY_BUCKETS_MS] + [f'>{LATENCY_BUCKETS_MS[-1]}ms']
+        return list(zip(labels, counts))
+
+    def summary(self, elapsed):
+        requests_made = len(self.latencies)
+        summary = {
+            'endpoint': self.name,
+            'requests': requests_made,
+            'errors': self.errors,
+            'errorRate': round(self.errors / requests_made, 4) if requests_made else 0,
+            'rps': round(requests_made / elapsed, 2) if elapsed else 0,
+            'statuses': {str(status): count for status, count in self.statuses.items()},
+            'histogram': dict(self.histogram())
+        }
+        if requests_made:
+            summary.update({
+                'p50Ms': round(self.percentile(50), 1),
+                'p90Ms': round(self.percentile(90), 1),
+                'p99Ms': round(self.percentile(99), 1),
+                'maxMs': round(max(self.latencies) * 1000, 1)
+            })
+        return summary
+
+class AEOTrackerLoadTester:
+    """
+    Replay a weighted mix of /dashboard/stats, /checks/history (with varying
+    days) and /projects requests against a running app.
+
+    users virtual users share one pooled httpx.AsyncClient. With a rate, the
+    requests are spread over a fixed schedule of rate per second and latency
+    is measured from each request's scheduled time, so a backlog shows up in
+    the numbers instead of silently lowering the load. Without a rate every
+    user sends its next request as soon as the last one returns.
+    """
+
+    def __init__(self, api_base, token, project_ids, users=10, rate=None, duration=30,
+                 mix=None, timeout=30.0, seed=None):
+        self.api_base = api_base
+        self.token = token
+        self.project_ids = project_ids
+        self.users = users
+        self.rate = rate
+        self.duration = duration
+        self.mix = mix or parse_mix(DEFAULT_LOAD_MIX)
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+        self.stats = {}
+        self.scheduled = 0
+        self.elapsed = 0.0
+
+    def next_request(self):
+        """(endpoint label, path) of a random request from the mix"""
+        name = self.rng.choices(list(self.mix), weights=list(self.mix.values()))[0]
+        if name == 'projects':
+            return 'GET /projects', '/projects'
+        project_id = self.rng.choice(self.project_ids)
+        if name == 'stats':
+            return 'GET /dashboard/stats', f'/dashboard/stats?projectId={project_id}'
+        days = self.rng.choice(HISTORY_DAYS)
+        return f'GET /checks/history?days={days}', f'/checks/history?projectId={project_id}&days={days}'
+
+    async def user(self, client, loop, start, end):
+        while True:
+            if self.rate:
+                scheduled = start + self.scheduled / self.rate
+                self.scheduled += 1
+                if scheduled >= end:
+                    return
+                await asyncio.sleep(max(0.0, scheduled - loop.time()))
+            else:
+                scheduled = loop.time()
+                if scheduled >= end:
+                    return
+
+            name, path = self.next_request()
+            try:
+                response = await client.get(path)
+                await response.aread()
+                status = response.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            stats = self.stats.setdefault(name, EndpointStats(name))
+            stats.record(loop.time() - scheduled, status)
+
+    async def run(self):
+        limits = httpx.Limits(max_connections=self.users, max_keepalive_connections=self.users)
+        async with httpx.AsyncClient(base_url=self.api_base, timeout=self.timeout, limits=limits,
+                                     headers={'Authorization': f'Bearer {self.token}'}) as client:
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            end = start + self.duration
+            await asyncio.gather(*(self.user(client, loop, start, end) for _ in range(self.users)))
+            self.elapsed = loop.time() - start
+        return self.report()
+
+    def report(self):
+        """Print per-endpoint latency histograms and error rates; return them as dicts"""
+        summaries = [self.stats[name].summary(self.elapsed) for name in sorted(self.stats)]
+        total = sum(s['requests'] for s in summaries)
+        errors = sum(s['errors'] for s in summaries)
+
+        print("\n" + "=" * 60)
+        print("📊 LOAD TEST SUMMARY")
+        print("=" * 60)
+        print(f"Users: {self.users}, target rate: {self.rate or 'unbounded'} req/s, "
+              f"duration: {self.elapsed:.1f}s")
+        print(f"Requests: {total} ({total / self.elapsed:.1f} req/s), "
+              f"errors: {errors} ({(errors / total if total else 0):.2%})")
+
+        for summary in summaries:
+            print(f"\n{summary['endpoint']}")
+            print(f"  requests {summary['requests']}, {summary['rps']} req/s, "
+                  f"errors {summary['errors']} ({summary['errorRate']:.2%})")
+            if not summary['requests']:
+                continue
+            print(f"  p50 {summary['p50Ms']}ms  p90 {summary['p90Ms']}ms  "
+                  f"p99 {summary['p99Ms']}ms  max {summary['maxMs']}ms")
+            print(f"  statuses {summary['statuses']}")
+            peak = max(summary['histogram'].values())
+            for label, count in summary['histogram'].items():
+                if count:
+                    bar = '█' * max(1, round(40 * count / peak))
+                    print(f"  {label:>10} {count:>7} {bar}")
+        return {'users': self.users, 'rate': self.rate, 'elapsed': round(self.elapsed, 2),
+                'requests': total, 'errors': errors, 'endpoints': summaries}
+
+def fetch_user_id(token):
+    response = requests.get(f"{API_BASE}/auth/session", headers={'Authorization': f'Bearer {token}'})
+    user = response.json().get('user') if response.ok else None
+    return user and user.get('id')
+
+def fetch_project_ids(token):
+    response = requests.get(f"{API_BASE}/projects", headers={'Authorization': f'Bearer {token}'})
+    response.raise_for_status()
+    return [project['id'] for project in response.json()]
+
+def run_load_test(args):
+    if httpx is None:
+        print("❌ Error: httpx is not installed (pip install httpx)")
+        return False
+    if not args.token:
+        print("❌ Error: the load test needs an access token (--token or AEO_LOAD_TOKEN)")
+        return False
+
+    print(f"🚀 Starting AEO Tracker load test")
+    print(f"📍 Testing API at: {API_BASE}")
+
+    if args.seed:
+        user_id = fetch_user_id(args.token)
+        if not user_id or not args.database_url:
+            print("❌ Error: seeding needs a valid --token and --database-url")
+            return False
+        project_ids = seed_load_data(args.database_url, user_id, args.projects, args.keywords,
+                                     args.days, args.random_seed)
+    else:
+        project_ids = fetch_project_ids(args.token)
+    if not project_ids:
+        print("❌ Error: the user has no projects; pass --seed to create some")
+        return False
+
+    tester = AEOTrackerLoadTester(API_BASE, args.token, project_ids, args.users, args.rate,
+                                  args.duration, parse_mix(args.mix), args.timeout, args.random_seed)
+    report = asyncio.run(tester.run())
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Saved to: {args.json}")
+    error_rate = report['errors'] / report['requests'] if report['requests'] else 1
+    return error_rate <= args.max_error_rate
+
+def main():
+    parser = argparse.ArgumentParser(description='AEO Tracker backend API tests')
+    parser.add_argument('--load', action='store_true', help='Run the concurrent load test')
+    parser.add_argument('--token', default=os.environ.get('AEO_LOAD_TOKEN'),
+                        help='Supabase access token of the load-test user (default: $AEO_LOAD_TOKEN)')
+    parser.add_argument('--users', type=int, default=10, help='Concurrent virtual users')
+    parser.add_argument('--rate', type=float, help='Total requests per second (default: as fast as possible)')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds to run')
+    parser.add_argument('--mix', default=DEFAULT_LOAD_MIX, help='Endpoint weights')
+    parser.add_argument('--timeout', type=float, default=30, help='Per-request timeout in seconds')
+    parser.add_argument('--max-error-rate', type=float, default=0.01,
+                        help='Fail the run above this error rate')
+    parser.add_argument('--json', help='Write the load report to this file')
+    parser.add_argument('--seed', action='store_true',
+                        help='Load synthetic projects and checks for the token\'s user first')
+    parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL'),
+                        help='Postgres connection string for --seed (default: $DATABASE_URL)')
+    parser.add_argument('--projects', type=int, default=5, help='Projects to seed')
+    parser.add_argument('--keywords', type=int, default=25, help='Keywords per seeded project')
+    parser.add_argument('--days', type=int, default=30, help='Days of seeded checks')
+    parser.add_argument('--random-seed', type=int, default=42,
+                        help='Seed for the synthetic data and the request mix')
+    args = parser.parse_args()
+
+    if args.load:
+        success = run_load_test(args)
+        print("\n🎉 Load test passed!" if success else "\n💥 Load test failed!")
+        sys.exit(0 if success else 1)
+
     tester = AEOTrackerTester()
     success = tester.run_all_tests()
     
@@ -369,4 +655,7 @@ if __name__ == "__main__":
         sys.exit(0)
     else:
         print("\n💥 Some tests failed!")
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
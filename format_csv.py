@@ -1,77 +1,123 @@
-import json
+#!/usr/bin/env python3
+"""
+Convert visibility checks into a CSV for the Supabase table importer
+Checks are streamed from seed_data.json, JSONL or SQLite sources and written
+row by row, so memory stays flat regardless of the dataset size
+
+Usage:
+  python3 format_csv.py                                  # seed_data.json -> checks_for_supabase.csv
+  python3 format_csv.py checks.jsonl more.jsonl -o checks.csv.gz
+"""
+
+import argparse
 import csv
-import io
+import gzip
+import itertools
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lib'))
+
+from checks_io import CHECK_COLUMNS, iter_checks
 
-# --- Configuration ---
-json_file_path = 'seed_data.json' # Make sure this path is correct
-output_csv_path = 'checks_for_supabase.csv'
-# ---------------------
+# The headers Supabase expects for the visibility_checks table, shared with
+# the other exporters so they stay in step with DATABASE_SETUP.md
+# Note: 'createdAt' defaults to NOW() in Supabase, so it is left out
+HEADERS = CHECK_COLUMNS
 
 def format_supabase_array(py_list):
     """Formats a Python list into Supabase array literal format like {"item1","item2"}."""
     if not py_list:
         return '{}' # Empty array
     # Escape double quotes within items and wrap items in double quotes
-    formatted_items = [f'"{str(item).replace('"', '""')}"' for item in py_list]
+    formatted_items = ['"' + str(item).replace('"', '""') + '"' for item in py_list]
     return '{' + ','.join(formatted_items) + '}'
 
-try:
-    # Read the JSON data
-    with open(json_file_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    checks_data = data.get('checks', [])
-
-    if not checks_data:
-        print(f"Error: 'checks' array not found or is empty in {json_file_path}")
-    else:
-        # Define the exact headers Supabase expects for visibility_checks table
-        # Ensure these match your DATABASE_SETUP.md precisely
-        headers = [
-            'id', 'projectId', 'engine', 'keyword', 'position', 'presence',
-            'answerSnippet', 'citationsCount', 'observedUrls',
-            'competitorsMentioned', 'timestamp'
-            # Note: 'createdAt' usually defaults to NOW() in Supabase,
-            # so we don't strictly need to include it unless the seed data has specific values.
-            # Adjust if your seed data *requires* a specific createdAt.
-        ]
-
-        # Use io.StringIO for cleaner CSV writing, especially with newlines
-        output = io.StringIO()
-        writer = csv.DictWriter(output, fieldnames=headers, quoting=csv.QUOTE_MINIMAL)
-
-        writer.writeheader()
-
-        for check in checks_data:
-            # Prepare row data, ensuring all expected headers are present
-            row = {header: check.get(header) for header in headers}
-
-            # Handle potential None values for integer/boolean before formatting
-            if row['position'] is None:
-                row['position'] = '' # Use empty string for NULL integer
-            if row['citationsCount'] is None:
-                row['citationsCount'] = 0 # Default to 0 if missing
-
-            # Correctly format the array columns
-            row['observedUrls'] = format_supabase_array(check.get('observedUrls', []))
-            row['competitorsMentioned'] = format_supabase_array(check.get('competitorsMentioned', []))
-
-            # Format boolean for CSV (True -> true, False -> false)
-            row['presence'] = str(row['presence']).lower() if row['presence'] is not None else ''
-
-
-            # Write the processed row
-            writer.writerow(row)
-
-        # Write the buffer content to the actual file
-        with open(output_csv_path, 'w', newline='', encoding='utf-8') as f:
-            f.write(output.getvalue())
-
-        print(f"Successfully created '{output_csv_path}' with correct Supabase formatting.")
-
-except FileNotFoundError:
-    print(f"Error: Could not find the JSON file at {json_file_path}")
-except json.JSONDecodeError:
-    print(f"Error: Could not decode JSON from {json_file_path}. Check if it's valid JSON.")
-except Exception as e:
-    print(f"An unexpected error occurred: {e}")
\ No newline at end of file
+def format_row(check):
+    """Map a check dict onto the CSV columns with Supabase formatting"""
+    row = {header: check.get(header) for header in HEADERS}
+
+    # Use empty string for NULL integer, default citations to 0
+    if row['position'] is None:
+        row['position'] = ''
+    if row['citationsCount'] is None:
+        row['citationsCount'] = 0
+
+    row['observedUrls'] = format_supabase_array(check.get('observedUrls', []))
+    row['competitorsMentioned'] = format_supabase_array(check.get('competitorsMentioned', []))
+
+    # Format boolean for CSV (True -> true, False -> false)
+    row['presence'] = str(row['presence']).lower() if row['presence'] is not None else ''
+    return row
+
+def open_output(path, compress=None):
+    """Open the CSV for writing; gzip when asked or when the path ends in .gz"""
+    if compress is None:
+        compress = path.endswith('.gz')
+    if compress:
+        return gzip.open(path, 'wt', newline='', encoding='utf-8', compresslevel=6)
+    return open(path, 'w', newline='', encoding='utf-8')
+
+def convert(sources, output_path, compress=None, progress=None, progress_every=50000):
+    """
+    Stream checks from every source into one CSV and return the row count.
+    progress(rows, elapsed) is called every progress_every rows. The output
+    is only created once a first check is read, and removed again if a later
+    source fails, so no header-only or partial CSV is left behind.
+    """
+    rows = 0
+    started = time.perf_counter()
+    checks = (check for source in sources for check in iter_checks(source))
+    first = next(checks, None)
+    if first is None:
+        return 0
+
+    try:
+        with open_output(output_path, compress) as f:
+            writer = csv.DictWriter(f, fieldnames=HEADERS, quoting=csv.QUOTE_MINIMAL)
+            writer.writeheader()
+            for check in itertools.chain([first], checks):
+                writer.writerow(format_row(check))
+                rows += 1
+                if progress and rows % progress_every == 0:
+                    progress(rows, time.perf_counter() - started)
+    except BaseException:
+        if os.path.exists(output_path):
+            os.unlink(output_path)
+        raise
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert visibility checks to a Supabase CSV')
+    parser.add_argument('sources', nargs='*', default=['seed_data.json'],
+                        help="seed_data.json, .jsonl or .db sources ('-' reads JSONL from stdin)")
+    parser.add_argument('-o', '--output', default='checks_for_supabase.csv', help='Output CSV path')
+    parser.add_argument('--gzip', action='store_true', default=None,
+                        help='Gzip the output (implied by a .gz output path)')
+    args = parser.parse_args()
+
+    def progress(rows, elapsed):
+        print(f"\r📄 {rows} rows written ({rows / elapsed:,.0f} rows/sec)", end='', file=sys.stderr)
+
+    started = time.perf_counter()
+    try:
+        rows = convert(args.sources, args.output, args.gzip, progress)
+    except FileNotFoundError as e:
+        print(f"Error: Could not find the input file {e.filename}")
+        sys.exit(1)
+    except (json.JSONDecodeError, ValueError) as e:
+        print(f"Error: Could not decode JSON input: {e}")
+        sys.exit(1)
+
+    elapsed = time.perf_counter() - started
+    if not rows:
+        print(f"Error: no checks found in {', '.join(args.sources)}; '{args.output}' was not written")
+        sys.exit(1)
+    print(file=sys.stderr)
+    print(f"Successfully created '{args.output}' with {rows} rows "
+          f"({rows / elapsed:,.0f} rows/sec).")
+
+if __name__ == '__main__':
+    main()
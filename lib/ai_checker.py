@@ -1,66 +1,487 @@
 #!/usr/bin/env python3
+import time
+_imports_started = time.perf_counter()
 import sys
 import json
 import os
-from emergentintegrations.llm.chat import LlmChat, UserMessage
-import uuid
+import functools
+from response_cache import cache_from_env
+from analyzer import ResponseAnalyzer
+from blob_store import store_from_env
+from engines import SYSTEM_MESSAGE, get_engine
+import metrics
+from metrics import new_timings, record_check, stage
 
-def check_visibility(keyword, brand, competitors):
-    api_key = os.environ.get('EMERGENT_LLM_KEY')
-    if not api_key:
-        raise Exception('EMERGENT_LLM_KEY not found in environment')
-    
-    session_id = str(uuid.uuid4())
-    
-    chat = LlmChat(
-        api_key=api_key,
-        session_id=session_id,
-        system_message="You are a search assistant. Provide direct, comprehensive answers to queries as if you were an AI search engine like ChatGPT, Perplexity, or Gemini. Include specific recommendations when relevant."
-    ).with_model('openai', 'gpt-4o-mini')
-    
-    user_message = UserMessage(text=keyword)
-    response = chat.send_message(user_message)
-    answer = response.text or ''
-    
-    # Analyze response
-    lower_answer = answer.lower()
-    lower_brand = brand.lower()
-    
-    # Check brand presence
-    brand_mentioned = lower_brand in lower_answer
-    
-    # Count citations
-    citations_count = lower_answer.count(lower_brand)
-    
-    # Extract URLs (simple)
-    import re
-    url_pattern = r'https?://[^\s]+'
-    urls = re.findall(url_pattern, answer)
-    
-    # Check position
-    position = None
-    if brand_mentioned:
-        words = answer.split()
-        for i, word in enumerate(words):
-            if lower_brand in word.lower():
-                position = i + 1
-                break
-    
-    # Check competitors
-    competitors_mentioned = [comp for comp in competitors if comp.lower() in lower_answer]
-    
-    result = {
-        'presence': brand_mentioned,
-        'position': position,
-        'citations_count': citations_count,
-        'observed_urls': urls,
-        'competitors_mentioned': competitors_mentioned,
-        'answer_snippet': answer[:500]
-    }
-    
+IMPORT_SECONDS = time.perf_counter() - _imports_started
+
+# asyncio, inspect and concurrent.futures are imported by the code paths that
+# use them (batch mode, multi-engine dispatch) so the worker and one-shot CLI
+# start without them; inside a coroutine the import is a sys.modules lookup
+
+def query_key(keyword, engine=None):
+    """Identity of an LLM call: identical keys always get identical prompts"""
+    provider, model = get_engine(engine).key
+    return (provider, model, SYSTEM_MESSAGE, keyword)
+
+def query_llm(keyword, engine=None):
+    """
+    Send the keyword to an engine (the default one when not given) and return
+    the raw answer text. Calls go through the shared rate limiter, which
+    retries 429s and transient errors.
+    """
+    return get_engine(engine).query(keyword)
+
+_response_cache = None
+_response_cache_loaded = False
+
+def get_response_cache():
+    """Return the shared on-disk response cache, or None if it is disabled"""
+    global _response_cache, _response_cache_loaded
+    if not _response_cache_loaded:
+        _response_cache = cache_from_env()
+        _response_cache_loaded = True
+    return _response_cache
+
+def cached_query(keyword, engine=None, query=None, timings=None):
+    """
+    Query the engine through the response cache when one is configured.
+    query, if given, is called with the keyword instead of the engine.
+    """
+    cache = get_response_cache()
+    key = query_key(keyword, engine)
+    if cache is not None:
+        with stage(timings, 'cache'):
+            answer = cache.get(key)
+        if answer is not None:
+            metrics.count('aeo_cache_hits_total', engine=engine or 'default')
+            return answer
+
+    with stage(timings, 'llm'):
+        answer = query(keyword) if query is not None else query_llm(keyword, engine)
+    metrics.count('aeo_llm_calls_total', engine=engine or 'default')
+    if cache is not None:
+        with stage(timings, 'cache'):
+            cache.set(key, answer)
+    return answer
+
+class RequestCoalescer:
+    """
+    Share one LLM call between identical queries within a run.
+
+    Concurrent callers with the same key await the same in-flight future and
+    later callers reuse the stored answer, so each (model, system message,
+    keyword) is sent at most once per coalescer. Failed calls are not kept,
+    letting a later caller retry them.
+    """
+
+    def __init__(self):
+        self.answers = {}
+        self.in_flight = {}
+        self.calls = 0
+        self.hits = 0
+
+    async def run(self, key, factory):
+        import asyncio
+        if key in self.answers:
+            self.hits += 1
+            return self.answers[key]
+        if key in self.in_flight:
+            self.hits += 1
+            return await asyncio.shield(self.in_flight[key])
+
+        self.calls += 1
+        future = asyncio.ensure_future(factory())
+        self.in_flight[key] = future
+        try:
+            answer = await asyncio.shield(future)
+        finally:
+            del self.in_flight[key]
+        self.answers[key] = answer
+        return answer
+
+    def run_sync(self, key, factory):
+        if key in self.answers:
+            self.hits += 1
+            return self.answers[key]
+        self.calls += 1
+        answer = factory()
+        self.answers[key] = answer
+        return answer
+
+@functools.lru_cache(maxsize=64)
+def _project_analyzer(brand, competitors):
+    return ResponseAnalyzer(brand, competitors)
+
+def get_analyzer(brand, competitors):
+    """Return the compiled analyzer for a project, building it once"""
+    return _project_analyzer(brand, tuple(competitors))
+
+_blob_store = None
+_blob_store_loaded = False
+
+def get_blob_store():
+    """Return the full-answer blob store, or None if it is disabled"""
+    global _blob_store, _blob_store_loaded
+    if not _blob_store_loaded:
+        _blob_store = store_from_env()
+        _blob_store_loaded = True
+    return _blob_store
+
+def analyze_answer(answer, brand, competitors, timings=None):
+    """Extract brand visibility metrics from an LLM answer"""
+    with stage(timings, 'analysis'):
+        result = get_analyzer(brand, competitors).analyze(answer)
+        result['answer_snippet'] = answer[:500]
+
+    # Keep the full answer for later reanalysis; rows only carry its hash
+    store = get_blob_store()
+    if store is not None:
+        with stage(timings, 'blob_store'):
+            result['answer_hash'] = store.put(answer)
     return result
 
+def check_visibility(keyword, brand, competitors):
+    timings = new_timings()
+    with stage(timings, 'total'):
+        answer = cached_query(keyword, timings=timings)
+        result = analyze_answer(answer, brand, competitors, timings)
+    return record_check(result, timings)
+
+_dispatch_pool = None
+
+def get_dispatch_pool():
+    """Threads that query a keyword's engines in parallel (AI_CHECKER_DISPATCH_THREADS)"""
+    global _dispatch_pool
+    if _dispatch_pool is None:
+        from concurrent.futures import ThreadPoolExecutor
+        _dispatch_pool = ThreadPoolExecutor(
+            max_workers=int(os.environ.get('AI_CHECKER_DISPATCH_THREADS', '16')),
+            thread_name_prefix='engine'
+        )
+    return _dispatch_pool
+
+def check_visibility_engines(keyword, brand, competitors, engines, coalescer=None):
+    """
+    Check one keyword for several engines, querying each distinct model once.
+
+    Distinct engines are queried in parallel, each through its own adapter,
+    so a run takes about as long as its slowest engine. Engines that resolve
+    to the same query key share a single answer and a single analysis.
+    Returns a dict mapping engine to its result, or to {"error": message}
+    for an engine whose query failed, so one failing engine does not cost
+    the answers of the others.
+    """
+    started = time.perf_counter()
+    coalescer = coalescer or RequestCoalescer()
+    keys = {}
+    for engine in engines:
+        keys.setdefault(query_key(keyword, engine), engine)
+    timings = {key: new_timings() for key in keys}
+
+    def answer(key, engine):
+        return coalescer.run_sync(key, lambda: cached_query(keyword, engine, timings=timings[key]))
+
+    answers = {}
+    errors = {}
+    if len(keys) == 1:
+        for key, engine in keys.items():
+            try:
+                answers[key] = answer(key, engine)
+            except Exception as e:
+                errors[key] = e
+    else:
+        pool = get_dispatch_pool()
+        futures = {key: pool.submit(answer, key, engine) for key, engine in keys.items()}
+        for key, future in futures.items():
+            error = future.exception()
+            if error is None:
+                answers[key] = future.result()
+            else:
+                errors[key] = error
+
+    analyses = {key: analyze_answer(text, brand, competitors, timings[key])
+                for key, text in answers.items()}
+    total = time.perf_counter() - started
+
+    results = {}
+    observed = set()
+    for engine in engines:
+        key = query_key(keyword, engine)
+        if key in errors:
+            results[engine] = {'error': str(errors[key])}
+            metrics.count('aeo_checks_total', engine=engine, outcome='error')
+            continue
+        check_timings = None if timings[key] is None else {**timings[key], 'total': total}
+        # Engines sharing a call report its timings, but the stages are observed once
+        results[engine] = record_check(dict(analyses[key]), check_timings, engine,
+                                       observe=key not in observed)
+        observed.add(key)
+    return results
+
+async def _run_job(job, query, semaphore, timeout, coalescer):
+    import asyncio
+    import inspect
+    started = time.perf_counter()
+    key = query_key(job['keyword'], job.get('engine'))
+    cache = get_response_cache()
+    timings = new_timings()
+
+    async def call():
+        if cache is not None:
+            with stage(timings, 'cache'):
+                answer = cache.get(key)
+            if answer is not None:
+                return answer
+
+        async with semaphore:
+            with stage(timings, 'llm'):
+                if query is None:
+                    pending = asyncio.to_thread(query_llm, job['keyword'], job.get('engine'))
+                elif inspect.iscoroutinefunction(query):
+                    pending = query(job['keyword'])
+                else:
+                    pending = asyncio.to_thread(query, job['keyword'])
+                answer = await asyncio.wait_for(pending, timeout)
+
+        if cache is not None:
+            with stage(timings, 'cache'):
+                cache.set(key, answer)
+        return answer
+
+    answer = await coalescer.run(key, call)
+    result = analyze_answer(answer, job['brand'], job.get('competitors') or [], timings)
+    if timings is not None:
+        timings['total'] = time.perf_counter() - started
+    return record_check(result, timings, job.get('engine'))
+
+async def check_visibility_batch(jobs, max_concurrency=8, timeout=None, query=None,
+                                 coalescer=None):
+    """
+    Run many visibility checks concurrently and yield results as they finish.
+
+    Each job is a dict with "keyword", "brand", optional "competitors",
+    "engine" and "id". At most max_concurrency LLM calls are in flight at once
+    and each one is bounded by timeout seconds. Jobs whose query key matches
+    (same model, system message and keyword) share one LLM call through the
+    coalescer. Results are yielded in completion order as
+    {"id", "job", "result"} or {"id", "job", "error"}.
+
+    Jobs are sent to their engine's adapter; query can instead be any sync or
+    async callable taking the keyword and returning the answer text, which
+    lets the batch run against a local fake LLM.
+    """
+    import asyncio
+    semaphore = asyncio.Semaphore(max_concurrency)
+    coalescer = coalescer or RequestCoalescer()
+    tasks = {}
+    for job in jobs:
+        task = asyncio.ensure_future(_run_job(job, query, semaphore, timeout, coalescer))
+        tasks[task] = job
+
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                job = tasks[task]
+                item = {'id': job.get('id'), 'job': job}
+                try:
+                    item['result'] = task.result()
+                except asyncio.TimeoutError:
+                    item['error'] = f'Check timed out after {timeout}s'
+                except Exception as e:
+                    item['error'] = str(e)
+                yield item
+    finally:
+        for task in pending:
+            task.cancel()
+
+def handle_request(request):
+    """Run a single worker request and build the response line"""
+    request_id = request.get('id')
+    try:
+        if request.get('engines'):
+            result = check_visibility_engines(
+                request['keyword'],
+                request['brand'],
+                request.get('competitors') or [],
+                request['engines']
+            )
+        else:
+            result = check_visibility(
+                request['keyword'],
+                request['brand'],
+                request.get('competitors') or []
+            )
+        return {'id': request_id, 'result': result}
+    except Exception as e:
+        for engine in request.get('engines') or ['default']:
+            metrics.count('aeo_checks_total', engine=engine, outcome='error')
+        return {'id': request_id, 'error': str(e)}
+
+def record_startup():
+    """
+    Observe the import time and, when the spawner set AI_CHECKER_SPAWNED_AT
+    (epoch seconds), the time from spawn to ready; returns them as timings
+    """
+    timings = new_timings()
+    if timings is None:
+        return None
+    # Zygote children inherit their modules, so they have no import time
+    if IMPORT_SECONDS is not None:
+        # Load the engine clients now so their deferred imports are counted
+        # here rather than in the first check's llm stage
+        started = time.perf_counter()
+        preload()
+        timings['import'] = IMPORT_SECONDS + time.perf_counter() - started
+    spawned_at = os.environ.get('AI_CHECKER_SPAWNED_AT')
+    if spawned_at:
+        timings['startup'] = max(time.time() - float(spawned_at), 0.0)
+    for name, seconds in timings.items():
+        metrics.observe('aeo_check_stage_seconds', seconds, stage=name)
+    return timings
+
+def run_worker(stdin=sys.stdin, stdout=sys.stdout):
+    """
+    Serve newline-delimited JSON requests until stdin closes.
+
+    Each request line is {"id", "keyword", "brand", "competitors"} and each
+    response line echoes the id with either a "result" or an "error", so one
+    interpreter (and one emergentintegrations import) serves many checks.
+    Requests carrying an "engines" list get a result per engine, with
+    identical LLM queries sent only once.
+    """
+    ready = {'ready': True, 'pid': os.getpid()}
+    startup = record_startup()
+    if startup is not None:
+        ready['timings'] = metrics.timings_ms(startup)
+    stdout.write(json.dumps(ready) + '\n')
+    stdout.flush()
+
+    for line in stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            response = {'id': None, 'error': f'Invalid request: {e}'}
+        else:
+            response = handle_request(request)
+        stdout.write(json.dumps(response) + '\n')
+        stdout.flush()
+
+def run_batch(stdin=sys.stdin, stdout=sys.stdout):
+    """
+    Read newline-delimited JSON jobs from stdin and stream results as they
+    complete. Concurrency and the per-job timeout come from
+    AI_CHECKER_CONCURRENCY and AI_CHECKER_JOB_TIMEOUT.
+    """
+    import asyncio
+    jobs = [json.loads(line) for line in stdin if line.strip()]
+    record_startup()
+    max_concurrency = int(os.environ.get('AI_CHECKER_CONCURRENCY', '8'))
+    timeout = float(os.environ.get('AI_CHECKER_JOB_TIMEOUT', '60'))
+
+    async def stream():
+        async for item in check_visibility_batch(jobs, max_concurrency, timeout):
+            item.pop('job')
+            stdout.write(json.dumps(item) + '\n')
+            stdout.flush()
+
+    asyncio.run(stream())
+
+def preload():
+    """
+    Import everything a check can reach, so children forked afterwards start
+    warm. Nothing holding sockets, threads or SQLite connections is created:
+    those are built per child, after the fork.
+    """
+    import asyncio  # noqa: F401
+    import email.utils  # noqa: F401
+    import inspect  # noqa: F401
+    from concurrent.futures import ThreadPoolExecutor  # noqa: F401
+    import engines
+    import http_client
+    http_client._load_httpx()
+    engines._load_llm_chat()
+
+def _serve_forked(conn, accepted_at):
+    """Child side of the zygote: serve one worker connection, then exit"""
+    import signal
+    global IMPORT_SECONDS
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    IMPORT_SECONDS = None
+    # Startup is measured from the accept to the ready line
+    os.environ['AI_CHECKER_SPAWNED_AT'] = str(accepted_at)
+    code = 0
+    try:
+        with conn, conn.makefile('r', encoding='utf-8') as reader, \
+                conn.makefile('w', encoding='utf-8') as writer:
+            run_worker(reader, writer)
+    except (BrokenPipeError, ConnectionResetError):
+        pass
+    except Exception as e:
+        print(f"❌ Zygote child {os.getpid()} failed: {e}", file=sys.stderr)
+        code = 1
+    finally:
+        # os._exit skips atexit, so flush metrics by hand
+        if metrics.registry is not None:
+            metrics.registry.flush()
+        os._exit(code)
+
+def run_zygote(path):
+    """
+    Preload the checker once and fork a ready worker per connection.
+
+    Listens on the Unix socket at path; every client that connects gets its
+    own forked child speaking the --worker protocol over the socket, so a new
+    worker costs a fork instead of an interpreter start and module imports.
+    """
+    import signal
+    import socket
+
+    preload()
+    if os.path.exists(path):
+        os.unlink(path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(64)
+    # Exited children are reaped by the kernel
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *args: sys.exit(0))
+    print(f"🧬 Zygote {os.getpid()} ready on {path}", file=sys.stderr)
+
+    try:
+        while True:
+            conn, _ = server.accept()
+            accepted_at = time.time()
+            if os.fork() == 0:
+                server.close()
+                _serve_forked(conn, accepted_at)
+            conn.close()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        if os.path.exists(path):
+            os.unlink(path)
+
 if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--zygote':
+        run_zygote(sys.argv[2] if len(sys.argv) > 2 else
+                   os.environ.get('AI_CHECKER_ZYGOTE_SOCKET', '/tmp/aeo-checker.sock'))
+        sys.exit(0)
+
+    if len(sys.argv) > 1 and sys.argv[1] == '--worker':
+        run_worker()
+        sys.exit(0)
+
+    if len(sys.argv) > 1 and sys.argv[1] == '--batch':
+        run_batch()
+        sys.exit(0)
+
     if len(sys.argv) < 3:
         print(json.dumps({'error': 'Missing arguments'}), file=sys.stderr)
         sys.exit(1)
@@ -70,8 +491,9 @@ if __name__ == '__main__':
     competitors = json.loads(sys.argv[3]) if len(sys.argv) > 3 else []
     
     try:
+        record_startup()
         result = check_visibility(keyword, brand, competitors)
         print(json.dumps(result))
     except Exception as e:
         print(json.dumps({'error': str(e)}), file=sys.stderr)
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
@@ -0,0 +1,486 @@
+#!/usr/bin/env python3
+"""
+In-memory columnar analytics over visibility checks
+Loads checks into NumPy arrays, with project, engine, keyword and competitor
+names stored once and referenced by integer codes, and answers trend queries
+(visibility and average position per group, rolling windows, day-over-day
+deltas, competitor share of voice, keyword x engine heatmaps) with vectorized
+group-bys instead of rescanning rows. A loaded table can be saved as .npy
+files that other processes memory-map, sharing one copy through the page
+cache. Requires numpy (pip install numpy)
+
+Usage:
+  analytics.py checks.db --by engine                      # visibility per engine
+  analytics.py seed_data.json --query rolling --window 7 --days 30
+  analytics.py analytics/checks --query sov --project ID  # export_parquet dataset
+  analytics.py checks.db exports/*.jsonl --save analytics/table
+  analytics.py --table analytics/table --query heatmap --project ID
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from itertools import chain
+
+from checks_io import iter_checks, iter_chunks, parse_timestamp
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Columns grouped by code; 'day' can be grouped by as well
+DIMENSIONS = ('project', 'engine', 'keyword')
+COLUMNS = ('project', 'engine', 'keyword', 'day', 'presence', 'position', 'citations',
+           'competitor_offsets', 'competitor_codes')
+CATEGORIES_FILE = 'categories.json'
+# Group ids spanning more combinations than this are renumbered to the ones present
+DENSE_GROUPS = 1 << 22
+
+class Categories:
+    """Names of one categorical column; a name's code is its index in names"""
+
+    def __init__(self, names=()):
+        self.names = list(names)
+        self.index = {name: code for code, name in enumerate(self.names)}
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, name):
+        code = self.index[name] = len(self.names)
+        self.names.append(name)
+        return code
+
+    def encode(self, values):
+        index = self.index
+        return [index[value] if value in index else self.add(value) for value in values]
+
+def _utc_day(timestamp):
+    """ISO day of a check timestamp in UTC, parsing only timestamps with an offset"""
+    tail = timestamp[10:]
+    if tail.endswith(('Z', '+00:00')) or ('+' not in tail and '-' not in tail):
+        return timestamp[:10]
+    return parse_timestamp(timestamp).date().isoformat()
+
+def _iso_day(day):
+    return str(np.datetime64(int(day), 'D'))
+
+def _day_number(value):
+    return int(np.datetime64(value, 'D').astype(np.int64))
+
+def _percent(part, total):
+    return round(100.0 * part / total, 2) if total else None
+
+def _mean(total, count):
+    return round(total / count, 2) if count else None
+
+class CheckTable:
+    """
+    Checks as parallel NumPy columns.
+
+    project, engine and keyword are int32 codes into categories, day is days
+    since 1970-01-01 (UTC), position is -1 where the brand was not found.
+    Competitors mentioned by row i are
+    competitor_codes[competitor_offsets[i]:competitor_offsets[i + 1]].
+
+    Every query takes the same filters: project (id), start and end (ISO days,
+    inclusive) and days (the last N days up to end or the latest check), and
+    returns JSON-ready dicts.
+    """
+
+    def __init__(self, columns, categories):
+        self.columns = columns
+        self.categories = categories
+        for name in COLUMNS:
+            setattr(self, name, columns[name])
+
+    def __len__(self):
+        return len(self.day)
+
+    @classmethod
+    def from_checks(cls, checks, chunk_size=100000):
+        """Build a table from check dicts, converting chunk_size rows at a time"""
+        if np is None:
+            raise RuntimeError('numpy is required: pip install numpy')
+
+        categories = {name: Categories() for name in (*DIMENSIONS, 'competitor')}
+        parts = {name: [] for name in COLUMNS}
+        offset = 0
+        for chunk in iter_chunks(checks, chunk_size):
+            count = len(chunk)
+            for name, key in (('project', 'projectId'), ('engine', 'engine'), ('keyword', 'keyword')):
+                codes = categories[name].encode(check[key] for check in chunk)
+                parts[name].append(np.array(codes, dtype=np.int32))
+            days = [_utc_day(check['timestamp']) for check in chunk]
+            parts['day'].append(np.array(days, dtype='datetime64[D]').astype(np.int32))
+            parts['presence'].append(np.fromiter((bool(c.get('presence')) for c in chunk), bool, count))
+            parts['position'].append(np.fromiter(
+                (-1 if c.get('position') is None else c['position'] for c in chunk), np.int32, count))
+            parts['citations'].append(np.fromiter(
+                (c.get('citationsCount') or 0 for c in chunk), np.int32, count))
+
+            mentioned = [c.get('competitorsMentioned') or [] for c in chunk]
+            lengths = np.fromiter(map(len, mentioned), np.int64, count)
+            parts['competitor_offsets'].append(offset + np.cumsum(lengths))
+            offset += int(lengths.sum())
+            parts['competitor_codes'].append(np.array(
+                categories['competitor'].encode(chain.from_iterable(mentioned)), dtype=np.int32))
+
+        parts['competitor_offsets'].insert(0, np.zeros(1, dtype=np.int64))
+        empty = {'presence': bool, 'competitor_offsets': np.int64}
+        columns = {name: np.concatenate(arrays) if arrays else np.zeros(0, empty.get(name, np.int32))
+                   for name, arrays in parts.items()}
+        return cls(columns, categories)
+
+    @classmethod
+    def from_sources(cls, paths, chunk_size=100000):
+        """Build a table from seed JSON, JSONL or SQLite sources (see checks_io)"""
+        return cls.from_checks(chain.from_iterable(iter_checks(path) for path in paths), chunk_size)
+
+    @classmethod
+    def from_parquet(cls, path, file_format='parquet'):
+        """
+        Load a dataset written by export_parquet.py. Its columns are already
+        dictionary-encoded, so only the dictionaries are converted in Python.
+        Requires pyarrow.
+        """
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.dataset as ds
+
+        table = ds.dataset(path, format=file_format, partitioning='hive').to_table(
+            columns=['projectId', 'day', 'engine', 'keyword', 'presence', 'position',
+                     'citationsCount', 'competitorsMentioned'])
+        categories = {name: Categories() for name in (*DIMENSIONS, 'competitor')}
+
+        def encode(array, name):
+            if not pa.types.is_dictionary(array.type):
+                array = pc.cast(array, pa.string()).dictionary_encode()
+            codes = np.array(categories[name].encode(array.dictionary.to_pylist()), dtype=np.int32)
+            return codes[array.indices.to_numpy(zero_copy_only=False)]
+
+        def column(name):
+            return table.column(name).combine_chunks()
+
+        day = column('day')
+        if not pa.types.is_date(day.type):
+            day = pc.cast(pc.cast(day, pa.string()), pa.date32())
+        mentioned = column('competitorsMentioned')
+        # Offsets of a sliced list array need not start at 0
+        offsets = mentioned.offsets.to_numpy().astype(np.int64)
+        columns = {
+            'project': encode(column('projectId'), 'project'),
+            'engine': encode(column('engine'), 'engine'),
+            'keyword': encode(column('keyword'), 'keyword'),
+            'day': pc.cast(day, pa.int32()).to_numpy(zero_copy_only=False).astype(np.int32),
+            'presence': pc.fill_null(column('presence'), False).to_numpy(zero_copy_only=False),
+            'position': pc.fill_null(column('position'), -1).to_numpy(zero_copy_only=False).astype(np.int32),
+            'citations': pc.fill_null(column('citationsCount'), 0).to_numpy(zero_copy_only=False).astype(np.int32),
+            'competitor_offsets': offsets - offsets[0],
+            'competitor_codes': encode(mentioned.flatten(), 'competitor') if len(mentioned)
+            else np.zeros(0, dtype=np.int32),
+        }
+        return cls(columns, categories)
+
+    def save(self, directory):
+        """Write one .npy file per column plus the category names"""
+        os.makedirs(directory, exist_ok=True)
+        for name in COLUMNS:
+            np.save(os.path.join(directory, f'{name}.npy'), self.columns[name])
+        with open(os.path.join(directory, CATEGORIES_FILE), 'w', encoding='utf-8') as f:
+            json.dump({name: categories.names for name, categories in self.categories.items()}, f)
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """
+        Open a saved table. Memory-mapped columns are read from the page
+        cache on demand, so any number of processes share one copy.
+        """
+        if np is None:
+            raise RuntimeError('numpy is required: pip install numpy')
+        columns = {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r' if mmap else None)
+                   for name in COLUMNS}
+        with open(os.path.join(directory, CATEGORIES_FILE), 'r', encoding='utf-8') as f:
+            categories = {name: Categories(names) for name, names in json.load(f).items()}
+        return cls(columns, categories)
+
+    def day_range(self, start=None, end=None, days=None):
+        """First and last day numbers selected by the filters; None is unbounded"""
+        first = _day_number(start) if start else None
+        last = _day_number(end) if end else None
+        if days is not None:
+            latest = last if last is not None else (int(self.day.max()) if len(self) else 0)
+            first = max(first if first is not None else latest - days + 1, latest - days + 1)
+        return first, last
+
+    def mask(self, project=None, start=None, end=None, days=None, lookback=0):
+        """
+        Boolean row filter, or None when every row is selected. lookback
+        extends the range that many days before its first day.
+        """
+        mask = None
+
+        def narrow(condition):
+            nonlocal mask
+            mask = condition if mask is None else mask & condition
+
+        if project is not None:
+            code = self.categories['project'].index.get(project, -1)
+            narrow(self.project == code)
+        first, last = self.day_range(start, end, days)
+        if first is not None:
+            narrow(self.day >= first - lookback)
+        if last is not None:
+            narrow(self.day <= last)
+        return mask
+
+    def _select(self, column, mask):
+        return column if mask is None else column[mask]
+
+    def _groups(self, by, mask):
+        """
+        Group id of every selected row and a function turning a group id into
+        its labels, e.g. {'engine': 'ChatGPT'}. Ids are dense, 0..count-1.
+        """
+        gid = None
+        dimensions = []
+        for name in by:
+            if name == 'day':
+                codes = self._select(self.day, mask)
+                first = int(codes.min()) if len(codes) else 0
+                size = int(codes.max()) - first + 1 if len(codes) else 1
+                codes = codes - first
+                dimensions.append((name, size, lambda code, first=first: _iso_day(first + code)))
+            elif name in DIMENSIONS:
+                codes = self._select(self.columns[name], mask)
+                size = max(len(self.categories[name]), 1)
+                dimensions.append((name, size, self.categories[name].names.__getitem__))
+            else:
+                raise ValueError(f'Cannot group by {name!r}; use day or one of {", ".join(DIMENSIONS)}')
+            gid = codes.astype(np.int64) if gid is None else gid * size + codes
+        if gid is None:
+            gid = np.zeros(len(self) if mask is None else int(np.count_nonzero(mask)), dtype=np.int64)
+
+        count = 1
+        for _, size, _ in dimensions:
+            count *= size
+        present = None
+        if count > max(DENSE_GROUPS, len(gid)):
+            present, gid = np.unique(gid, return_inverse=True)
+            count = len(present)
+
+        def labels(group):
+            group = int(group if present is None else present[group])
+            result = {}
+            for name, size, label in reversed(dimensions):
+                group, code = divmod(group, size)
+                result[name] = label(code)
+            return dict(reversed(result.items()))
+
+        return gid, count, labels
+
+    def _sums(self, index, size, mask):
+        """Per-index check, presence, position and citation totals"""
+        position = self._select(self.position, mask)
+        # Weighting by found and the clipped position skips the -1s without
+        # copying out the rows that have a position
+        return {
+            'total': np.bincount(index, minlength=size),
+            'present': np.bincount(index, weights=self._select(self.presence, mask), minlength=size),
+            'positionSum': np.bincount(index, weights=np.maximum(position, 0), minlength=size),
+            'positionCount': np.bincount(index, weights=position >= 0, minlength=size),
+            'citations': np.bincount(index, weights=self._select(self.citations, mask), minlength=size),
+        }
+
+    def summary(self, by=('engine',), **filters):
+        """Checks, visibility (% of checks mentioning the brand), average position and citations per group"""
+        mask = self.mask(**filters)
+        gid, count, labels = self._groups(by, mask)
+        sums = self._sums(gid, count, mask)
+        return [
+            {
+                **labels(group),
+                'total': int(sums['total'][group]),
+                'present': int(sums['present'][group]),
+                'visibility': _percent(sums['present'][group], sums['total'][group]),
+                'avgPosition': _mean(sums['positionSum'][group], sums['positionCount'][group]),
+                'citations': int(sums['citations'][group]),
+            }
+            for group in np.flatnonzero(sums['total'])
+        ]
+
+    def heatmap(self, **filters):
+        """Visibility per keyword (rows) and engine (columns); None where never checked"""
+        rows = self.summary(('keyword', 'engine'), **filters)
+        keywords = sorted({row['keyword'] for row in rows})
+        engines = sorted({row['engine'] for row in rows})
+        cells = {(row['keyword'], row['engine']): row['visibility'] for row in rows}
+        return {
+            'keywords': keywords,
+            'engines': engines,
+            'visibility': [[cells.get((keyword, engine)) for engine in engines] for keyword in keywords],
+        }
+
+    def _daily(self, by, mask):
+        """Per-group, per-day sums as (groups x days) matrices"""
+        gid, count, labels = self._groups(by, mask)
+        days = self._select(self.day, mask)
+        first = int(days.min()) if len(days) else 0
+        span = int(days.max()) - first + 1 if len(days) else 0
+        sums = self._sums(gid * span + (days - first), count * span, mask)
+        return {name: values.reshape(count, span) for name, values in sums.items()}, labels, first
+
+    def rolling(self, window=7, by=('engine',), **filters):
+        """
+        Visibility and average position over the trailing window days, for
+        every group and every day whose window holds at least one check.
+        Windows at the start of the filtered range still reach back before it.
+        """
+        sums, labels, first = self._daily(by, self.mask(lookback=window - 1, **filters))
+        span = sums['total'].shape[1]
+        upper = np.arange(1, span + 1)
+        lower = np.maximum(upper - window, 0)
+        windowed = {}
+        for name, values in sums.items():
+            cumulative = np.zeros((values.shape[0], span + 1))
+            np.cumsum(values, axis=1, out=cumulative[:, 1:])
+            windowed[name] = cumulative[:, upper] - cumulative[:, lower]
+        shown = windowed['total'] > 0
+        since, _ = self.day_range(filters.get('start'), filters.get('end'), filters.get('days'))
+        if since is not None:
+            shown[:, :max(since - first, 0)] = False
+
+        return [
+            {
+                **labels(group),
+                'day': _iso_day(first + day),
+                'total': int(windowed['total'][group, day]),
+                'visibility': _percent(windowed['present'][group, day], windowed['total'][group, day]),
+                'avgPosition': _mean(windowed['positionSum'][group, day], windowed['positionCount'][group, day]),
+            }
+            for group, day in zip(*np.nonzero(shown))
+        ]
+
+    def day_over_day(self, by=('engine',), **filters):
+        """
+        Daily visibility and average position per group, with the change from
+        the previous day (None when that day had no checks)
+        """
+        sums, labels, first = self._daily(by, self.mask(**filters))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            visibility = 100.0 * sums['present'] / sums['total']
+            position = sums['positionSum'] / sums['positionCount']
+        visibility_delta = np.full(visibility.shape, np.nan)
+        visibility_delta[:, 1:] = visibility[:, 1:] - visibility[:, :-1]
+        position_delta = np.full(position.shape, np.nan)
+        position_delta[:, 1:] = position[:, 1:] - position[:, :-1]
+
+        def value(number):
+            return None if np.isnan(number) else round(float(number), 2)
+
+        return [
+            {
+                **labels(group),
+                'day': _iso_day(first + day),
+                'total': int(sums['total'][group, day]),
+                'visibility': value(visibility[group, day]),
+                'visibilityDelta': value(visibility_delta[group, day]),
+                'avgPosition': value(position[group, day]),
+                'avgPositionDelta': value(position_delta[group, day]),
+            }
+            for group, day in zip(*np.nonzero(sums['total']))
+        ]
+
+    def share_of_voice(self, by=('engine',), **filters):
+        """
+        Share of brand mentions per group: answers mentioning the project's
+        brand and answers mentioning each competitor, as % of all mentions
+        """
+        mask = self.mask(**filters)
+        gid, count, labels = self._groups(by, mask)
+        competitors = max(len(self.categories['competitor']), 1)
+
+        # Group of every competitor mention, via the row it belongs to
+        row_gid = np.full(len(self), -1, dtype=np.int64)
+        if mask is None:
+            row_gid[:] = gid
+        else:
+            row_gid[mask] = gid
+        mention_gid = np.repeat(row_gid, np.diff(self.competitor_offsets))
+        selected = mention_gid >= 0
+        mentions = np.bincount(mention_gid[selected] * competitors + self.competitor_codes[selected],
+                               minlength=count * competitors).reshape(count, competitors)
+        brand = np.bincount(gid, weights=self._select(self.presence, mask), minlength=count)
+        totals = brand + mentions.sum(axis=1)
+        names = self.categories['competitor'].names
+
+        return [
+            {
+                **labels(group),
+                'mentions': int(totals[group]),
+                'brand': _percent(brand[group], totals[group]),
+                'competitors': {names[code]: _percent(mentions[group, code], totals[group])
+                                for code in np.flatnonzero(mentions[group])},
+            }
+            for group in np.flatnonzero(totals)
+        ]
+
+QUERIES = {
+    'summary': lambda table, args, filters: table.summary(args.by, **filters),
+    'heatmap': lambda table, args, filters: table.heatmap(**filters),
+    'rolling': lambda table, args, filters: table.rolling(args.window, args.by, **filters),
+    'dod': lambda table, args, filters: table.day_over_day(args.by, **filters),
+    'sov': lambda table, args, filters: table.share_of_voice(args.by, **filters),
+}
+
+def load_table(sources, table=None, file_format='parquet'):
+    """Open a saved table, an export_parquet dataset (a directory) or check sources"""
+    if table:
+        return CheckTable.load(table)
+    if len(sources) == 1 and os.path.isdir(sources[0]):
+        return CheckTable.from_parquet(sources[0], file_format)
+    return CheckTable.from_sources(sources)
+
+def main():
+    parser = argparse.ArgumentParser(description='Query visibility trends from a columnar check table')
+    parser.add_argument('sources', nargs='*',
+                        help='seed_data.json, .jsonl or .db sources, or an export_parquet dataset directory')
+    parser.add_argument('--table', help='Saved table directory (see --save)')
+    parser.add_argument('--format', choices=['parquet', 'ipc'], default='parquet',
+                        help='Format of a dataset directory')
+    parser.add_argument('--save', help='Save the loaded table to this directory')
+    parser.add_argument('--query', choices=sorted(QUERIES), default='summary')
+    parser.add_argument('--by', default='engine',
+                        help='Comma-separated group columns: project, engine, keyword, day')
+    parser.add_argument('--window', type=int, default=7, help='Rolling window in days')
+    parser.add_argument('--project', help='Only this project id')
+    parser.add_argument('--start', help='First day (YYYY-MM-DD)')
+    parser.add_argument('--end', help='Last day (YYYY-MM-DD)')
+    parser.add_argument('--days', type=int, help='Only the last N days')
+    args = parser.parse_args()
+
+    if np is None:
+        print("❌ Error: numpy is not installed (pip install numpy)")
+        sys.exit(1)
+    if not args.sources and not args.table:
+        parser.error('give check sources or --table')
+    args.by = tuple(part.strip() for part in args.by.split(',') if part.strip())
+
+    started = time.perf_counter()
+    table = load_table(args.sources, args.table, args.format)
+    print(f"📥 Loaded {len(table):,} checks in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+    if args.save:
+        table.save(args.save)
+        print(f"💾 Saved table to {args.save}", file=sys.stderr)
+
+    filters = {'project': args.project, 'start': args.start, 'end': args.end, 'days': args.days}
+    started = time.perf_counter()
+    result = QUERIES[args.query](table, args, filters)
+    print(f"⚡ {args.query} in {(time.perf_counter() - started) * 1000:.1f}ms", file=sys.stderr)
+    print(json.dumps(result, indent=2))
+
+if __name__ == '__main__':
+    main()
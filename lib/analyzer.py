@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Brand and competitor detection for LLM answers
+Builds one combined pattern per project and scans each answer once
+"""
+
+import re
+from bisect import bisect_right
+
+URL_PATTERN = re.compile(r'https?://[^\s]+')
+WORD_PATTERN = re.compile(r'\S+')
+
+def trie_pattern(terms):
+    """
+    Build a regex alternation factored into a character trie.
+
+    Python's re tries alternatives one by one at every offset; sharing
+    prefixes means each offset is rejected after a single branch, and the
+    greedy optional groups make the match at an offset the longest term.
+    """
+    root = {}
+    for term in terms:
+        node = root
+        for char in term:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if '' in node:
+            body = f'(?:{body})?'
+        return body
+
+    return build(root)
+
+def _is_word_char(char):
+    return char.isalnum() or char == '_'
+
+class ResponseAnalyzer:
+    """
+    Precompiled matcher for a project's brand, competitors and their aliases.
+
+    Every alias is folded into a single case-insensitive, trie-shaped
+    lookahead pattern, so one pass over the answer finds the longest alias at
+    every offset; shorter aliases that are prefixes of it are checked at the
+    same offset. With word_boundary (the default) a mention must start and
+    end on a word boundary, so "Acme" does not match "Acmes". Each brand or
+    competitor is counted once per mention even when several of its aliases
+    overlap there ("Acme" inside "Acme Widgets").
+
+    Mentions carry exact character offsets into the original answer and the
+    1-based index of the whitespace-separated word they start in.
+    """
+
+    def __init__(self, brand, competitors=(), brand_aliases=(), competitor_aliases=None,
+                 word_boundary=True):
+        self.brand = brand
+        self.competitors = list(competitors)
+        self.word_boundary = word_boundary
+        competitor_aliases = competitor_aliases or {}
+
+        # Entity 0 is the brand, the rest are the distinct competitors
+        self.entities = [('brand', brand)]
+        for comp in dict.fromkeys(self.competitors):
+            self.entities.append(('competitor', comp))
+
+        self.alias_owners = {}
+        for index, (kind, name) in enumerate(self.entities):
+            extra = brand_aliases if kind == 'brand' else competitor_aliases.get(name, ())
+            for alias in (name, *extra):
+                alias = alias.lower()
+                # Blank aliases would match at every offset
+                if alias.strip():
+                    owners = self.alias_owners.setdefault(alias, [])
+                    if index not in owners:
+                        owners.append(index)
+
+        self.terms = sorted(self.alias_owners, key=len, reverse=True)
+        self.prefixes = {
+            term: [other for other in self.terms if other != term and term.startswith(other)]
+            for term in self.terms
+        }
+
+        self.pattern = None
+        if self.terms:
+            lead = r'(?<!\w)' if word_boundary else ''
+            self.pattern = re.compile(f'{lead}(?=({trie_pattern(self.terms)}))', re.IGNORECASE)
+
+    def find_mentions(self, answer):
+        """Return every brand/competitor mention in order of appearance"""
+        mentions = []
+        if self.pattern is None:
+            return mentions
+
+        last_end = [0] * len(self.entities)
+        word_starts = None
+        length = len(answer)
+
+        for match in self.pattern.finditer(answer):
+            start = match.start()
+            longest = match.group(1).lower()
+            if longest not in self.alias_owners:
+                continue
+
+            claimed = set()
+            for alias in (longest, *self.prefixes[longest]):
+                end = start + len(alias)
+                if self.word_boundary and end < length and _is_word_char(answer[end]):
+                    continue
+
+                for index in self.alias_owners[alias]:
+                    if index in claimed or start < last_end[index]:
+                        continue
+                    claimed.add(index)
+                    last_end[index] = end
+
+                    if word_starts is None:
+                        word_starts = [m.start() for m in WORD_PATTERN.finditer(answer)]
+                    kind, name = self.entities[index]
+                    mentions.append({
+                        'kind': kind,
+                        'name': name,
+                        'alias': answer[start:end],
+                        'start': start,
+                        'end': end,
+                        'word': bisect_right(word_starts, start)
+                    })
+
+        return mentions
+
+    def analyze(self, answer, include_mentions=False):
+        """Compute presence, citations, position, URLs and competitor hits"""
+        mentions = self.find_mentions(answer)
+
+        brand_mentions = [m for m in mentions if m['kind'] == 'brand']
+        competitor_hits = dict.fromkeys(self.competitors, 0)
+        for mention in mentions:
+            if mention['kind'] == 'competitor':
+                competitor_hits[mention['name']] += 1
+
+        result = {
+            'presence': bool(brand_mentions),
+            'position': brand_mentions[0]['word'] if brand_mentions else None,
+            'citations_count': len(brand_mentions),
+            'observed_urls': URL_PATTERN.findall(answer),
+            'competitors_mentioned': [comp for comp in self.competitors if competitor_hits[comp]],
+            'competitor_hits': competitor_hits
+        }
+        if include_mentions:
+            result['mentions'] = mentions
+        return result
+
+    def analyze_many(self, answers, include_mentions=False):
+        """Analyze stored answers in bulk with the same compiled pattern"""
+        for answer in answers:
+            yield self.analyze(answer or '', include_mentions)
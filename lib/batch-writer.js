@@ -0,0 +1,87 @@
+// Buffered bulk inserts for Supabase tables
+const DEFAULT_BATCH_SIZE = parseInt(process.env.CHECKS_INSERT_BATCH_SIZE || '100')
+
+export class BatchWriter {
+  constructor(supabase, table, { batchSize = DEFAULT_BATCH_SIZE } = {}) {
+    this.supabase = supabase
+    this.table = table
+    this.batchSize = Math.max(1, batchSize)
+    this.buffer = []
+    this.pending = []
+    this.inserted = []
+    this.failures = []
+    // Time spent waiting on inserts, summed over batches
+    this.insertMs = 0
+  }
+
+  // Queue a row; a full buffer is flushed in the background
+  add(row) {
+    this.buffer.push(row)
+    if (this.buffer.length >= this.batchSize) {
+      this.pending.push(this.flush())
+    }
+  }
+
+  async flush() {
+    if (this.buffer.length === 0) return
+    const rows = this.buffer
+    this.buffer = []
+    const started = Date.now()
+    try {
+      await this.insertRows(rows)
+    } finally {
+      this.insertMs += Date.now() - started
+    }
+  }
+
+  async insertRows(rows) {
+    let batchError
+    try {
+      const { data, error } = await this.supabase
+        .from(this.table)
+        .insert(rows)
+        .select()
+
+      if (!error) {
+        this.inserted.push(...data)
+        return
+      }
+      batchError = error
+    } catch (err) {
+      batchError = err
+    }
+
+    if (rows.length === 1) {
+      this.failures.push({ row: rows[0], error: batchError.message })
+      return
+    }
+
+    // The batch was rejected as a whole; retry row by row so only the bad
+    // rows are reported as failures
+    await Promise.all(rows.map(async (row) => {
+      try {
+        const { data: single, error: rowError } = await this.supabase
+          .from(this.table)
+          .insert([row])
+          .select()
+          .single()
+
+        if (rowError) {
+          this.failures.push({ row, error: rowError.message })
+        } else {
+          this.inserted.push(single)
+        }
+      } catch (err) {
+        this.failures.push({ row, error: err.message })
+      }
+    }))
+  }
+
+  // Flush what is left and wait for background flushes to settle
+  async close() {
+    this.pending.push(this.flush())
+    await Promise.all(this.pending)
+    this.pending = []
+    return { inserted: this.inserted, failures: this.failures, insertMs: this.insertMs }
+  }
+}
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Buffered bulk writer for visibility check rows
+Python counterpart of lib/batch-writer.js: rows are inserted in batches and
+a rejected batch is retried row by row to report the failing rows
+"""
+
+import os
+
+DEFAULT_BATCH_SIZE = int(os.environ.get('CHECKS_INSERT_BATCH_SIZE', '100'))
+
+def supabase_insert(client, table='visibility_checks'):
+    """Return an insert function writing rows through a supabase-py client"""
+    def insert(rows):
+        response = client.table(table).insert(rows).execute()
+        return response.data
+    return insert
+
+class BatchWriter:
+    """
+    Collect rows and insert them batch_size at a time.
+
+    insert is any callable taking a list of rows and raising on failure,
+    e.g. supabase_insert(client) or LocalCheckStore.insert_checks. Use it as
+    a context manager or call close() to flush the remainder.
+    """
+
+    def __init__(self, insert, batch_size=DEFAULT_BATCH_SIZE):
+        self.insert = insert
+        self.batch_size = max(1, batch_size)
+        self.buffer = []
+        self.inserted = 0
+        self.flushes = 0
+        self.failures = []
+
+    def add(self, row):
+        self.buffer.append(row)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def add_many(self, rows):
+        for row in rows:
+            self.add(row)
+
+    def flush(self):
+        if not self.buffer:
+            return
+        rows, self.buffer = self.buffer, []
+        self.flushes += 1
+
+        try:
+            self.insert(rows)
+            self.inserted += len(rows)
+            return
+        except Exception as e:
+            if len(rows) == 1:
+                self.failures.append({'row': rows[0], 'error': str(e)})
+                return
+
+        # The batch was rejected as a whole; find the rows that fail
+        for row in rows:
+            try:
+                self.insert([row])
+                self.inserted += 1
+            except Exception as e:
+                self.failures.append({'row': row, 'error': str(e)})
+
+    def close(self):
+        self.flush()
+        return {'inserted': self.inserted, 'failures': self.failures}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Offline benchmarks for the check pipeline
+Runs each hot path at several sizes against local data and a fake LLM server
+(lib/fake_llm.py), in its own forked process, and reports throughput, p50/p99
+latency and peak RSS. No network or API keys needed; the COPY loader only
+runs when a Postgres connection string is given
+
+Scenarios:
+  check_visibility  keyword checks across 4 engines through the chat-completions adapters
+  analysis          analyze_answer over mock answers
+  seed_data         generate_seed_data and the synthetic check generator (JSONL)
+  csv_export        format_csv.convert of the generated checks
+  copy_loader       import_seed.CheckLoader into a scratch schema
+  analytics         analytics.CheckTable trend queries over the generated checks
+
+Usage:
+  python3 lib/benchmark.py                                 # every scenario at small and medium
+  python3 lib/benchmark.py --sizes large --scenarios csv_export,copy_loader \
+      --database-url postgresql://... --json results.json
+  python3 lib/benchmark.py --compare results.json          # flag throughput regressions
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_llm import FakeLLMServer
+
+# Multiplier applied to each scenario's base size
+SIZES = {'small': 1, 'medium': 10, 'large': 100}
+ENGINES = ['ChatGPT', 'Perplexity', 'Gemini', 'Claude']
+BRAND = 'Acme Analytics'
+COMPETITORS = ['Brightlane', 'Northwind']
+# Throughput drops beyond this fraction of the baseline are flagged
+REGRESSION_THRESHOLD = 0.2
+
+LOADER_SCHEMA = """
+CREATE TABLE projects (
+  id UUID PRIMARY KEY,
+  "userId" UUID NOT NULL,
+  name TEXT NOT NULL,
+  domain TEXT NOT NULL,
+  brand TEXT NOT NULL,
+  competitors TEXT[] DEFAULT '{}',
+  keywords TEXT[] DEFAULT '{}',
+  "createdAt" TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  "updatedAt" TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+CREATE TABLE visibility_checks (
+  id UUID PRIMARY KEY,
+  "projectId" UUID NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+  engine TEXT NOT NULL,
+  keyword TEXT NOT NULL,
+  position INTEGER,
+  presence BOOLEAN NOT NULL DEFAULT false,
+  "answerSnippet" TEXT,
+  "citationsCount" INTEGER DEFAULT 0,
+  "observedUrls" TEXT[] DEFAULT '{}',
+  "competitorsMentioned" TEXT[] DEFAULT '{}',
+  "answerHash" TEXT,
+  timestamp TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  "createdAt" TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+"""
+
+def percentile(values, q):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered), max(1, math.ceil(q / 100 * len(ordered)))) - 1]
+
+def timed_progress():
+    """progress(rows, elapsed) callback recording the time each chunk took"""
+    chunks = []
+    last = [0.0]
+
+    def progress(rows, elapsed):
+        chunks.append(elapsed - last[0])
+        last[0] = elapsed
+
+    return progress, chunks
+
+def synthetic_checks(path, rows, seed=7):
+    """Write about rows synthetic checks to a JSONL file; returns the projects"""
+    import numpy as np
+    from seed_data import synthetic_projects, write_synthetic_checks
+
+    keywords = 25
+    projects = max(1, rows // (keywords * len(ENGINES) * 30))
+    project_rows = synthetic_projects(projects, keywords, np.random.default_rng(seed))
+    days = max(1, rows // (projects * keywords * len(ENGINES)))
+    write_synthetic_checks(project_rows, days, path, 'jsonl', seed=seed + 1)
+    return project_rows
+
+def bench_check_visibility(scale, workdir, options):
+    import ai_checker
+
+    keywords = [f'benchmark keyword {i}' for i in range(25 * scale)]
+    latencies = []
+
+    def check(keyword):
+        started = time.perf_counter()
+        ai_checker.check_visibility_engines(keyword, BRAND, COMPETITORS, ENGINES)
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+        list(pool.map(check, keywords))
+    return {'items': len(keywords) * len(ENGINES), 'seconds': time.perf_counter() - started,
+            'latencies': latencies, 'unit': 'keyword x 4 engines'}
+
+def bench_analysis(scale, workdir, options):
+    import ai_checker
+    from engines import MockEngine
+
+    engine = MockEngine('Benchmark', brands=[BRAND, *COMPETITORS, 'Contoso', 'Globex'])
+    answers = [engine.answer(f'benchmark keyword {i}') for i in range(5000 * scale)]
+    latencies = []
+
+    started = time.perf_counter()
+    for answer in answers:
+        t = time.perf_counter()
+        ai_checker.analyze_answer(answer, BRAND, COMPETITORS)
+        latencies.append(time.perf_counter() - t)
+    return {'items': len(answers), 'seconds': time.perf_counter() - started,
+            'latencies': latencies, 'unit': 'answer'}
+
+def bench_seed_data(scale, workdir, options):
+    import numpy as np
+    from seed_data import generate_seed_data, synthetic_projects, write_synthetic_checks
+
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(scale):
+        t = time.perf_counter()
+        generate_seed_data()
+        latencies.append(time.perf_counter() - t)
+    legacy = time.perf_counter() - started
+
+    projects = synthetic_projects(scale, 25, np.random.default_rng(7))
+    progress, chunks = timed_progress()
+    started = time.perf_counter()
+    rows = write_synthetic_checks(projects, 100, os.path.join(workdir, 'seed.jsonl'), 'jsonl',
+                                  seed=8, chunk_size=10000, progress=progress)
+    return {'items': rows, 'seconds': time.perf_counter() - started, 'latencies': chunks,
+            'unit': '10k-row chunk', 'extra': {'generateSeedDataSeconds': legacy / scale}}
+
+def bench_csv_export(scale, workdir, options):
+    import format_csv
+
+    source = os.path.join(workdir, 'checks.jsonl')
+    synthetic_checks(source, 20000 * scale)
+    progress, chunks = timed_progress()
+    started = time.perf_counter()
+    rows = format_csv.convert([source], os.path.join(workdir, 'checks.csv'), progress=progress,
+                              progress_every=10000)
+    return {'items': rows, 'seconds': time.perf_counter() - started, 'latencies': chunks,
+            'unit': '10k-row chunk'}
+
+def bench_copy_loader(scale, workdir, options):
+    import psycopg
+    from checks_io import iter_checks
+    from import_seed import CheckLoader, upsert_projects
+
+    source = os.path.join(workdir, 'checks.jsonl')
+    projects = synthetic_checks(source, 20000 * scale)
+    schema = f'benchmark_{uuid.uuid4().hex[:8]}'
+    with psycopg.connect(options['database_url'], autocommit=True) as conn:
+        conn.execute("SET temp_buffers = '256MB'")
+        conn.execute(f'CREATE SCHEMA {schema}')
+        try:
+            conn.execute(f'SET search_path TO {schema}')
+            conn.execute(LOADER_SCHEMA)
+            upsert_projects(conn, projects, str(uuid.uuid4()))
+            loader = CheckLoader(conn)
+            progress, chunks = timed_progress()
+            started = time.perf_counter()
+            loaded, _ = loader.load(source, iter_checks(source), 10000, progress=progress)
+            seconds = time.perf_counter() - started
+        finally:
+            conn.execute(f'DROP SCHEMA {schema} CASCADE')
+    return {'items': loaded, 'seconds': seconds, 'latencies': chunks, 'unit': '10k-row chunk'}
+
+def bench_analytics(scale, workdir, options):
+    from analytics import CheckTable
+
+    source = os.path.join(workdir, 'checks.jsonl')
+    synthetic_checks(source, 20000 * scale)
+    started = time.perf_counter()
+    table = CheckTable.from_sources([source])
+    load = time.perf_counter() - started
+    queries = [
+        lambda: table.summary(('keyword', 'engine')),
+        lambda: table.rolling(7),
+        lambda: table.day_over_day(),
+        lambda: table.share_of_voice(('project', 'engine')),
+    ]
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(5):
+        for query in queries:
+            t = time.perf_counter()
+            query()
+            latencies.append(time.perf_counter() - t)
+    return {'items': len(table) * len(latencies), 'seconds': time.perf_counter() - started,
+            'latencies': latencies, 'unit': 'row scanned per query',
+            'extra': {'loadRowsPerSecond': round(len(table) / load, 1)}}
+
+SCENARIOS = {
+    'check_visibility': bench_check_visibility,
+    'analysis': bench_analysis,
+    'seed_data': bench_seed_data,
+    'csv_export': bench_csv_export,
+    'copy_loader': bench_copy_loader,
+    'analytics': bench_analytics,
+}
+
+def _child(name, scale, options, conn):
+    workdir = tempfile.mkdtemp(prefix=f'aeo-bench-{name}-')
+    try:
+        result = SCENARIOS[name](scale, workdir, options)
+        # ru_maxrss is in KiB on Linux
+        result['peakRssMb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        conn.send(result)
+    except Exception as e:
+        conn.send({'error': f'{type(e).__name__}: {e}'})
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+        conn.close()
+
+def run_scenario(name, size, options):
+    """Run one scenario in a forked process so its peak RSS is its own"""
+    context = multiprocessing.get_context('fork')
+    parent, child = context.Pipe(duplex=False)
+    process = context.Process(target=_child, args=(name, SIZES[size], options, child))
+    process.start()
+    child.close()
+    try:
+        result = parent.recv()
+    except EOFError:
+        result = {'error': f'benchmark process exited with code {process.exitcode}'}
+    process.join()
+
+    summary = {'scenario': name, 'size': size}
+    if 'error' in result:
+        summary['error'] = result['error']
+        return summary
+    latencies = result['latencies']
+    summary.update({
+        'items': result['items'],
+        'seconds': round(result['seconds'], 3),
+        'perSecond': round(result['items'] / result['seconds'], 1) if result['seconds'] else None,
+        'unit': result['unit'],
+        'p50Ms': round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+        'p99Ms': round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+        'peakRssMb': round(result['peakRssMb'], 1),
+        **result.get('extra', {})
+    })
+    return summary
+
+def configure_fake_llm(server, limits_path, concurrency):
+    """Point every engine at the fake server with limits that do not throttle it"""
+    for engine in ENGINES:
+        os.environ[f'AI_CHECKER_{engine.upper()}_BASE_URL'] = server.url
+        os.environ[f'AI_CHECKER_{engine.upper()}_CONCURRENCY'] = str(concurrency)
+    os.environ['AI_CHECKER_LIMITS_PATH'] = limits_path
+    os.environ['AI_CHECKER_RATE_LIMIT'] = '100000'
+    os.environ['AI_CHECKER_MAX_CONCURRENCY'] = str(concurrency * len(ENGINES))
+    for name in ['AI_CHECKER_MOCK_ENGINES', 'AI_CHECKER_CACHE_PATH', 'AI_CHECKER_BLOB_DIR']:
+        os.environ.pop(name, None)
+
+def compare(results, baseline):
+    """Lines describing throughput changes against a previous --json run"""
+    previous = {(r['scenario'], r['size']): r for r in baseline if r.get('perSecond')}
+    lines = []
+    regressed = False
+    for result in results:
+        before = previous.get((result['scenario'], result['size']))
+        if not before or not result.get('perSecond'):
+            continue
+        change = result['perSecond'] / before['perSecond'] - 1
+        flag = '⚠️ ' if change < -REGRESSION_THRESHOLD else '  '
+        regressed = regressed or change < -REGRESSION_THRESHOLD
+        lines.append(f"{flag}{result['scenario']:<17} {result['size']:<7} "
+                     f"{before['perSecond']:>12,.1f} -> {result['perSecond']:>12,.1f}/s ({change:+.0%})")
+    return lines, regressed
+
+def print_table(results):
+    print(f"{'scenario':<17} {'size':<7} {'items':>9} {'items/s':>12} {'p50 ms':>9} "
+          f"{'p99 ms':>9} {'RSS MB':>8}  unit")
+    for r in results:
+        if 'error' in r:
+            print(f"{r['scenario']:<17} {r['size']:<7} skipped: {r['error']}")
+            continue
+        p50 = f"{r['p50Ms']:.2f}" if r['p50Ms'] is not None else '-'
+        p99 = f"{r['p99Ms']:.2f}" if r['p99Ms'] is not None else '-'
+        print(f"{r['scenario']:<17} {r['size']:<7} {r['items']:>9} {r['perSecond']:>12,.1f} "
+              f"{p50:>9} {p99:>9} {r['peakRssMb']:>8.1f}  {r['unit']}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the check pipeline offline')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help=f"Comma-separated scenarios ({', '.join(SCENARIOS)})")
+    parser.add_argument('--sizes', default='small,medium',
+                        help=f"Comma-separated sizes ({', '.join(SIZES)})")
+    parser.add_argument('--latency-ms', type=float, default=50, help='Fake LLM latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fake LLM error rate')
+    parser.add_argument('--concurrency', type=int, default=16,
+                        help='Keywords checked at once in check_visibility')
+    parser.add_argument('--database-url',
+                        default=os.environ.get('BENCHMARK_DATABASE_URL') or os.environ.get('TEST_DATABASE_URL'),
+                        help='Postgres for copy_loader (default: $BENCHMARK_DATABASE_URL or $TEST_DATABASE_URL)')
+    parser.add_argument('--json', help='Write the results to this file')
+    parser.add_argument('--compare', help='Compare throughput against a previous --json file')
+    args = parser.parse_args()
+
+    scenarios = [s.strip() for s in args.scenarios.split(',') if s.strip()]
+    sizes = [s.strip() for s in args.sizes.split(',') if s.strip()]
+    for name in scenarios:
+        if name not in SCENARIOS:
+            parser.error(f'unknown scenario {name}')
+    for size in sizes:
+        if size not in SIZES:
+            parser.error(f'unknown size {size}')
+
+    workdir = tempfile.mkdtemp(prefix='aeo-bench-')
+    server = FakeLLMServer(latency=args.latency_ms / 1000, error_rate=args.error_rate,
+                           brands=[BRAND, *COMPETITORS, 'Contoso', 'Globex']).start()
+    configure_fake_llm(server, os.path.join(workdir, 'limits.db'), args.concurrency)
+    options = {'concurrency': args.concurrency, 'database_url': args.database_url}
+
+    results = []
+    try:
+        for name in scenarios:
+            for size in sizes:
+                if name == 'copy_loader' and not args.database_url:
+                    results.append({'scenario': name, 'size': size,
+                                    'error': 'no database (--database-url)'})
+                    continue
+                print(f"⏱️  {name} ({size})", file=sys.stderr)
+                results.append(run_scenario(name, size, options))
+    finally:
+        server.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print_table(results)
+    print(f"🤖 Fake LLM served {server.requests} requests ({server.errors} errors injected)")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Saved to: {args.json}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            lines, regressed = compare(results, json.load(f))
+        print(f"\nThroughput vs {args.compare}:")
+        print('\n'.join(lines) or 'no matching scenarios')
+        if regressed:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Content-addressed store for full LLM answers
+Answers are compressed (zstd when available, zlib otherwise) and keyed by
+the SHA-256 of their text, so identical answers are stored once
+"""
+
+import hashlib
+import io
+import os
+import sys
+import tempfile
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CODEC_SUFFIXES = {'zstd': '.zst', 'zlib': '.zz'}
+READ_SIZE = 64 * 1024
+
+def answer_hash(text):
+    """Content address of an answer: SHA-256 of its UTF-8 text"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+class _ZlibReader(io.RawIOBase):
+    """Incrementally decompress a zlib file"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.decompressor = zlib.decompressobj()
+        self.buffer = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, target):
+        while not self.buffer:
+            chunk = self.raw.read(READ_SIZE)
+            if not chunk:
+                self.buffer = self.decompressor.flush()
+                break
+            self.buffer = self.decompressor.decompress(chunk)
+        size = min(len(target), len(self.buffer))
+        target[:size] = self.buffer[:size]
+        self.buffer = self.buffer[size:]
+        return size
+
+    def close(self):
+        self.raw.close()
+        super().close()
+
+class BlobStore:
+    """
+    Directory of compressed blobs sharded by the first two hash characters.
+
+    Writes go to a temporary file and are renamed into place, so concurrent
+    writers of the same answer are safe and readers never see partial blobs.
+    Blobs written with either codec stay readable.
+    """
+
+    def __init__(self, root, codec=None, level=None):
+        self.root = root
+        self.codec = codec or ('zstd' if zstandard is not None else 'zlib')
+        if self.codec == 'zstd' and zstandard is None:
+            raise RuntimeError('zstandard is not installed')
+        self.level = level
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, digest, codec):
+        return os.path.join(self.root, digest[:2], digest[2:] + CODEC_SUFFIXES[codec])
+
+    def _find(self, digest):
+        for codec in CODEC_SUFFIXES:
+            path = self._path(digest, codec)
+            if os.path.exists(path):
+                return path, codec
+        return None, None
+
+    def _compress(self, data):
+        if self.codec == 'zstd':
+            return zstandard.ZstdCompressor(level=self.level or 3).compress(data)
+        return zlib.compress(data, self.level or 6)
+
+    def exists(self, digest):
+        return self._find(digest)[0] is not None
+
+    def put(self, text):
+        """Store an answer if it is new and return its hash"""
+        digest = answer_hash(text)
+        if self.exists(digest):
+            return digest
+
+        path = self._path(digest, self.codec)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(self._compress(text.encode('utf-8')))
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return digest
+
+    def open_stream(self, digest):
+        """Open a blob as a text stream that decompresses as it is read"""
+        path, codec = self._find(digest)
+        if path is None:
+            raise KeyError(digest)
+
+        raw = open(path, 'rb')
+        if codec == 'zstd':
+            if zstandard is None:
+                raw.close()
+                raise RuntimeError('zstandard is not installed')
+            reader = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+        else:
+            reader = _ZlibReader(raw)
+        return io.TextIOWrapper(io.BufferedReader(reader), encoding='utf-8')
+
+    def get(self, digest):
+        """Return the full answer for a hash"""
+        with self.open_stream(digest) as stream:
+            return stream.read()
+
+    def iter_hashes(self):
+        """Yield the hash of every stored blob"""
+        for shard in sorted(os.listdir(self.root)):
+            shard_dir = os.path.join(self.root, shard)
+            if len(shard) != 2 or not os.path.isdir(shard_dir):
+                continue
+            for name in sorted(os.listdir(shard_dir)):
+                stem, suffix = os.path.splitext(name)
+                if suffix in CODEC_SUFFIXES.values():
+                    yield shard + stem
+
+    def iter_answers(self, digests=None):
+        """Yield (hash, answer) pairs for the given hashes, or every blob"""
+        for digest in (digests if digests is not None else self.iter_hashes()):
+            if digest and self.exists(digest):
+                yield digest, self.get(digest)
+
+def store_from_env():
+    """Build the blob store from AI_CHECKER_BLOB_DIR, or None if unset"""
+    root = os.environ.get('AI_CHECKER_BLOB_DIR')
+    if not root:
+        return None
+    return BlobStore(root, codec=os.environ.get('AI_CHECKER_BLOB_CODEC'))
+
+if __name__ == '__main__':
+    # Print a stored answer: blob_store.py HASH
+    store = store_from_env()
+    if store is None or len(sys.argv) < 2:
+        print('Usage: AI_CHECKER_BLOB_DIR=... blob_store.py HASH', file=sys.stderr)
+        sys.exit(1)
+
+    with store.open_stream(sys.argv[1]) as stream:
+        for line in stream:
+            sys.stdout.write(line)
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Readers and writers for stored visibility checks
+Sources can be seed_data.json, a JSONL export or a local SQLite stand-in
+for the visibility_checks table
+"""
+
+import json
+import os
+import re
+import sqlite3
+import sys
+from datetime import datetime, timezone
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+CHECK_COLUMNS = [
+    'id', 'projectId', 'engine', 'keyword', 'position', 'presence',
+    'answerSnippet', 'citationsCount', 'observedUrls',
+    'competitorsMentioned', 'answerHash', 'timestamp'
+]
+
+ARRAY_COLUMNS = ('observedUrls', 'competitorsMentioned')
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS visibility_checks (
+  id TEXT PRIMARY KEY,
+  "projectId" TEXT NOT NULL,
+  engine TEXT NOT NULL,
+  keyword TEXT NOT NULL,
+  position INTEGER,
+  presence INTEGER NOT NULL DEFAULT 0,
+  "answerSnippet" TEXT,
+  "citationsCount" INTEGER DEFAULT 0,
+  "observedUrls" TEXT DEFAULT '[]',
+  "competitorsMentioned" TEXT DEFAULT '[]',
+  "answerHash" TEXT,
+  timestamp TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_checks_project ON visibility_checks("projectId");
+"""
+
+WHITESPACE = re.compile(r'\s*')
+READ_SIZE = 64 * 1024
+
+SQLITE_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+JSONL_SUFFIXES = ('.jsonl', '.ndjson')
+
+def source_kind(path):
+    """Classify a checks source by its file extension"""
+    lower = path.lower()
+    if lower.endswith(SQLITE_SUFFIXES):
+        return 'sqlite'
+    if lower.endswith(JSONL_SUFFIXES):
+        return 'jsonl'
+    return 'json'
+
+class JsonStreamReader:
+    """
+    Incremental reader for a top-level JSON object.
+
+    Values are decoded one at a time with JSONDecoder.raw_decode from a
+    sliding buffer, so a large array member can be iterated item by item
+    without loading the whole document.
+    """
+
+    def __init__(self, f, read_size=READ_SIZE):
+        self.f = f
+        self.read_size = read_size
+        self.buffer = ''
+        self.pos = 0
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        data = self.f.read(self.read_size)
+        if not data:
+            return False
+        self.buffer = self.buffer[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self):
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f'Expected {char!r} at offset {self.pos} of the JSON stream')
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                # The value continues past the buffer
+                if not self._fill():
+                    raise
+                continue
+            if end == len(self.buffer) and self._fill():
+                # A number may have been cut at the buffer edge
+                continue
+            self.pos = end
+            return value
+
+    def items(self):
+        """Iterate a JSON array value element by element"""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == ',':
+                self.pos += 1
+            else:
+                self.expect(']')
+                return
+
+    def members(self):
+        """Iterate (key, reader) over a JSON object; the caller consumes each value"""
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            start = self.pos
+            yield key, self
+            if self.pos == start:
+                self.value()
+            if self.peek() == ',':
+                self.pos += 1
+            else:
+                self.expect('}')
+                return
+
+def iter_json_member(f, key):
+    """Stream the items of an array member of a top-level JSON object"""
+    if ijson is not None:
+        yield from ijson.items(f, f'{key}.item', use_float=True)
+        return
+
+    for name, reader in JsonStreamReader(f).members():
+        if name == key:
+            yield from reader.items()
+            return
+
+def read_project(path):
+    """Return the project block of a seed_data.json file, if any"""
+    if source_kind(path) != 'json':
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        for name, reader in JsonStreamReader(f).members():
+            if name == 'project':
+                return reader.value()
+    return None
+
+def iter_checks(path):
+    """
+    Yield check dicts from a seed JSON file, a JSONL file or a SQLite store.
+    A path of '-' reads JSONL from stdin. Every format is streamed.
+    """
+    kind = 'jsonl' if path == '-' else source_kind(path)
+    if kind == 'sqlite':
+        store = LocalCheckStore(path)
+        try:
+            yield from store.iter_checks()
+        finally:
+            store.close()
+    elif kind == 'jsonl':
+        f = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8')
+        try:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        finally:
+            if f is not sys.stdin:
+                f.close()
+    elif ijson is not None:
+        with open(path, 'rb') as f:
+            yield from iter_json_member(f, 'checks')
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from iter_json_member(f, 'checks')
+
+def parse_timestamp(value):
+    """Parse a check timestamp; naive ones (as in seed_data.json) are taken to be UTC"""
+    moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc)
+
+def iter_chunks(iterable, size):
+    """Group an iterable into lists of at most size items"""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+class JsonlWriter:
+    """Append check dicts to a JSONL file"""
+
+    def __init__(self, path):
+        self.file = open(path, 'w', encoding='utf-8')
+        self.count = 0
+
+    def write_rows(self, rows):
+        self.file.writelines(json.dumps(row) + '\n' for row in rows)
+        self.count += len(rows)
+
+    def close(self):
+        self.file.close()
+
+class LocalCheckStore:
+    """
+    SQLite stand-in for the visibility_checks table.
+
+    Array columns are stored as JSON text and presence as 0/1; rows are
+    converted back to the same dict shape the API returns.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        # WAL lets a streaming reader and a bulk writer share the file
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(SQLITE_SCHEMA)
+
+    @staticmethod
+    def _to_row(check):
+        row = [check.get(column) for column in CHECK_COLUMNS]
+        row[CHECK_COLUMNS.index('presence')] = int(bool(check.get('presence')))
+        for column in ARRAY_COLUMNS:
+            row[CHECK_COLUMNS.index(column)] = json.dumps(check.get(column) or [])
+        return row
+
+    @staticmethod
+    def _from_row(row):
+        check = dict(zip(CHECK_COLUMNS, row))
+        check['presence'] = bool(check['presence'])
+        for column in ARRAY_COLUMNS:
+            check[column] = json.loads(check[column] or '[]')
+        return check
+
+    def insert_checks(self, checks):
+        """Insert or replace checks in one transaction"""
+        columns = ', '.join(f'"{c}"' for c in CHECK_COLUMNS)
+        placeholders = ', '.join('?' for _ in CHECK_COLUMNS)
+        with self.conn:
+            self.conn.executemany(
+                f'INSERT OR REPLACE INTO visibility_checks ({columns}) VALUES ({placeholders})',
+                (self._to_row(check) for check in checks)
+            )
+
+    def update_checks(self, checks, columns):
+        """Bulk update the given columns of existing checks by id"""
+        assignments = ', '.join(f'"{c}" = ?' for c in columns)
+        rows = []
+        for check in checks:
+            row = self._to_row(check)
+            rows.append([row[CHECK_COLUMNS.index(c)] for c in columns] + [check['id']])
+        with self.conn:
+            self.conn.executemany(
+                f'UPDATE visibility_checks SET {assignments} WHERE id = ?', rows
+            )
+
+    def iter_checks(self, batch_size=1000):
+        columns = ', '.join(f'"{c}"' for c in CHECK_COLUMNS)
+        cursor = self.conn.execute(f'SELECT {columns} FROM visibility_checks ORDER BY rowid')
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield self._from_row(row)
+
+    def close(self):
+        self.conn.close()
+
+if __name__ == '__main__':
+    # Load checks into a local SQLite stand-in: checks_io.py SOURCE DEST.db
+    if len(sys.argv) < 3 or source_kind(sys.argv[2]) != 'sqlite':
+        print('Usage: checks_io.py SOURCE DEST.db', file=sys.stderr)
+        sys.exit(1)
+
+    store = LocalCheckStore(sys.argv[2])
+    total = 0
+    for chunk in iter_chunks(iter_checks(sys.argv[1]), 1000):
+        store.insert_checks(chunk)
+        total += len(chunk)
+    store.close()
+    print(f"✅ Loaded {total} checks into {os.path.abspath(sys.argv[2])}")
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Engine adapters for the visibility checker
+Each engine label (ChatGPT, Perplexity, Gemini, Claude) resolves to its own
+provider and model with its own client, concurrency limit and timeout, and
+Mock answers locally for offline runs and benchmarks
+
+Engines are picked from the environment:
+  <ENGINE>_API_KEY style keys (OPENAI_API_KEY, PERPLEXITY_API_KEY,
+  GEMINI_API_KEY, ANTHROPIC_API_KEY) call the provider's chat-completions API
+  directly; otherwise EMERGENT_LLM_KEY is used through emergentintegrations.
+  AI_CHECKER_<ENGINE>_MODEL, _BASE_URL, _CONCURRENCY and _TIMEOUT override
+  the defaults, and AI_CHECKER_MOCK_ENGINES=all (or a list of engine names)
+  swaps engines for the mock.
+
+Usage:
+  engines.py                      # print the resolved engines as JSON
+  engines.py "best crm" Mock      # query one engine
+"""
+
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+
+from rate_limiter import limiter_from_env
+
+# emergentintegrations is imported by the first LlmChat engine that sends,
+# so processes that only use direct API keys or the mock never load it
+LlmChat = UserMessage = None
+
+def _load_llm_chat():
+    """Import LlmChat and UserMessage once; False when the package is missing"""
+    global LlmChat, UserMessage
+    if LlmChat is None:
+        try:
+            from emergentintegrations.llm.chat import LlmChat, UserMessage
+        except ImportError:
+            return False
+    return True
+
+SYSTEM_MESSAGE = "You are a search assistant. Provide direct, comprehensive answers to queries as if you were an AI search engine like ChatGPT, Perplexity, or Gemini. Include specific recommendations when relevant."
+
+DEFAULT_ENGINE = 'ChatGPT'
+# Model used when an engine has no credentials of its own
+DEFAULT_MODEL = ('openai', 'gpt-4o-mini')
+
+ENGINE_SPECS = {
+    'ChatGPT': {
+        'provider': 'openai', 'model': 'gpt-4o-mini',
+        'base_url': 'https://api.openai.com/v1', 'key_env': 'OPENAI_API_KEY'
+    },
+    'Perplexity': {
+        'provider': 'perplexity', 'model': 'sonar',
+        'base_url': 'https://api.perplexity.ai', 'key_env': 'PERPLEXITY_API_KEY'
+    },
+    'Gemini': {
+        'provider': 'gemini', 'model': 'gemini-2.0-flash',
+        'base_url': 'https://generativelanguage.googleapis.com/v1beta/openai',
+        'key_env': 'GEMINI_API_KEY'
+    },
+    'Claude': {
+        'provider': 'anthropic', 'model': 'claude-3-5-haiku-latest',
+        'base_url': 'https://api.anthropic.com/v1', 'key_env': 'ANTHROPIC_API_KEY'
+    },
+    'Mock': {'provider': 'mock', 'model': 'mock'},
+}
+
+# Providers reachable with the universal EMERGENT_LLM_KEY
+EMERGENT_PROVIDERS = {'openai', 'anthropic', 'gemini'}
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_TIMEOUT = 30.0
+# The mock answers locally, so it is not held to the real providers' rate
+MOCK_RATE_LIMIT = 1000.0
+
+MOCK_BRANDS = ['Acme Analytics', 'Brightlane', 'Northwind', 'Contoso', 'Globex']
+
+_rate_limiter = None
+
+def get_rate_limiter():
+    """Return the rate limiter shared by every checker process"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = limiter_from_env()
+    return _rate_limiter
+
+class Engine:
+    """
+    One answer engine: a provider/model pair with its own client.
+
+    query() holds one of max_concurrency slots in this process and goes
+    through the shared rate limiter under the engine's provider, so limits
+    and retries apply per provider across processes. Subclasses implement
+    send(keyword) returning the answer text.
+    """
+
+    kind = None
+
+    def __init__(self, name, provider, model, max_concurrency=DEFAULT_CONCURRENCY,
+                 timeout=DEFAULT_TIMEOUT, limiter=None):
+        self.name = name
+        self.provider = provider
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.limiter = limiter
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+
+    @property
+    def key(self):
+        """Provider and model; engines with the same key give the same answers"""
+        return (self.provider, self.model)
+
+    def send(self, keyword):
+        raise NotImplementedError
+
+    def query(self, keyword):
+        limiter = self.limiter or get_rate_limiter()
+        with self.slots:
+            return limiter.call(self.provider, lambda: self.send(keyword), self.timeout)
+
+    def describe(self):
+        return {'engine': self.name, 'kind': self.kind, 'provider': self.provider,
+                'model': self.model, 'concurrency': self.max_concurrency, 'timeout': self.timeout}
+
+    def close(self):
+        pass
+
+class LlmChatEngine(Engine):
+    """
+    Engine answered through emergentintegrations with EMERGENT_LLM_KEY.
+
+    LlmChat keeps its conversation in private state, so every query gets a
+    new chat with its own session id and checks never see each other's
+    history. Unlike ChatCompletionsEngine there is no client to reuse, so
+    each check pays its own connection setup.
+    """
+
+    kind = 'llmchat'
+
+    def __init__(self, name, provider, model, api_key, **options):
+        super().__init__(name, provider, model, **options)
+        self.api_key = api_key
+
+    def _new_chat(self):
+        return LlmChat(
+            api_key=self.api_key,
+            session_id=str(uuid.uuid4()),
+            system_message=SYSTEM_MESSAGE
+        ).with_model(self.provider, self.model)
+
+    def send(self, keyword):
+        if not _load_llm_chat():
+            raise Exception('emergentintegrations is not installed')
+        if not self.api_key:
+            raise Exception('EMERGENT_LLM_KEY not found in environment')
+
+        response = self._new_chat().send_message(UserMessage(text=keyword))
+        return response.text or ''
+
+class ChatCompletionsEngine(Engine):
+    """
+    Engine answered by an OpenAI-compatible /chat/completions API. The
+    engine's pool lives as long as the process, so a worker or batch pays
+    connection and TLS setup once rather than per check.
+    """
+
+    kind = 'chat_completions'
+
+    def __init__(self, name, provider, model, base_url, api_key, **options):
+        super().__init__(name, provider, model, **options)
+        self.base_url = base_url
+        # Imported here so mock and LlmChat processes never load http.client
+        from http_client import HttpPool
+        self.client = HttpPool(base_url, size=self.max_concurrency, timeout=self.timeout,
+                               headers={'Authorization': f'Bearer {api_key}'})
+
+    def send(self, keyword):
+        # Each check is a fresh two-message conversation
+        body = self.client.post_json('/chat/completions', {
+            'model': self.model,
+            'messages': [
+                {'role': 'system', 'content': SYSTEM_MESSAGE},
+                {'role': 'user', 'content': keyword}
+            ]
+        })
+        return body['choices'][0]['message'].get('content') or ''
+
+    def describe(self):
+        return {**super().describe(), 'baseUrl': self.base_url, 'protocol': self.client.protocol}
+
+    def close(self):
+        self.client.close()
+
+class MockEngine(Engine):
+    """
+    Local engine for offline runs. Answers are deterministic per engine and
+    keyword and mention a few of the brands, with latency (seconds, jittered
+    +/-50%) and a random rate of 503s to exercise retries.
+    """
+
+    kind = 'mock'
+
+    def __init__(self, name, provider='mock', model='mock', brands=None, latency=0.0,
+                 error_rate=0.0, **options):
+        super().__init__(name, provider, model, **options)
+        self.brands = list(brands or MOCK_BRANDS)
+        self.latency = latency
+        self.error_rate = error_rate
+
+    def answer(self, keyword):
+        seed = hashlib.sha256(f'{self.name}\x00{keyword}'.encode('utf-8')).digest()
+        rng = random.Random(seed)
+        brands = rng.sample(self.brands, rng.randint(0, min(len(self.brands), 4)))
+
+        lines = [f"Here are some of the best options for {keyword}."]
+        for rank, brand in enumerate(brands, 1):
+            domain = brand.lower().replace(' ', '') + '.com'
+            lines.append(f"{rank}. {brand} is a popular choice for {keyword}, "
+                         f"see https://{domain}/{rank} for details.")
+        lines.append("Compare pricing, integrations and support before deciding.")
+        return '\n'.join(lines)
+
+    def send(self, keyword):
+        if self.latency:
+            time.sleep(self.latency * random.uniform(0.5, 1.5))
+        if self.error_rate and random.random() < self.error_rate:
+            from http_client import HttpStatusError
+            raise HttpStatusError(503, {}, 'mock engine unavailable')
+        return self.answer(keyword)
+
+def _engine_env(name, option, default=None):
+    return os.environ.get(f'AI_CHECKER_{name.upper()}_{option}', default)
+
+def _mocked(name):
+    value = os.environ.get('AI_CHECKER_MOCK_ENGINES', '')
+    names = {part.strip() for part in value.split(',') if part.strip()}
+    return name == 'Mock' or 'all' in names or name in names
+
+def engine_from_env(name):
+    """Build the adapter for one engine label from the environment"""
+    spec = ENGINE_SPECS.get(name, ENGINE_SPECS[DEFAULT_ENGINE])
+    options = {
+        'max_concurrency': int(_engine_env(name, 'CONCURRENCY', str(DEFAULT_CONCURRENCY))),
+        'timeout': float(_engine_env(name, 'TIMEOUT', str(DEFAULT_TIMEOUT))),
+    }
+
+    if _mocked(name):
+        brands = os.environ.get('AI_CHECKER_MOCK_BRANDS')
+        engine = MockEngine(
+            name,
+            model=f'mock-{name.lower()}',
+            brands=[b.strip() for b in brands.split(',') if b.strip()] if brands else None,
+            latency=float(os.environ.get('AI_CHECKER_MOCK_LATENCY_MS', '0')) / 1000,
+            error_rate=float(os.environ.get('AI_CHECKER_MOCK_ERROR_RATE', '0')),
+            **options
+        )
+        get_rate_limiter().limits.setdefault(engine.provider, MOCK_RATE_LIMIT)
+        return engine
+
+    model = _engine_env(name, 'MODEL', spec['model'])
+    base_url = _engine_env(name, 'BASE_URL')
+    api_key = os.environ.get(spec['key_env'])
+    if api_key or base_url:
+        return ChatCompletionsEngine(name, spec['provider'], model,
+                                     base_url or spec['base_url'], api_key or '', **options)
+
+    if spec['provider'] in EMERGENT_PROVIDERS:
+        return LlmChatEngine(name, spec['provider'], model,
+                             os.environ.get('EMERGENT_LLM_KEY'), **options)
+    # No route to this provider; answer with the default model as before
+    return LlmChatEngine(name, *DEFAULT_MODEL, os.environ.get('EMERGENT_LLM_KEY'), **options)
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+def register_engine(name, engine):
+    """Use engine for name instead of the one built from the environment"""
+    with _engines_lock:
+        previous = _engines.pop(name, None)
+        if engine is not None:
+            _engines[name] = engine
+    if previous is not None and previous is not engine:
+        previous.close()
+
+def get_engine(name=None):
+    """Return the adapter for an engine label, building it once per process"""
+    name = name or DEFAULT_ENGINE
+    engine = _engines.get(name)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(name)
+            if engine is None:
+                engine = _engines[name] = engine_from_env(name)
+    return engine
+
+def close_engines():
+    with _engines_lock:
+        engines = list(_engines.values())
+        _engines.clear()
+    for engine in engines:
+        engine.close()
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        engine = get_engine(sys.argv[2] if len(sys.argv) > 2 else None)
+        print(engine.query(sys.argv[1]))
+    else:
+        names = [name for name in ENGINE_SPECS if name != 'Mock' or _mocked(name)]
+        print(json.dumps([get_engine(name).describe() for name in names], indent=2))
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Columnar export of visibility checks for analytics
+Streams checks in chunks into a Parquet (or Arrow IPC) dataset partitioned by
+project and day, with dictionary-encoded engine/keyword and list-typed array
+columns. Requires pyarrow (pip install pyarrow)
+"""
+
+import argparse
+import sys
+import time
+
+from checks_io import iter_checks, iter_chunks, parse_timestamp
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:
+    pa = None
+    ds = None
+
+def checks_schema(include_snippets=True):
+    """Arrow schema of an exported check; projectId and day are the partition keys"""
+    fields = [
+        pa.field('id', pa.string()),
+        pa.field('projectId', pa.string()),
+        pa.field('day', pa.date32()),
+        pa.field('engine', pa.dictionary(pa.int32(), pa.string())),
+        pa.field('keyword', pa.dictionary(pa.int32(), pa.string())),
+        pa.field('position', pa.int32()),
+        pa.field('presence', pa.bool_()),
+        pa.field('citationsCount', pa.int32()),
+        pa.field('observedUrls', pa.list_(pa.string())),
+        pa.field('competitorsMentioned', pa.list_(pa.string())),
+        pa.field('answerHash', pa.string()),
+        pa.field('timestamp', pa.timestamp('us', tz='UTC')),
+    ]
+    if include_snippets:
+        fields.append(pa.field('answerSnippet', pa.string()))
+    return pa.schema(fields)
+
+def to_record_batch(checks, schema):
+    """Convert a chunk of check dicts into one Arrow record batch"""
+    timestamps = [parse_timestamp(c['timestamp']) for c in checks]
+    columns = {
+        'id': [c.get('id') for c in checks],
+        'projectId': [c['projectId'] for c in checks],
+        'day': [t.date() for t in timestamps],
+        'engine': [c['engine'] for c in checks],
+        'keyword': [c['keyword'] for c in checks],
+        'position': [c.get('position') for c in checks],
+        'presence': [bool(c.get('presence')) for c in checks],
+        'citationsCount': [c.get('citationsCount') or 0 for c in checks],
+        'observedUrls': [c.get('observedUrls') or [] for c in checks],
+        'competitorsMentioned': [c.get('competitorsMentioned') or [] for c in checks],
+        'answerHash': [c.get('answerHash') for c in checks],
+        'timestamp': timestamps,
+        'answerSnippet': [c.get('answerSnippet') for c in checks],
+    }
+    arrays = [pa.array(columns[field.name], type=field.type) for field in schema]
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+def write_batches(batches, output_dir, schema, file_format='parquet', max_rows_per_group=50000):
+    """Write an iterable of record batches as a dataset partitioned by project and day"""
+    partitioning = ds.partitioning(
+        pa.schema([schema.field('projectId'), schema.field('day')]), flavor='hive'
+    )
+    extension = 'arrow' if file_format == 'ipc' else file_format
+    ds.write_dataset(
+        batches,
+        output_dir,
+        schema=schema,
+        format=file_format,
+        partitioning=partitioning,
+        basename_template=f'part-{int(time.time())}-{{i}}.{extension}',
+        existing_data_behavior='overwrite_or_ignore',
+        max_open_files=512,
+        max_rows_per_group=max_rows_per_group,
+    )
+
+def export_checks(sources, output_dir, file_format='parquet', chunk_size=50000,
+                  include_snippets=True, progress=None):
+    """
+    Write checks from one or more sources into a dataset under output_dir.
+
+    Checks are converted chunk_size at a time, so memory is bounded by the
+    chunk rather than the dataset. Files are laid out as
+    projectId=<id>/day=<date>/part-*.{parquet,arrow}. Returns the number of
+    rows written.
+    """
+    if pa is None:
+        raise RuntimeError('pyarrow is required: pip install pyarrow')
+
+    schema = checks_schema(include_snippets)
+    total = 0
+    started = time.perf_counter()
+
+    def batches():
+        nonlocal total
+        for source in sources:
+            for chunk in iter_chunks(iter_checks(source), chunk_size):
+                yield to_record_batch(chunk, schema)
+                total += len(chunk)
+                if progress:
+                    progress(total, time.perf_counter() - started)
+
+    write_batches(batches(), output_dir, schema, file_format, chunk_size)
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(description='Export visibility checks to Parquet/Arrow')
+    parser.add_argument('sources', nargs='+', help='seed_data.json, .jsonl or .db sources')
+    parser.add_argument('--output', required=True, help='Output dataset directory')
+    parser.add_argument('--format', choices=['parquet', 'ipc'], default='parquet')
+    parser.add_argument('--chunk-size', type=int, default=50000)
+    parser.add_argument('--no-snippets', action='store_true', help='Leave answerSnippet out')
+    args = parser.parse_args()
+
+    if pa is None:
+        print("❌ Error: pyarrow is not installed (pip install pyarrow)")
+        sys.exit(1)
+
+    def progress(total, elapsed):
+        print(f"\r📦 {total} checks exported ({total / elapsed:,.0f} rows/sec)",
+              end='', file=sys.stderr)
+
+    started = time.perf_counter()
+    total = export_checks(args.sources, args.output, args.format, args.chunk_size,
+                          not args.no_snippets, progress)
+    print(file=sys.stderr)
+    print(f"✅ Exported {total} checks to {args.output} in {time.perf_counter() - started:.2f}s")
+
+if __name__ == '__main__':
+    main()
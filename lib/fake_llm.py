@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Local fake chat-completions server for offline benchmarks and load tests
+Answers POST /v1/chat/completions like the OpenAI API, with the Mock engine's
+deterministic brand-mentioning text, configurable latency and a configurable
+rate of 429/503 errors
+
+Usage:
+  python3 lib/fake_llm.py --port 8089 --latency-ms 300 --error-rate 0.02
+  AI_CHECKER_CHATGPT_BASE_URL=http://127.0.0.1:8089/v1 python3 lib/ai_checker.py --worker
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from engines import MockEngine
+
+class FakeChatHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def _send(self, status, body, headers=None):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+        if not self.path.endswith('/chat/completions'):
+            self._send(404, {'error': {'message': f'Unknown path {self.path}'}})
+            return
+        self._send(*self.server.respond(request))
+
+    def log_message(self, *args):
+        pass
+
+class FakeLLMServer(ThreadingHTTPServer):
+    """
+    Threaded fake LLM. Each request sleeps latency seconds (jittered +/-50%),
+    then fails with error_rate probability (429 with Retry-After or 503, half
+    each) or answers as the model named in the request.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, error_rate=0.0, brands=None):
+        super().__init__((host, port), FakeChatHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.brands = brands
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.engines = {}
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/v1'
+
+    def _engine(self, model):
+        engine = self.engines.get(model)
+        if engine is None:
+            engine = self.engines[model] = MockEngine(model, model=model, brands=self.brands)
+        return engine
+
+    def respond(self, request):
+        """(status, body, headers) for a chat-completions request"""
+        with self.lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency * random.uniform(0.5, 1.5))
+
+        if self.error_rate and random.random() < self.error_rate:
+            with self.lock:
+                self.errors += 1
+            if random.random() < 0.5:
+                return 429, {'error': {'message': 'Rate limit exceeded'}}, {'Retry-After': '0.1'}
+            return 503, {'error': {'message': 'Service unavailable'}}, None
+
+        model = request.get('model', 'fake')
+        messages = request.get('messages') or [{}]
+        answer = self._engine(model).answer(messages[-1].get('content', ''))
+        return 200, {
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': model,
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': answer},
+                'finish_reason': 'stop'
+            }],
+            'usage': {'prompt_tokens': 0, 'completion_tokens': len(answer.split())}
+        }, None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a fake chat-completions API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency-ms', type=float, default=300)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--brands', help='Comma-separated brands the answers mention')
+    args = parser.parse_args()
+
+    brands = [b.strip() for b in args.brands.split(',')] if args.brands else None
+    server = FakeLLMServer(args.host, args.port, args.latency_ms / 1000, args.error_rate, brands)
+    print(f"🤖 Fake LLM listening on {server.url} "
+          f"({args.latency_ms:.0f}ms latency, {args.error_rate:.0%} errors)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"\n📊 {server.requests} requests, {server.errors} errors")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Keep-alive HTTP client for chat-completions style APIs
+One pool per engine holds open connections to its host, so checks after the
+first skip DNS, TCP and TLS setup. HTTPS hosts are reached over HTTP/2 with
+httpx when it is installed (pip install "httpx[http2]"), multiplexing
+concurrent checks over one connection
+"""
+
+import http.client
+import json
+import queue
+from urllib.parse import urlsplit
+
+# httpx pulls in certifi and friends, so it is imported with the first HTTPS
+# pool rather than by every checker process at startup
+httpx = None
+HTTP2 = False
+_httpx_loaded = False
+
+def _load_httpx():
+    """Import httpx (and h2 for HTTP/2) once; returns None when not installed"""
+    global httpx, HTTP2, _httpx_loaded
+    if not _httpx_loaded:
+        try:
+            import httpx as module
+        except ImportError:
+            module = None
+        try:
+            import h2  # noqa: F401 - httpx needs it for HTTP/2
+            HTTP2 = True
+        except ImportError:
+            HTTP2 = False
+        httpx, _httpx_loaded = module, True
+    return httpx
+
+# Idle connections are closed after this many seconds
+KEEPALIVE_EXPIRY = 60.0
+
+class HttpStatusError(Exception):
+    """Non-2xx response; status_code and response.headers feed classify_error"""
+
+    def __init__(self, status_code, headers, body):
+        super().__init__(f'HTTP {status_code}: {body[:200]}')
+        self.status_code = status_code
+        self.response = type('Response', (), {'status_code': status_code, 'headers': headers})()
+
+class HttpPool:
+    """
+    Thread-safe pool of persistent connections to one base URL.
+
+    Idle connections are reused newest first; at most size are kept. A
+    request on a reused connection that the server has meanwhile closed is
+    retried once on a fresh connection. HTTPS URLs go through a long-lived
+    httpx client instead when httpx is available (HTTP/2 with h2).
+    """
+
+    def __init__(self, base_url, size=8, timeout=30.0, headers=None):
+        parts = urlsplit(base_url)
+        self.client = None
+        if parts.scheme == 'https' and _load_httpx() is not None:
+            self.client = httpx.Client(
+                base_url=base_url,
+                http2=HTTP2,
+                timeout=timeout,
+                headers=headers,
+                limits=httpx.Limits(max_connections=size, max_keepalive_connections=size,
+                                    keepalive_expiry=KEEPALIVE_EXPIRY)
+            )
+        self.secure = parts.scheme == 'https'
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip('/')
+        self.size = size
+        self.timeout = timeout
+        self.headers = dict(headers or {})
+        self.idle = queue.LifoQueue()
+        self.opened = 0
+
+    def _connect(self):
+        self.opened += 1
+        cls = http.client.HTTPSConnection if self.secure else http.client.HTTPConnection
+        return cls(self.host, self.port, timeout=self.timeout)
+
+    def _checkout(self):
+        try:
+            return self.idle.get_nowait(), True
+        except queue.Empty:
+            return self._connect(), False
+
+    def _checkin(self, conn):
+        if self.idle.qsize() < self.size:
+            self.idle.put(conn)
+        else:
+            conn.close()
+
+    def request(self, method, path, body=None, headers=None):
+        """Send a request and return (status, headers, body bytes)"""
+        payload = json.dumps(body).encode('utf-8') if body is not None else None
+        merged = {'Content-Type': 'application/json', **self.headers, **(headers or {})}
+        if self.client is not None:
+            response = self.client.request(method, path.lstrip('/'), content=payload, headers=merged)
+            return response.status_code, {k.lower(): v for k, v in response.headers.items()}, response.content
+
+        conn, reused = self._checkout()
+        while True:
+            try:
+                conn.request(method, self.prefix + path, payload, merged)
+                response = conn.getresponse()
+                data = response.read()
+                break
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                conn.close()
+                if not reused:
+                    raise
+                conn, reused = self._connect(), False
+            except BaseException:
+                conn.close()
+                raise
+
+        if response.will_close:
+            conn.close()
+        else:
+            self._checkin(conn)
+        return response.status, {k.lower(): v for k, v in response.getheaders()}, data
+
+    def post_json(self, path, body, headers=None):
+        """POST a JSON body and decode the JSON response; raises HttpStatusError on failure"""
+        status, response_headers, data = self.request('POST', path, body, headers)
+        if status >= 400:
+            raise HttpStatusError(status, response_headers, data.decode('utf-8', 'replace'))
+        return json.loads(data)
+
+    @property
+    def protocol(self):
+        if self.client is not None:
+            return 'HTTP/2' if HTTP2 else 'HTTP/1.1'
+        return 'HTTP/1.1'
+
+    def close(self):
+        if self.client is not None:
+            self.client.close()
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                return
@@ -1,106 +1,342 @@
 #!/usr/bin/env python3
 """
-Import seed data into Supabase
-This script loads seed_data.json and inserts it into the Supabase database
+Import seed data into Postgres
+Streams checks from seed_data.json, JSONL or SQLite sources into the
+visibility_checks table with COPY FROM STDIN. Each chunk is staged, upserted
+on id and checkpointed in one transaction, so re-running is idempotent and an
+interrupted load resumes after the last committed chunk. Requires psycopg 3
+(pip install "psycopg[binary]") and a direct database connection string
+(Supabase: Project Settings → Database → Connection string)
+
+Usage:
+  DATABASE_URL=postgresql://... python3 lib/import_seed.py seed_data.json --user-id USER_UUID
+  python3 lib/import_seed.py load_checks.jsonl --projects load_projects.jsonl --user-id USER_UUID
 """
 
+import argparse
+import csv
+import io
 import json
 import os
-from supabase import create_client, Client
-
-# Load environment variables
-SUPABASE_URL = os.environ.get('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.environ.get('NEXT_PUBLIC_SUPABASE_ANON_KEY')
-
-if not SUPABASE_URL or not SUPABASE_KEY:
-    print("❌ Error: Supabase credentials not found in environment")
-    print("Make sure NEXT_PUBLIC_SUPABASE_URL and NEXT_PUBLIC_SUPABASE_ANON_KEY are set")
-    exit(1)
-
-# Initialize Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-
-def import_seed_data():
-    """Import seed data from seed_data.json"""
-    
-    # Load seed data
-    with open('/app/seed_data.json', 'r') as f:
-        seed_data = json.load(f)
-    
-    project = seed_data['project']
-    checks = seed_data['checks']
-    
-    print("📥 Importing seed data...")
-    print(f"Project: {project['name']}")
-    print(f"Keywords: {len(project['keywords'])}")
-    print(f"Checks: {len(checks)}")
-    
-    # Note: This script requires authentication
-    # You'll need to manually import via Supabase dashboard or
-    # use service role key (not recommended to commit)
-    
-    print("\n⚠️  Manual Import Required:")
-    print("1. Go to Supabase Dashboard → Table Editor")
-    print("2. Import project data into 'projects' table")
-    print("3. Import checks data into 'visibility_checks' table")
-    print("\nOr use the Supabase SQL Editor to run bulk inserts")
-    
-    # Generate SQL for manual import
-    print("\n📝 SQL Insert Statements:")
-    print("\n-- Insert Project:")
-    print(f"INSERT INTO projects (id, \"userId\", name, domain, brand, competitors, keywords, \"createdAt\", \"updatedAt\")")
-    print(f"VALUES (")
-    print(f"  '{project['id']}',")
-    print(f"  auth.uid(),  -- Replace with your user ID")
-    print(f"  '{project['name']}',")
-    print(f"  '{project['domain']}',")
-    print(f"  '{project['brand']}',")
-    print(f"  ARRAY{json.dumps(project['competitors'])},")
-    print(f"  ARRAY{json.dumps(project['keywords'])},")
-    print(f"  NOW(),")
-    print(f"  NOW()")
-    print(f");")
-    
-    print(f"\n-- Insert {len(checks)} Visibility Checks:")
-    print("-- (Run in Supabase SQL Editor for bulk import)")
-    
-    # Save to SQL file
-    with open('/app/import_seed.sql', 'w') as f:
-        f.write("-- Import Seed Data for AEO Tracker\n\n")
-        f.write("-- Step 1: Insert Project\n")
-        f.write(f"INSERT INTO projects (id, \"userId\", name, domain, brand, competitors, keywords, \"createdAt\", \"updatedAt\")\n")
-        f.write(f"VALUES (\n")
-        f.write(f"  '{project['id']}',\n")
-        f.write(f"  auth.uid(),  -- Replace with your user ID if needed\n")
-        f.write(f"  '{project['name']}',\n")
-        f.write(f"  '{project['domain']}',\n")
-        f.write(f"  '{project['brand']}',\n")
-        f.write(f"  ARRAY{json.dumps(project['competitors'])},\n")
-        f.write(f"  ARRAY{json.dumps(project['keywords'])},\n")
-        f.write(f"  NOW(),\n")
-        f.write(f"  NOW()\n")
-        f.write(f");\n\n")
-        
-        f.write("-- Step 2: Insert Visibility Checks\n")
-        f.write("-- Insert checks in batches\n\n")
-        
-        # Write checks in batches of 50
-        batch_size = 50
-        for i in range(0, len(checks), batch_size):
-            batch = checks[i:i+batch_size]
-            f.write(f"INSERT INTO visibility_checks (id, \"projectId\", engine, keyword, position, presence, \"answerSnippet\", \"citationsCount\", \"observedUrls\", \"competitorsMentioned\", timestamp, \"createdAt\")\n")
-            f.write("VALUES\n")
-            
-            values = []
-            for check in batch:
-                position_val = f"{check['position']}" if check['position'] is not None else "NULL"
-                values.append(f"('{check['id']}', '{check['projectId']}', '{check['engine']}', '{check['keyword'].replace(\"'\", \"''\")}', {position_val}, {str(check['presence']).lower()}, '{check['answerSnippet'].replace(\"'\", \"''\")}', {check['citationsCount']}, ARRAY{json.dumps(check['observedUrls'])}, ARRAY{json.dumps(check['competitorsMentioned'])}, '{check['timestamp']}', '{check['timestamp']}')")
-            
-            f.write(",\n".join(values))
-            f.write(";\n\n")
-    
-    print(f"\n✅ SQL import file created: /app/import_seed.sql")
-    print("Run this file in your Supabase SQL Editor to import all data")
+import queue
+import sys
+import threading
+import time
+import uuid
+
+from checks_io import iter_checks, iter_chunks, parse_timestamp, read_project
+
+try:
+    import psycopg
+    from psycopg import sql
+except ImportError:
+    psycopg = None
+    sql = None
+
+CHECKS_TABLE = 'visibility_checks'
+PROGRESS_TABLE = 'import_progress'
+CHECK_COLUMNS = [
+    'id', 'projectId', 'engine', 'keyword', 'position', 'presence', 'answerSnippet',
+    'citationsCount', 'observedUrls', 'competitorsMentioned', 'answerHash', 'timestamp',
+    'createdAt'
+]
+# Postgres types of CHECK_COLUMNS for binary COPY
+CHECK_TYPES = [
+    'uuid', 'uuid', 'text', 'text', 'int4', 'bool', 'text',
+    'int4', 'text[]', 'text[]', 'text', 'timestamptz',
+    'timestamptz'
+]
+PROJECT_COLUMNS = ['id', 'userId', 'name', 'domain', 'brand', 'competitors', 'keywords']
+
+# Stable ids for checks that come without one, so re-imports stay idempotent
+CHECK_ID_NAMESPACE = uuid.UUID('5f0c2a9e-7d43-4c1b-9a59-0b8f3c4e2d17')
+
+PROGRESS_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS {PROGRESS_TABLE} (
+  source TEXT PRIMARY KEY,
+  rows BIGINT NOT NULL,
+  "updatedAt" TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+-- No policies: hidden from the Supabase API, the loader connects as the owner
+ALTER TABLE {PROGRESS_TABLE} ENABLE ROW LEVEL SECURITY;
+"""
+
+def check_id(check):
+    return check.get('id') or str(uuid.uuid5(
+        CHECK_ID_NAMESPACE,
+        '|'.join([check['projectId'], check['engine'], check['keyword'], check['timestamp']])
+    ))
+
+def check_row(check):
+    """Tuple of CHECK_COLUMNS values for binary COPY"""
+    timestamp = parse_timestamp(check['timestamp'])
+    return (
+        uuid.UUID(check_id(check)),
+        uuid.UUID(check['projectId']),
+        check['engine'],
+        check['keyword'],
+        check.get('position'),
+        bool(check.get('presence')),
+        check.get('answerSnippet'),
+        check.get('citationsCount') or 0,
+        check.get('observedUrls') or [],
+        check.get('competitorsMentioned') or [],
+        check.get('answerHash'),
+        timestamp,
+        parse_timestamp(check['createdAt']) if check.get('createdAt') else timestamp
+    )
+
+def pg_array(values):
+    """Postgres array literal, e.g. {"a","b"}"""
+    return '{' + ','.join(
+        '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"' for value in values
+    ) + '}'
+
+def check_csv_row(check):
+    """CHECK_COLUMNS values for CSV COPY; timestamps pass through as text"""
+    return (
+        check_id(check),
+        check['projectId'],
+        check['engine'],
+        check['keyword'],
+        check.get('position'),
+        't' if check.get('presence') else 'f',
+        check.get('answerSnippet'),
+        check.get('citationsCount') or 0,
+        pg_array(check.get('observedUrls') or ()),
+        pg_array(check.get('competitorsMentioned') or ()),
+        check.get('answerHash'),
+        check['timestamp'],
+        check.get('createdAt') or check['timestamp']
+    )
+
+def prefetch(iterable, depth=2):
+    """
+    Iterate iterable on a background thread, up to depth items ahead, so
+    parsing and formatting the next chunk overlaps with the database round
+    trip of the current one
+    """
+    items = queue.Queue(depth)
+    done = object()
+
+    def produce():
+        try:
+            for item in iterable:
+                items.put((item, None))
+        except BaseException as e:
+            items.put((done, e))
+            return
+        items.put((done, None))
+
+    threading.Thread(target=produce, daemon=True).start()
+    while True:
+        item, error = items.get()
+        if error is not None:
+            raise error
+        if item is done:
+            return
+        yield item
+
+def _columns(names):
+    return sql.SQL(', ').join(sql.Identifier(name) for name in names)
+
+def upsert_projects(conn, projects, user_id=None):
+    """Insert or update project rows; user_id overrides the projects' userId"""
+    statement = sql.SQL(
+        'INSERT INTO projects ({columns}) VALUES ({values}) '
+        'ON CONFLICT (id) DO UPDATE SET {updates}, "updatedAt" = NOW()'
+    ).format(
+        columns=_columns(PROJECT_COLUMNS),
+        values=sql.SQL(', ').join(sql.Placeholder() * len(PROJECT_COLUMNS)),
+        updates=sql.SQL(', ').join(
+            sql.SQL('{0} = EXCLUDED.{0}').format(sql.Identifier(name))
+            for name in PROJECT_COLUMNS[1:]
+        )
+    )
+    rows = []
+    for project in projects:
+        owner = user_id or project.get('userId')
+        if not owner:
+            raise ValueError(f"Project {project['id']} has no userId; pass --user-id")
+        rows.append((project['id'], owner, project['name'], project['domain'], project['brand'],
+                     project.get('competitors') or [], project.get('keywords') or []))
+
+    with conn.transaction(), conn.cursor() as cur:
+        cur.executemany(statement, rows)
+    return len(rows)
+
+class CheckLoader:
+    """
+    COPY checks into a temporary staging table, then merge them into
+    visibility_checks with INSERT ... ON CONFLICT (id) DO UPDATE.
+
+    Every chunk commits together with its progress row, keyed by source, so
+    the checkpoint never runs ahead of the data. copy_format 'csv' formats
+    rows with the csv module and is the fastest; 'binary' sends typed values
+    through psycopg's binary dumpers.
+    """
+
+    def __init__(self, conn, table=CHECKS_TABLE, copy_format='csv'):
+        self.conn = conn
+        self.table = table
+        self.copy_format = copy_format
+        self.stage = f'{table}_stage'
+
+        with conn.transaction():
+            conn.execute(PROGRESS_SCHEMA)
+            conn.execute(sql.SQL(
+                'CREATE TEMP TABLE IF NOT EXISTS {stage} (LIKE {table} INCLUDING DEFAULTS) '
+                'ON COMMIT DELETE ROWS'
+            ).format(stage=sql.Identifier(self.stage), table=sql.Identifier(table)))
+
+        columns = _columns(CHECK_COLUMNS)
+        self.copy_statement = sql.SQL('COPY {stage} ({columns}) FROM STDIN{options}').format(
+            stage=sql.Identifier(self.stage),
+            columns=columns,
+            options=sql.SQL(' (FORMAT BINARY)' if copy_format == 'binary' else ' (FORMAT CSV)')
+        )
+        self.to_row = check_row if copy_format == 'binary' else check_csv_row
+        # DISTINCT ON keeps one row per id; ON CONFLICT cannot touch a row twice
+        self.merge_statement = sql.SQL(
+            'INSERT INTO {table} ({columns}) '
+            'SELECT DISTINCT ON (id) {columns} FROM {stage} ORDER BY id '
+            'ON CONFLICT (id) DO UPDATE SET {updates}'
+        ).format(
+            table=sql.Identifier(table),
+            stage=sql.Identifier(self.stage),
+            columns=columns,
+            updates=sql.SQL(', ').join(
+                sql.SQL('{0} = EXCLUDED.{0}').format(sql.Identifier(name))
+                for name in CHECK_COLUMNS if name not in ('id', 'createdAt')
+            )
+        )
+
+    def committed_rows(self, source):
+        with self.conn.transaction():
+            row = self.conn.execute(
+                f'SELECT rows FROM {PROGRESS_TABLE} WHERE source = %s', (source,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def reset(self, source):
+        with self.conn.transaction():
+            self.conn.execute(f'DELETE FROM {PROGRESS_TABLE} WHERE source = %s', (source,))
+
+    def prepare(self, checks):
+        """COPY payload for a chunk: row tuples for binary, CSV text otherwise"""
+        rows = [self.to_row(check) for check in checks]
+        if self.copy_format == 'binary':
+            return rows
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator='\n').writerows(rows)
+        return buffer.getvalue()
+
+    def load_chunk(self, payload, source, committed):
+        """
+        Stage, merge and checkpoint one prepared chunk in a single transaction;
+        committed is the source's row count once this chunk is in
+        """
+        with self.conn.transaction(), self.conn.cursor() as cur:
+            # Naive timestamps in CSV rows are read as UTC, like parse_timestamp
+            cur.execute("SET LOCAL TimeZone = 'UTC'")
+            with cur.copy(self.copy_statement) as copy:
+                if self.copy_format == 'binary':
+                    copy.set_types(CHECK_TYPES)
+                    for row in payload:
+                        copy.write_row(row)
+                else:
+                    copy.write(payload)
+            cur.execute(self.merge_statement)
+            cur.execute(
+                f'INSERT INTO {PROGRESS_TABLE} (source, rows, "updatedAt") VALUES (%s, %s, NOW()) '
+                'ON CONFLICT (source) DO UPDATE SET rows = EXCLUDED.rows, "updatedAt" = NOW()',
+                (source, committed)
+            )
+
+    def load(self, source, checks, chunk_size=50000, resume=True, progress=None):
+        """
+        Load an iterable of checks under the checkpoint key source.
+        Returns (rows loaded now, rows skipped because an earlier run committed them).
+        """
+        if not resume:
+            self.reset(source)
+        skipped = self.committed_rows(source)
+
+        def prepared():
+            for index, chunk in enumerate(iter_chunks(checks, chunk_size)):
+                committed = index * chunk_size + len(chunk)
+                if committed <= skipped:
+                    continue
+                chunk = chunk[max(0, skipped - index * chunk_size):]
+                yield self.prepare(chunk), len(chunk), committed
+
+        loaded = 0
+        started = time.perf_counter()
+        for payload, count, committed in prefetch(prepared()):
+            self.load_chunk(payload, source, committed)
+            loaded += count
+            if progress:
+                progress(skipped + loaded, time.perf_counter() - started)
+        return loaded, skipped
+
+def read_projects(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk-load visibility checks into Postgres')
+    parser.add_argument('sources', nargs='*', default=['seed_data.json'],
+                        help='seed_data.json, .jsonl or .db sources')
+    parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL'),
+                        help='Postgres connection string (default: $DATABASE_URL)')
+    parser.add_argument('--projects', help='JSONL file of projects to upsert first')
+    parser.add_argument('--user-id', help='userId to own the imported projects')
+    parser.add_argument('--chunk-size', type=int, default=50000,
+                        help='Rows per COPY transaction and checkpoint')
+    parser.add_argument('--copy-format', choices=['csv', 'binary'], default='csv')
+    parser.add_argument('--restart', action='store_true',
+                        help='Ignore saved progress and load every source from the start')
+    args = parser.parse_args()
+
+    if psycopg is None:
+        print('❌ Error: psycopg is not installed (pip install "psycopg[binary]")')
+        sys.exit(1)
+    if not args.database_url:
+        print("❌ Error: no database connection string")
+        print("Set DATABASE_URL or pass --database-url")
+        sys.exit(1)
+
+    projects = read_projects(args.projects) if args.projects else []
+    for source in args.sources:
+        project = read_project(source)
+        if project:
+            projects.append(project)
+
+    def progress(total, elapsed):
+        print(f"\r📥 {total} checks committed ({total / elapsed:,.0f} rows/sec)",
+              end='', file=sys.stderr)
+
+    started = time.perf_counter()
+    with psycopg.connect(args.database_url, autocommit=True) as conn:
+        # Keep the staging table in memory; only settable before temp tables are used
+        conn.execute("SET temp_buffers = '256MB'")
+        if projects:
+            print(f"📁 Upserted {upsert_projects(conn, projects, args.user_id)} projects")
+
+        loader = CheckLoader(conn, copy_format=args.copy_format)
+        total = 0
+        for source in args.sources:
+            key = os.path.abspath(source)
+            loaded, skipped = loader.load(key, iter_checks(source), args.chunk_size,
+                                          not args.restart, progress)
+            print(file=sys.stderr)
+            if skipped:
+                print(f"⏩ {source}: resumed after {skipped} previously committed checks")
+            print(f"✅ {source}: {loaded} checks loaded")
+            total += loaded
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ Imported {total} checks in {elapsed:.2f}s ({total / max(elapsed, 1e-9):,.0f} rows/sec)")
 
 if __name__ == '__main__':
-    import_seed_data()
+    main()
@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+SQLite-backed job queue for visibility check runs
+/api/checks/run submits a job per project run; worker processes drain it
+keyword by keyword, record partial results and insert rows into Supabase
+
+The Next.js server (lib/worker-pool.js) keeps one `job_queue.py serve` process
+that answers submit/status/stats requests as JSON lines, and a separate
+`job_queue.py worker CHECKS_QUEUE_WORKERS` process that drains the queue.
+Writing rows needs supabase-py (pip install -r requirements.txt)
+
+Usage:
+  job_queue.py submit < payload.json     # {"project": {...}, "engines": [...], "plan": [...]}
+  job_queue.py status JOB_ID [SINCE]     # progress plus results after SINCE
+  job_queue.py stats                     # queue depth
+  job_queue.py worker [CONCURRENCY]      # drain the queue
+  job_queue.py serve                     # JSON-lines requests on stdin
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+DEFAULT_QUEUE_PATH = os.path.join(tempfile.gettempdir(), 'aeo_check_jobs.db')
+DEFAULT_ENGINES = ['ChatGPT', 'Perplexity', 'Gemini', 'Claude']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+  id TEXT PRIMARY KEY,
+  user_id TEXT,
+  project_id TEXT NOT NULL,
+  payload TEXT NOT NULL,
+  status TEXT NOT NULL DEFAULT 'queued',
+  total INTEGER NOT NULL,
+  completed INTEGER NOT NULL DEFAULT 0,
+  failed INTEGER NOT NULL DEFAULT 0,
+  created_at REAL NOT NULL,
+  started_at REAL,
+  finished_at REAL
+);
+CREATE TABLE IF NOT EXISTS job_items (
+  job_id TEXT NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+  seq INTEGER NOT NULL,
+  keyword TEXT NOT NULL,
+  status TEXT NOT NULL DEFAULT 'pending',
+  result TEXT,
+  error TEXT,
+  worker TEXT,
+  leased_at REAL,
+  finished_seq INTEGER,
+  PRIMARY KEY (job_id, seq)
+);
+CREATE INDEX IF NOT EXISTS idx_job_items_pending ON job_items(status, job_id, seq);
+CREATE INDEX IF NOT EXISTS idx_job_items_finished ON job_items(job_id, finished_seq);
+"""
+
+class QueueFull(Exception):
+    pass
+
+class JobQueue:
+    """
+    Jobs are split into one item per keyword so several workers can share a
+    run. Each finished item gets an increasing finished_seq within its job,
+    which pollers use as a cursor for partial results. Items leased by a
+    worker that died are handed out again after lease_seconds.
+    """
+
+    def __init__(self, path=None, max_depth=None, lease_seconds=None):
+        self.path = path or os.environ.get('CHECKS_QUEUE_PATH', DEFAULT_QUEUE_PATH)
+        self.max_depth = max_depth or int(os.environ.get('CHECKS_QUEUE_MAX_DEPTH', '10000'))
+        self.lease_seconds = lease_seconds or float(os.environ.get('CHECKS_QUEUE_LEASE_SECONDS', '300'))
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.path, timeout=30, isolation_level=None,
+                                    check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA foreign_keys=ON')
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+
+    def _transaction(self, fn):
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                value = fn(self.conn)
+                self.conn.execute('COMMIT')
+                return value
+            except BaseException:
+                self.conn.execute('ROLLBACK')
+                raise
+
+    def depth(self):
+        """Number of keyword items waiting to be checked"""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM job_items WHERE status = 'pending'"
+            ).fetchone()[0]
+
+    def submit(self, project, engines=None, user_id=None, plan=None):
+        """
+        Queue a run and return the job id. Without a plan every keyword of the
+        project is checked on every engine; a scheduler plan
+        ([{"keyword", "engines"}, ...]) limits the run to its pairs.
+        """
+        payload = {'project': project, 'engines': engines or DEFAULT_ENGINES}
+        if plan is None:
+            keywords = list(project.get('keywords') or [])
+        else:
+            keywords = [entry['keyword'] for entry in plan]
+            payload['plan'] = {entry['keyword']: entry['engines'] for entry in plan}
+        job_id = str(uuid.uuid4())
+
+        def insert(conn):
+            pending = conn.execute(
+                "SELECT COUNT(*) FROM job_items WHERE status = 'pending'"
+            ).fetchone()[0]
+            if pending + len(keywords) > self.max_depth:
+                raise QueueFull(f'Queue is full ({pending} pending checks)')
+
+            conn.execute(
+                "INSERT INTO jobs (id, user_id, project_id, payload, status, total, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, user_id, project['id'], json.dumps(payload),
+                 'queued' if keywords else 'done', len(keywords), time.time())
+            )
+            conn.executemany(
+                "INSERT INTO job_items (job_id, seq, keyword) VALUES (?, ?, ?)",
+                [(job_id, seq, keyword) for seq, keyword in enumerate(keywords)]
+            )
+            return job_id
+
+        return self._transaction(insert)
+
+    def claim(self, worker):
+        """Lease the oldest pending item; returns (job_id, seq, keyword, payload) or None"""
+        now = time.time()
+
+        def lease(conn):
+            conn.execute(
+                "UPDATE job_items SET status = 'pending', worker = NULL "
+                "WHERE status = 'running' AND leased_at < ?",
+                (now - self.lease_seconds,)
+            )
+            row = conn.execute(
+                "SELECT i.job_id, i.seq, i.keyword, j.payload FROM job_items i "
+                "JOIN jobs j ON j.id = i.job_id "
+                "WHERE i.status = 'pending' ORDER BY j.created_at, i.seq LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+
+            job_id, seq, keyword, payload = row
+            conn.execute(
+                "UPDATE job_items SET status = 'running', worker = ?, leased_at = ? "
+                "WHERE job_id = ? AND seq = ?",
+                (worker, now, job_id, seq)
+            )
+            conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = COALESCE(started_at, ?) "
+                "WHERE id = ?",
+                (now, job_id)
+            )
+            return job_id, seq, keyword, json.loads(payload)
+
+        return self._transaction(lease)
+
+    def finish(self, job_id, seq, worker, result=None, error=None):
+        """
+        Record the outcome of an item and close the job once all are done.
+        An item with rows and an error (some engines failed) counts as
+        completed and keeps both.
+        """
+        now = time.time()
+        failed = error is not None and not result
+
+        def record(conn):
+            finished_seq = conn.execute(
+                "SELECT COALESCE(MAX(finished_seq), 0) + 1 FROM job_items WHERE job_id = ?",
+                (job_id,)
+            ).fetchone()[0]
+            updated = conn.execute(
+                "UPDATE job_items SET status = ?, result = ?, error = ?, finished_seq = ? "
+                "WHERE job_id = ? AND seq = ? AND status = 'running' AND worker = ?",
+                ('failed' if failed else 'done', json.dumps(result) if result is not None else None,
+                 error, finished_seq, job_id, seq, worker)
+            ).rowcount
+            if not updated:
+                # The lease expired and another worker owns the item now
+                return
+
+            column = 'failed' if failed else 'completed'
+            conn.execute(f"UPDATE jobs SET {column} = {column} + 1 WHERE id = ?", (job_id,))
+            conn.execute(
+                "UPDATE jobs SET status = 'done', finished_at = ? "
+                "WHERE id = ? AND completed + failed >= total",
+                (now, job_id)
+            )
+
+        self._transaction(record)
+
+    def status(self, job_id, since=0):
+        """Job progress plus item results finished after the since cursor"""
+        with self.lock:
+            job = self.conn.execute(
+                "SELECT id, user_id, project_id, status, total, completed, failed, "
+                "created_at, started_at, finished_at FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+            if job is None:
+                return None
+
+            items = self.conn.execute(
+                "SELECT finished_seq, keyword, status, result, error FROM job_items "
+                "WHERE job_id = ? AND finished_seq > ? ORDER BY finished_seq",
+                (job_id, since)
+            ).fetchall()
+
+        keys = ['id', 'userId', 'projectId', 'status', 'total', 'completed', 'failed',
+                'createdAt', 'startedAt', 'finishedAt']
+        status = dict(zip(keys, job))
+        status['results'] = [
+            {
+                'keyword': keyword,
+                'status': item_status,
+                'checks': json.loads(result) if result else [],
+                'error': error
+            }
+            for _, keyword, item_status, result, error in items
+        ]
+        status['cursor'] = items[-1][0] if items else since
+        return status
+
+def _supabase_writer():
+    """Batch writer for visibility_checks, or None without Supabase credentials"""
+    url = os.environ.get('NEXT_PUBLIC_SUPABASE_URL')
+    key = os.environ.get('SUPABASE_SERVICE_ROLE_KEY') or os.environ.get('NEXT_PUBLIC_SUPABASE_ANON_KEY')
+    if not url or not key:
+        return None
+
+    from supabase import create_client
+    from batch_writer import BatchWriter, supabase_insert
+
+    client = create_client(url, key)
+    return lambda: BatchWriter(supabase_insert(client))
+
+def run_item(keyword, payload, make_writer):
+    """
+    Check one keyword on every engine and save the rows. Returns the rows
+    and a message naming the engines that failed, or None.
+    """
+    from ai_checker import check_visibility_engines
+
+    project = payload['project']
+    engines = payload.get('plan', {}).get(keyword, payload['engines'])
+    by_engine = check_visibility_engines(
+        keyword, project['brand'], project.get('competitors') or [], engines
+    )
+
+    timestamp = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime()) + 'Z'
+    rows = []
+    errors = []
+    for engine, result in by_engine.items():
+        if 'error' in result:
+            errors.append(f"{engine}: {result['error']}")
+            continue
+        row = {
+            'projectId': project['id'],
+            'engine': engine,
+            'keyword': keyword,
+            'position': result['position'],
+            'presence': result['presence'],
+            'answerSnippet': result['answer_snippet'],
+            'citationsCount': result['citations_count'],
+            'observedUrls': result['observed_urls'],
+            'competitorsMentioned': result['competitors_mentioned'],
+            'timestamp': timestamp
+        }
+        if result.get('answer_hash'):
+            row['answerHash'] = result['answer_hash']
+        rows.append(row)
+
+    if make_writer is not None:
+        import metrics
+
+        started = time.perf_counter()
+        writer = make_writer()
+        writer.add_many(rows)
+        failures = writer.close()['failures']
+        for failure in failures:
+            failure['row']['saveError'] = failure['error']
+        metrics.observe('aeo_check_stage_seconds', time.perf_counter() - started, stage='insert')
+        metrics.count('aeo_rows_inserted_total', len(rows) - len(failures), outcome='ok')
+        metrics.count('aeo_rows_inserted_total', len(failures), outcome='error')
+    return rows, '; '.join(errors) or None
+
+def start_workers(queue_path=None, concurrency=None, poll_interval=1.0, stop=None):
+    """Start concurrency daemon threads draining the queue until stop is set"""
+    concurrency = concurrency or int(os.environ.get('CHECKS_QUEUE_CONCURRENCY', '4'))
+    stop = stop or threading.Event()
+    make_writer = _supabase_writer()
+    if make_writer is None:
+        print('⚠️  Supabase credentials not set; results are kept in the queue only',
+              file=sys.stderr)
+
+    def work(index):
+        queue = JobQueue(queue_path)
+        worker = f'{socket.gethostname()}:{os.getpid()}:{index}'
+        while not stop.is_set():
+            item = queue.claim(worker)
+            if item is None:
+                stop.wait(poll_interval)
+                continue
+
+            job_id, seq, keyword, payload = item
+            try:
+                rows, error = run_item(keyword, payload, make_writer)
+                queue.finish(job_id, seq, worker, result=rows, error=error)
+            except Exception as e:
+                queue.finish(job_id, seq, worker, error=str(e))
+
+    threads = [threading.Thread(target=work, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    print(f"👷 {concurrency} check workers draining {JobQueue(queue_path).path}", file=sys.stderr)
+    return threads
+
+def run_workers(queue_path=None, concurrency=None, poll_interval=1.0, stop=None):
+    """
+    Drain the queue with concurrency worker threads until interrupted.
+    SIGTERM lets every thread finish its current item before exiting.
+    """
+    stop = stop or threading.Event()
+    if threading.current_thread() is threading.main_thread():
+        import signal
+        signal.signal(signal.SIGTERM, lambda *args: stop.set())
+    threads = start_workers(queue_path, concurrency, poll_interval, stop)
+    try:
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(0.5)
+    except KeyboardInterrupt:
+        stop.set()
+
+def handle_request(queue, request):
+    """Answer one serve request with the same JSON the CLI commands print"""
+    op = request.get('op')
+    if op == 'submit':
+        try:
+            job_id = queue.submit(request['project'], request.get('engines'),
+                                  request.get('userId'), request.get('plan'))
+        except QueueFull as e:
+            return {'error': str(e), 'queueFull': True}
+        return {'jobId': job_id}
+    if op == 'status':
+        status = queue.status(request['jobId'], int(request.get('since') or 0))
+        return status if status is not None else {'error': 'Job not found'}
+    if op == 'stats':
+        return {'depth': queue.depth(), 'maxDepth': queue.max_depth}
+    raise ValueError(f'Unknown op {op!r}')
+
+def run_server(stdin=sys.stdin, stdout=sys.stdout):
+    """
+    Serve newline-delimited JSON requests ({"id", "op", ...}) until stdin
+    closes, answering {"id", "result"} or {"id", "error"} like the checker
+    workers, so job status polls reuse one process and one connection. It
+    runs no checks itself; `job_queue.py worker` drains the queue.
+    """
+    queue = JobQueue()
+    stdout.write(json.dumps({'ready': True, 'pid': os.getpid()}) + '\n')
+    stdout.flush()
+
+    for line in stdin:
+        if not line.strip():
+            continue
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            response = {'id': request_id, 'result': handle_request(queue, request)}
+        except Exception as e:
+            response = {'id': request_id, 'error': str(e)}
+        stdout.write(json.dumps(response) + '\n')
+        stdout.flush()
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+
+    if command == 'submit':
+        response = handle_request(JobQueue(), {**json.load(sys.stdin), 'op': 'submit'})
+        print(json.dumps(response))
+        if response.get('queueFull'):
+            sys.exit(2)
+    elif command == 'status' and len(sys.argv) > 2:
+        since = sys.argv[3] if len(sys.argv) > 3 else 0
+        print(json.dumps(handle_request(JobQueue(), {'op': 'status', 'jobId': sys.argv[2], 'since': since})))
+    elif command == 'stats':
+        print(json.dumps(handle_request(JobQueue(), {'op': 'stats'})))
+    elif command == 'worker':
+        run_workers(concurrency=int(sys.argv[2]) if len(sys.argv) > 2 else None)
+    elif command == 'serve':
+        run_server()
+    else:
+        print(__doc__, file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Opt-in timing metrics for the check pipeline
+Set AI_CHECKER_METRICS_PATH to enable them: every checker result then carries
+a "timings" object (milliseconds per stage) and each process adds its
+counters and histograms to that SQLite file, shared like the response cache.
+Unset, the instrumentation is a flag check per stage
+
+Stages: startup (spawn to ready), import (module imports), cache, llm,
+analysis, blob_store, insert (Supabase rows) and total (one check)
+
+Usage:
+  metrics.py                          # print Prometheus text
+  metrics.py --output /var/lib/node_exporter/aeo.prom
+  metrics.py serve --port 9464        # GET /metrics
+  metrics.py reset
+"""
+
+import atexit
+import contextlib
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+METRICS_PATH = os.environ.get('AI_CHECKER_METRICS_PATH')
+ENABLED = bool(METRICS_PATH)
+# Processes add their samples to the file at most this often, and at exit
+FLUSH_SECONDS = float(os.environ.get('AI_CHECKER_METRICS_FLUSH_SECONDS', '5'))
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRICS = {
+    'aeo_check_stage_seconds': ('histogram', 'Time spent per check pipeline stage'),
+    'aeo_checks_total': ('counter', 'Visibility checks by engine and outcome'),
+    'aeo_llm_calls_total': ('counter', 'LLM calls sent by engine'),
+    'aeo_cache_hits_total': ('counter', 'Answers served from the response cache by engine'),
+    'aeo_rows_inserted_total': ('counter', 'Check rows inserted into Supabase by outcome'),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS series (
+  name TEXT NOT NULL,
+  labels TEXT NOT NULL,
+  value REAL NOT NULL,
+  PRIMARY KEY (name, labels)
+);
+"""
+
+def _labels(labels):
+    return ','.join(f'{key}="{labels[key]}"' for key in sorted(labels))
+
+class Registry:
+    """
+    In-process counters and histograms, added to the shared file on flush.
+
+    Every sample is additive (histograms are kept as cumulative _bucket,
+    _sum and _count series), so flushing from many processes only sums.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.last_flush = time.monotonic()
+
+    def _add(self, name, labels, value):
+        key = (name, labels)
+        self.pending[key] = self.pending.get(key, 0.0) + value
+
+    def count(self, name, value=1, **labels):
+        with self.lock:
+            self._add(name, _labels(labels), value)
+
+    def observe(self, name, seconds, **labels):
+        with self.lock:
+            # Every bucket is written, even at 0, so each label set has the full series
+            for bound in BUCKETS:
+                self._add(f'{name}_bucket', _labels({**labels, 'le': bound}), seconds <= bound)
+            self._add(f'{name}_bucket', _labels({**labels, 'le': '+Inf'}), 1)
+            self._add(f'{name}_sum', _labels(labels), seconds)
+            self._add(f'{name}_count', _labels(labels), 1)
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            self.last_flush = time.monotonic()
+        if not pending or not self.path:
+            return
+        conn = connect(self.path)
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO series (name, labels, value) VALUES (?, ?, ?) "
+                    "ON CONFLICT (name, labels) DO UPDATE SET value = value + excluded.value",
+                    [(name, labels, value) for (name, labels), value in pending.items()]
+                )
+        finally:
+            conn.close()
+
+    def maybe_flush(self):
+        if time.monotonic() - self.last_flush >= FLUSH_SECONDS:
+            self.flush()
+
+def connect(path):
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(SCHEMA)
+    return conn
+
+registry = Registry(METRICS_PATH) if ENABLED else None
+if registry is not None:
+    atexit.register(registry.flush)
+
+class _Stage:
+    __slots__ = ('timings', 'name', 'started')
+
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.timings[self.name] = self.timings.get(self.name, 0.0) + time.perf_counter() - self.started
+
+_NO_STAGE = contextlib.nullcontext()
+
+def new_timings():
+    """Stage durations of one check, or None when metrics are disabled"""
+    return {} if ENABLED else None
+
+def stage(timings, name):
+    """Context manager adding the time spent inside it to timings[name]"""
+    return _NO_STAGE if timings is None else _Stage(timings, name)
+
+def count(name, value=1, **labels):
+    if registry is not None:
+        registry.count(name, value, **labels)
+
+def observe(name, seconds, **labels):
+    if registry is not None:
+        registry.observe(name, seconds, **labels)
+
+def timings_ms(timings):
+    return {f'{name}Ms': round(seconds * 1000, 3) for name, seconds in timings.items()}
+
+def record_check(result, timings, engine=None, observe=True):
+    """
+    Count a finished check, observe its stages (unless observe is False) and
+    attach them to the result as "timings" in milliseconds. No-op when
+    metrics are disabled.
+    """
+    if timings is None:
+        return result
+    result['timings'] = timings_ms(timings)
+    registry.count('aeo_checks_total', engine=engine or 'default', outcome='ok')
+    if observe:
+        for name, seconds in timings.items():
+            registry.observe('aeo_check_stage_seconds', seconds, stage=name)
+    registry.maybe_flush()
+    return result
+
+def render(path):
+    """Prometheus text exposition of everything flushed to path"""
+    conn = connect(path)
+    try:
+        rows = conn.execute("SELECT name, labels, value FROM series ORDER BY name, labels").fetchall()
+    finally:
+        conn.close()
+
+    by_metric = {}
+    for name, labels, value in rows:
+        metric = next((m for m in METRICS if name == m or name.startswith(m + '_')), name)
+        by_metric.setdefault(metric, []).append((name, labels, value))
+
+    def bucket_order(sample):
+        name, labels, _ = sample
+        # Histogram buckets sorted by their numeric bound, +Inf last
+        le = labels.split('le="', 1)[1].split('"', 1)[0] if 'le="' in labels else None
+        rest = labels.replace(f'le="{le}"', '') if le is not None else labels
+        bound = float('inf') if le in (None, '+Inf') else float(le)
+        return (rest, name, bound)
+
+    lines = []
+    for metric in sorted(by_metric):
+        kind, help_text = METRICS.get(metric, ('untyped', metric))
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} {kind}')
+        for name, labels, value in sorted(by_metric[metric], key=bucket_order):
+            number = int(value) if value == int(value) else value
+            lines.append(f'{name}{{{labels}}} {number}' if labels else f'{name} {number}')
+    return '\n'.join(lines) + '\n'
+
+def serve(path, host, port):
+    # Only the exporter needs an HTTP server; checkers never import one
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = render(path).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    print(f"📈 Serving metrics from {path} on http://{host}:{port}/metrics", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Export check pipeline metrics')
+    parser.add_argument('command', nargs='?', choices=['print', 'serve', 'reset'], default='print')
+    parser.add_argument('--path', default=METRICS_PATH,
+                        help='Metrics file (default: $AI_CHECKER_METRICS_PATH)')
+    parser.add_argument('--output', help='Write the Prometheus text to this file instead of stdout')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9464)
+    args = parser.parse_args()
+
+    if not args.path:
+        print("❌ Error: no metrics file; set AI_CHECKER_METRICS_PATH or pass --path")
+        sys.exit(1)
+
+    if args.command == 'serve':
+        serve(args.path, args.host, args.port)
+    elif args.command == 'reset':
+        conn = connect(args.path)
+        with conn:
+            conn.execute("DELETE FROM series")
+        conn.close()
+    elif args.output:
+        # Written then renamed, so collectors never read a partial file
+        partial = args.output + '.tmp'
+        with open(partial, 'w', encoding='utf-8') as f:
+            f.write(render(args.path))
+        os.replace(partial, args.output)
+    else:
+        sys.stdout.write(render(args.path))
+
+if __name__ == '__main__':
+    main()
@@ -37,38 +37,37 @@ export class AIVisibilityChecker {
     }
   }
 
+  // Word-boundary matcher for a term, e.g. "Acme" does not match "Acmes".
+  // Empty or whitespace-only terms get null, as they would match anywhere
+  termRegex(term) {
+    if (typeof term !== 'string' || !term.trim()) return null
+    const escaped = term.replace(/[.*+?^${}()|[\]\\]/g, '\\$&')
+    return new RegExp(`(?<![\\p{L}\\p{N}_])${escaped}(?![\\p{L}\\p{N}_])`, 'giu')
+  }
+
   analyzeResponse(answer, brand, competitors) {
-    const lowerAnswer = answer.toLowerCase()
-    const lowerBrand = brand.toLowerCase()
-    
-    // Check brand presence
-    const brandMentioned = lowerAnswer.includes(lowerBrand)
-    
-    // Count brand mentions
-    const brandRegex = new RegExp(lowerBrand, 'gi')
-    const brandMatches = answer.match(brandRegex)
-    const citationsCount = brandMatches ? brandMatches.length : 0
+    // Find brand mentions with their character offsets
+    const brandRegex = this.termRegex(brand)
+    const brandMatches = brandRegex ? [...answer.matchAll(brandRegex)] : []
+    const brandMentioned = brandMatches.length > 0
+    const citationsCount = brandMatches.length
     
     // Extract URLs (simple regex for demo)
     const urlRegex = /https?:\/\/[^\s]+/g
     const urls = answer.match(urlRegex) || []
     
-    // Check position (first mention)
+    // Check position (word index of the first mention)
     let position = null
     if (brandMentioned) {
-      const words = answer.split(/\s+/)
-      for (let i = 0; i < words.length; i++) {
-        if (words[i].toLowerCase().includes(lowerBrand)) {
-          position = i + 1
-          break
-        }
-      }
+      const before = answer.slice(0, brandMatches[0].index + 1)
+      position = (before.match(/\S+/g) || []).length
     }
     
     // Check competitors
-    const competitorsMentioned = competitors.filter(comp => 
-      lowerAnswer.includes(comp.toLowerCase())
-    )
+    const competitorsMentioned = competitors.filter(comp => {
+      const regex = this.termRegex(comp)
+      return regex !== null && regex.test(answer)
+    })
     
     return {
       presence: brandMentioned,
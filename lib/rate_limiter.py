@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+Shared rate limiting and retries for LLM calls
+Every ai_checker.py process takes tokens from per-provider token buckets kept
+in one SQLite file, so limits, 429 back-off, the concurrency cap and the
+circuit breaker hold across the whole worker pool
+
+Usage:
+  rate_limiter.py            # print the state of every provider
+  rate_limiter.py reset      # forget learned rates, leases and open circuits
+"""
+
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+DEFAULT_LIMITS_PATH = os.path.join(tempfile.gettempdir(), 'aeo_rate_limits.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+  provider TEXT PRIMARY KEY,
+  rate REAL NOT NULL,
+  tokens REAL NOT NULL,
+  refilled_at REAL NOT NULL,
+  blocked_until REAL NOT NULL DEFAULT 0,
+  failures INTEGER NOT NULL DEFAULT 0,
+  open_until REAL NOT NULL DEFAULT 0,
+  probe TEXT,
+  throttled INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS leases (
+  id TEXT PRIMARY KEY,
+  provider TEXT NOT NULL,
+  expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_leases_provider ON leases(provider, expires_at);
+"""
+
+# Outcomes of an LLM call, as classified by classify_error
+SUCCESS = 'success'
+RATE_LIMITED = 'rate_limited'
+TRANSIENT = 'transient'
+FATAL = 'fatal'
+
+TRANSIENT_STATUS = {408, 409, 500, 502, 503, 504, 529}
+TRANSIENT_NAMES = ('Timeout', 'APIConnection', 'ServiceUnavailable', 'InternalServer', 'Overloaded',
+                   'ConnectError', 'ReadError', 'WriteError', 'RemoteProtocolError')
+
+class RateLimited(Exception):
+    """Raised by callers (or fakes) for a 429 response"""
+
+    def __init__(self, message='Rate limited', retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class CircuitOpen(Exception):
+    pass
+
+class LimiterTimeout(Exception):
+    pass
+
+class CallTimeout(TimeoutError):
+    """An attempt outlived its timeout; future completes when its thread returns"""
+
+    def __init__(self, message, future):
+        super().__init__(message)
+        self.future = future
+
+def _retry_after(error):
+    """Seconds from a retry_after attribute or a Retry-After header, if any"""
+    value = getattr(error, 'retry_after', None)
+    if value is None:
+        headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+        value = headers.get('retry-after') or headers.get('Retry-After')
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        pass
+    import email.utils
+    try:
+        moment = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(moment.timestamp() - time.time(), 0.0)
+
+def classify_error(error):
+    """
+    Map an exception from an LLM client to (outcome, retry_after).
+
+    Works on status codes and exception names rather than one client's
+    classes, since calls go through emergentintegrations/litellm wrappers.
+    """
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    name = type(error).__name__
+    message = str(error).lower()
+
+    if status == 429 or 'RateLimit' in name or 'rate limit' in message:
+        return RATE_LIMITED, _retry_after(error)
+    # concurrent.futures.TimeoutError is the builtin from 3.11 and matches 'Timeout' before
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return TRANSIENT, None
+    if status in TRANSIENT_STATUS or any(part in name for part in TRANSIENT_NAMES):
+        return TRANSIENT, None
+    return FATAL, None
+
+class RateLimiter:
+    """
+    Adaptive token bucket, concurrency cap and circuit breaker per provider.
+
+    Each provider refills at its current rate, which starts at the configured
+    limit. A 429 cuts the rate by backoff_factor and blocks the provider until
+    Retry-After; successes add back about recovery * limit per second up to
+    the limit (AIMD). At most max_concurrency calls
+    hold a lease at once; leases expire after lease_seconds so a crashed
+    process cannot leak slots. failure_threshold consecutive transient
+    failures open the circuit for cooldown seconds, after which one probe
+    call decides whether it closes again.
+    """
+
+    def __init__(self, path=None, limits=None, default_rate=5.0, max_concurrency=16,
+                 burst_seconds=1.0, backoff_factor=0.8, recovery=0.05,
+                 failure_threshold=5, cooldown=30.0, lease_seconds=120.0, max_wait=300.0,
+                 max_attempts=6, retry_base=0.5, retry_max=30.0, call_timeout=None):
+        self.path = path or DEFAULT_LIMITS_PATH
+        self.limits = dict(limits or {})
+        self.default_rate = default_rate
+        self.max_concurrency = max_concurrency
+        self.burst_seconds = burst_seconds
+        self.backoff_factor = backoff_factor
+        self.recovery = recovery
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.lease_seconds = lease_seconds
+        self.max_wait = max_wait
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.call_timeout = call_timeout
+        self.executor = None
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.path, timeout=30, isolation_level=None,
+                                    check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+
+    def limit(self, provider):
+        return self.limits.get(provider, self.default_rate)
+
+    def _transaction(self, fn):
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                value = fn(self.conn)
+                self.conn.execute('COMMIT')
+                return value
+            except BaseException:
+                self.conn.execute('ROLLBACK')
+                raise
+
+    def _bucket(self, conn, provider, now):
+        row = conn.execute(
+            "SELECT rate, tokens, refilled_at, blocked_until, failures, open_until, probe "
+            "FROM buckets WHERE provider = ?",
+            (provider,)
+        ).fetchone()
+        if row is None:
+            limit = self.limit(provider)
+            row = (limit, limit * self.burst_seconds, now, 0.0, 0, 0.0, None)
+            conn.execute(
+                "INSERT INTO buckets (provider, rate, tokens, refilled_at) VALUES (?, ?, ?, ?)",
+                (provider, row[0], row[1], now)
+            )
+        keys = ('rate', 'tokens', 'refilled_at', 'blocked_until', 'failures', 'open_until', 'probe')
+        bucket = dict(zip(keys, row))
+        capacity = max(1.0, bucket['rate'] * self.burst_seconds)
+        bucket['tokens'] = min(capacity, bucket['tokens'] + (now - bucket['refilled_at']) * bucket['rate'])
+        bucket['refilled_at'] = now
+        return bucket
+
+    def _try_acquire(self, provider):
+        """Take a token and a lease, or return how long to wait before trying again"""
+        now = time.time()
+
+        def attempt(conn):
+            conn.execute("DELETE FROM leases WHERE expires_at < ?", (now,))
+            bucket = self._bucket(conn, provider, now)
+            probe = False
+            wait = 0.0
+
+            if bucket['open_until'] > now:
+                return None, bucket['open_until'] - now, True
+            if bucket['open_until']:
+                # Half-open: a single probe call at a time
+                alive = bucket['probe'] and conn.execute(
+                    "SELECT 1 FROM leases WHERE id = ?", (bucket['probe'],)
+                ).fetchone()
+                if alive:
+                    return None, 0.05, True
+                probe = True
+
+            if bucket['blocked_until'] > now:
+                wait = bucket['blocked_until'] - now
+            elif bucket['tokens'] < 1:
+                wait = (1 - bucket['tokens']) / bucket['rate']
+            else:
+                in_flight = conn.execute(
+                    "SELECT COUNT(*) FROM leases WHERE provider = ?", (provider,)
+                ).fetchone()[0]
+                if in_flight >= self.max_concurrency:
+                    wait = 0.02
+
+            lease = None
+            if not wait:
+                lease = str(uuid.uuid4())
+                bucket['tokens'] -= 1
+                conn.execute(
+                    "INSERT INTO leases (id, provider, expires_at) VALUES (?, ?, ?)",
+                    (lease, provider, now + self.lease_seconds)
+                )
+            conn.execute(
+                "UPDATE buckets SET tokens = ?, refilled_at = ?, probe = ? WHERE provider = ?",
+                (bucket['tokens'], now, lease if probe else bucket['probe'], provider)
+            )
+            return lease, wait, False
+
+        return self._transaction(attempt)
+
+    def acquire(self, provider, deadline=None):
+        """Block until a call to provider may start; returns the lease id"""
+        deadline = deadline or time.time() + self.max_wait
+        while True:
+            lease, wait, circuit = self._try_acquire(provider)
+            if lease is not None:
+                return lease
+            if time.time() + wait > deadline:
+                if circuit:
+                    raise CircuitOpen(f'Circuit open for {provider}')
+                raise LimiterTimeout(f'Timed out waiting for a {provider} rate limit slot')
+            # Jitter keeps waiting processes from retrying in lockstep
+            time.sleep(min(wait, 1.0) * random.uniform(1.0, 1.1))
+
+    def release(self, provider, lease, outcome, retry_after=None):
+        """Return the lease and adapt the provider state to the call outcome"""
+        now = time.time()
+
+        def record(conn):
+            conn.execute("DELETE FROM leases WHERE id = ?", (lease,))
+            bucket = self._bucket(conn, provider, now)
+            limit = self.limit(provider)
+            rate = bucket['rate']
+            blocked_until = bucket['blocked_until']
+            failures = bucket['failures']
+            open_until = bucket['open_until']
+            throttled = 0
+
+            if outcome == SUCCESS:
+                # About rate successes happen per second, so this recovers
+                # recovery * limit per second
+                rate = min(limit, rate + limit * self.recovery / max(rate, 1.0))
+                failures = 0
+                open_until = 0.0
+            elif outcome == RATE_LIMITED:
+                rate = max(limit * 0.05, rate * self.backoff_factor)
+                # Drop the burst so the lower rate applies at once
+                bucket['tokens'] = min(bucket['tokens'], 0.0)
+                if retry_after:
+                    blocked_until = max(blocked_until, now + retry_after)
+                throttled = 1
+            elif outcome == TRANSIENT:
+                failures += 1
+                if bucket['probe'] == lease or failures >= self.failure_threshold:
+                    open_until = now + self.cooldown
+
+            conn.execute(
+                "UPDATE buckets SET rate = ?, tokens = ?, refilled_at = ?, blocked_until = ?, "
+                "failures = ?, open_until = ?, probe = NULL, throttled = throttled + ? "
+                "WHERE provider = ?",
+                (rate, bucket['tokens'], now, blocked_until, failures, open_until, throttled, provider)
+            )
+
+        self._transaction(record)
+
+    def _release_late(self, provider, lease, outcome):
+        """Release the lease of a timed-out call once its thread returns"""
+        try:
+            self.release(provider, lease, outcome)
+        except sqlite3.ProgrammingError:
+            # The limiter was closed meanwhile; the lease expires on its own
+            pass
+
+    def _run(self, fn, timeout):
+        if not timeout:
+            return fn()
+        from concurrent.futures import ThreadPoolExecutor
+        from concurrent.futures import TimeoutError as FutureTimeout
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                               thread_name_prefix='llm-call')
+        future = self.executor.submit(fn)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise CallTimeout(f'LLM call timed out after {timeout:g}s', future)
+
+    def call(self, provider, fn, timeout=None):
+        """
+        Run fn() under the provider's limits. Transient errors are retried
+        with jittered exponential backoff up to max_attempts times; 429s are
+        retried until max_wait, waiting in acquire for the lowered rate.
+        timeout bounds each attempt and defaults to call_timeout; attempts are
+        also cut to the time left before max_wait, so the whole call, waits
+        and backoff included, ends within max_wait seconds. A timed-out
+        attempt keeps its lease until its thread returns (or the lease
+        expires), so abandoned calls still count against max_concurrency.
+        """
+        timeout = timeout or self.call_timeout
+        deadline = time.time() + self.max_wait
+        attempt = 0
+        while True:
+            lease = self.acquire(provider, deadline)
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                self.release(provider, lease, None)
+                raise LimiterTimeout(f'No time left for a {provider} call within {self.max_wait}s')
+            try:
+                result = self._run(fn, min(timeout, remaining) if timeout else remaining)
+            except Exception as e:
+                outcome, retry_after = classify_error(e)
+                if isinstance(e, CallTimeout):
+                    e.future.add_done_callback(
+                        lambda _, lease=lease: self._release_late(provider, lease, outcome))
+                else:
+                    self.release(provider, lease, outcome, retry_after)
+                if outcome == FATAL:
+                    raise
+                if outcome == TRANSIENT:
+                    attempt += 1
+                    # Full jitter; give up now rather than sleep past the deadline
+                    backoff = random.uniform(0, min(self.retry_max, self.retry_base * 2 ** attempt))
+                    if attempt >= self.max_attempts or backoff >= deadline - time.time():
+                        raise
+                    time.sleep(backoff)
+                continue
+            self.release(provider, lease, SUCCESS)
+            return result
+
+    def stats(self):
+        now = time.time()
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT provider, rate, blocked_until, failures, open_until, throttled FROM buckets"
+            ).fetchall()
+            leases = dict(self.conn.execute(
+                "SELECT provider, COUNT(*) FROM leases WHERE expires_at >= ? GROUP BY provider", (now,)
+            ).fetchall())
+        return {
+            provider: {
+                'limit': self.limit(provider),
+                'rate': round(rate, 3),
+                'inFlight': leases.get(provider, 0),
+                'blockedFor': round(max(blocked_until - now, 0), 3),
+                'failures': failures,
+                'circuit': 'open' if open_until > now else 'half-open' if open_until else 'closed',
+                'throttled': throttled
+            }
+            for provider, rate, blocked_until, failures, open_until, throttled in rows
+        }
+
+    def reset(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM buckets")
+            self.conn.execute("DELETE FROM leases")
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+        self.conn.close()
+
+def parse_limits(value):
+    """Parse "openai=10,anthropic=4" into {provider: requests per second}"""
+    limits = {}
+    for part in (value or '').split(','):
+        if '=' in part:
+            provider, rate = part.split('=', 1)
+            limits[provider.strip()] = float(rate)
+    return limits
+
+def limiter_from_env():
+    """
+    Build the limiter from AI_CHECKER_LIMITS_PATH, AI_CHECKER_RATE_LIMIT
+    (default requests/sec), AI_CHECKER_RATE_LIMITS (per provider),
+    AI_CHECKER_MAX_CONCURRENCY, AI_CHECKER_MAX_RETRIES, AI_CHECKER_LLM_TIMEOUT,
+    AI_CHECKER_LIMIT_MAX_WAIT, AI_CHECKER_CIRCUIT_THRESHOLD and
+    AI_CHECKER_CIRCUIT_COOLDOWN. The defaults keep a call, including waits
+    and retries, inside the worker pool's 60s AI_CHECKER_TIMEOUT_MS.
+    """
+    env = os.environ.get
+    return RateLimiter(
+        env('AI_CHECKER_LIMITS_PATH'),
+        limits=parse_limits(env('AI_CHECKER_RATE_LIMITS')),
+        default_rate=float(env('AI_CHECKER_RATE_LIMIT', '5')),
+        max_concurrency=int(env('AI_CHECKER_MAX_CONCURRENCY', '16')),
+        max_attempts=int(env('AI_CHECKER_MAX_RETRIES', '5')) + 1,
+        call_timeout=float(env('AI_CHECKER_LLM_TIMEOUT', '30')) or None,
+        max_wait=float(env('AI_CHECKER_LIMIT_MAX_WAIT', '45')),
+        failure_threshold=int(env('AI_CHECKER_CIRCUIT_THRESHOLD', '5')),
+        cooldown=float(env('AI_CHECKER_CIRCUIT_COOLDOWN', '30')),
+    )
+
+if __name__ == '__main__':
+    limiter = limiter_from_env()
+    if len(sys.argv) > 1 and sys.argv[1] == 'reset':
+        limiter.reset()
+    print(json.dumps(limiter.stats()))
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Bulk reanalysis of stored visibility checks
+Re-runs the analysis step of check_visibility over stored answers with the
+current brand, competitors and aliases, without querying the LLM again
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from analyzer import ResponseAnalyzer
+from blob_store import BlobStore
+from checks_io import (
+    LocalCheckStore, JsonlWriter, iter_checks, iter_chunks, read_project, source_kind
+)
+
+UPDATED_COLUMNS = [
+    'presence', 'position', 'citationsCount', 'observedUrls', 'competitorsMentioned'
+]
+
+_analyzer = None
+_blob_store = None
+_use_snippets = False
+
+def _init_worker(brand, competitors, brand_aliases, competitor_aliases, blob_dir, snippets):
+    # Each worker process compiles the project's pattern exactly once
+    global _analyzer, _blob_store, _use_snippets
+    _analyzer = ResponseAnalyzer(brand, competitors, brand_aliases, competitor_aliases)
+    _blob_store = BlobStore(blob_dir) if blob_dir else None
+    _use_snippets = snippets
+
+def _stored_answer(check):
+    # The full answer from the blob store; the 500-char snippet misses
+    # mentions past its end, so it is only used when asked for
+    digest = check.get('answerHash')
+    if _blob_store is not None and digest and _blob_store.exists(digest):
+        return _blob_store.get(digest)
+    if _use_snippets:
+        return check.get('answerSnippet') or ''
+    return None
+
+def reanalyze_chunk(checks):
+    """
+    Recompute the analysis columns for a chunk of stored checks. Returns the
+    rows in order and, per row, whether it was reanalyzed; rows without a
+    usable answer come back unchanged.
+    """
+    updated = []
+    reanalyzed = []
+    for check in checks:
+        answer = _stored_answer(check)
+        reanalyzed.append(answer is not None)
+        if answer is None:
+            updated.append(check)
+            continue
+        result = _analyzer.analyze(answer)
+        updated.append({
+            **check,
+            'presence': result['presence'],
+            'position': result['position'],
+            'citationsCount': result['citations_count'],
+            'observedUrls': result['observed_urls'],
+            'competitorsMentioned': result['competitors_mentioned']
+        })
+    return updated, reanalyzed
+
+def reanalyze(source, brand, competitors, brand_aliases=(), competitor_aliases=None,
+              output=None, workers=None, chunk_size=1000, blob_dir=None, progress=None,
+              snippets=False):
+    """
+    Stream checks from source through a process pool and write them back.
+
+    SQLite sources are updated in place unless an output path is given;
+    other sources need an output JSONL path. Checks are reanalyzed from the
+    full answer their answerHash points to in blob_dir. Checks without one
+    are skipped (left as they are, and still copied to an output) unless
+    snippets is set, which reanalyzes their truncated answerSnippet. At most
+    two chunks per worker are in flight, so memory stays bounded for any
+    input size. Returns (records reanalyzed, records skipped, elapsed seconds).
+    """
+    workers = workers or os.cpu_count() or 1
+    if output is None and source_kind(source) != 'sqlite':
+        raise ValueError('An output path is required unless the source is a SQLite store')
+
+    if output is None:
+        store = LocalCheckStore(source)
+        write = lambda rows: store.update_checks(rows, UPDATED_COLUMNS)
+        close = store.close
+        # Skipped rows are unchanged, so there is nothing to write back
+        keep_skipped = False
+    elif source_kind(output) == 'sqlite':
+        store = LocalCheckStore(output)
+        write = store.insert_checks
+        close = store.close
+        keep_skipped = True
+    else:
+        writer = JsonlWriter(output)
+        write = writer.write_rows
+        close = writer.close
+        keep_skipped = True
+
+    total = 0
+    skipped = 0
+    started = time.perf_counter()
+    initargs = (brand, list(competitors), list(brand_aliases), competitor_aliases or {}, blob_dir,
+                snippets)
+    try:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=initargs) as pool:
+            in_flight = set()
+            chunks = iter_chunks(iter_checks(source), chunk_size)
+            exhausted = False
+
+            while in_flight or not exhausted:
+                while not exhausted and len(in_flight) < workers * 2:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        exhausted = True
+                    else:
+                        in_flight.add(pool.submit(reanalyze_chunk, chunk))
+
+                if not in_flight:
+                    break
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    rows, reanalyzed = future.result()
+                    count = sum(reanalyzed)
+                    if not keep_skipped:
+                        rows = [row for row, fresh in zip(rows, reanalyzed) if fresh]
+                    write(rows)
+                    total += count
+                    skipped += len(reanalyzed) - count
+                    if progress:
+                        progress(total, time.perf_counter() - started)
+    finally:
+        close()
+
+    return total, skipped, time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description='Reanalyze stored visibility checks')
+    parser.add_argument('source', help='seed_data.json, a .jsonl export or a .db SQLite store')
+    parser.add_argument('--output', help='Output .jsonl or .db (default: update a .db source in place)')
+    parser.add_argument('--brand', help='Brand name (default: the project brand in seed_data.json)')
+    parser.add_argument('--competitor', action='append', default=None,
+                        help='Competitor name, repeatable (default: the project competitors)')
+    parser.add_argument('--brand-alias', action='append', default=[], help='Brand alias, repeatable')
+    parser.add_argument('--competitor-alias', action='append', default=[],
+                        metavar='NAME=ALIAS', help='Competitor alias, repeatable')
+    parser.add_argument('--blob-dir', default=os.environ.get('AI_CHECKER_BLOB_DIR'),
+                        help='Blob store with full answers (default: $AI_CHECKER_BLOB_DIR)')
+    parser.add_argument('--snippets', action='store_true',
+                        help='Reanalyze the 500-char answerSnippet of checks without a stored '
+                             'full answer instead of skipping them')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    project = read_project(args.source) or {}
+    brand = args.brand or project.get('brand')
+    competitors = args.competitor if args.competitor is not None else project.get('competitors', [])
+    if not brand:
+        parser.error('--brand is required when the source has no project block')
+
+    competitor_aliases = {}
+    for pair in args.competitor_alias:
+        name, _, alias = pair.partition('=')
+        competitor_aliases.setdefault(name, []).append(alias)
+
+    def progress(total, elapsed):
+        print(f"\r🔁 {total} checks reanalyzed ({total / elapsed:,.0f} records/sec)",
+              end='', file=sys.stderr)
+
+    total, skipped, elapsed = reanalyze(
+        args.source, brand, competitors, args.brand_alias, competitor_aliases,
+        output=args.output, workers=args.workers, chunk_size=args.chunk_size,
+        blob_dir=args.blob_dir, progress=progress, snippets=args.snippets
+    )
+    rate = total / elapsed if elapsed > 0 else 0
+    print(file=sys.stderr)
+    print(f"✅ Reanalyzed {total} checks in {elapsed:.2f}s ({rate:,.0f} records/sec)")
+    if skipped:
+        print(f"⏭️  Skipped {skipped} checks without a stored full answer "
+              f"(set --blob-dir, or pass --snippets to reanalyze their snippets)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+On-disk LLM response cache for the AI checker
+Answers are stored in SQLite keyed by model + system prompt + keyword, so
+every ai_checker.py process (spawned, worker or batch) shares the same cache
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+  key TEXT PRIMARY KEY,
+  answer TEXT NOT NULL,
+  created_at REAL NOT NULL,
+  accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at);
+CREATE TABLE IF NOT EXISTS counters (
+  name TEXT PRIMARY KEY,
+  value INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+def cache_key(key):
+    """Hash a query key tuple into a stable cache key"""
+    return hashlib.sha256(json.dumps(list(key)).encode('utf-8')).hexdigest()
+
+class ResponseCache:
+    """
+    SQLite-backed answer cache with a TTL and an LRU size cap.
+
+    Entries older than ttl seconds are treated as misses and removed. When
+    more than max_entries are stored, the least recently read ones are
+    evicted. Hit/miss counters live in the database so they aggregate
+    across processes.
+    """
+
+    def __init__(self, path, ttl=3600, max_entries=10000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False,
+                                    isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def _count(self, name):
+        self.conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,)
+        )
+
+    def get(self, key):
+        """Return the cached answer for a query key, or None on a miss"""
+        digest = cache_key(key)
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT answer, created_at FROM responses WHERE key = ?", (digest,)
+            ).fetchone()
+
+            if row is None:
+                self._count('misses')
+                return None
+
+            answer, created_at = row
+            if now - created_at > self.ttl:
+                self.conn.execute("DELETE FROM responses WHERE key = ?", (digest,))
+                self._count('misses')
+                return None
+
+            self.conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, digest)
+            )
+            self._count('hits')
+            return answer
+
+    def set(self, key, answer):
+        """Store an answer and evict least recently used entries over the cap"""
+        digest = cache_key(key)
+        now = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, answer, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (digest, answer, now, now)
+                )
+                self.conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    "SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def stats(self):
+        """Return hit/miss counters and the current entry count"""
+        with self.lock:
+            counters = dict(self.conn.execute("SELECT name, value FROM counters"))
+            entries = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {
+            'hits': counters.get('hits', 0),
+            'misses': counters.get('misses', 0),
+            'entries': entries
+        }
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM responses")
+            self.conn.execute("DELETE FROM counters")
+
+    def close(self):
+        self.conn.close()
+
+def cache_from_env():
+    """
+    Build the cache from AI_CHECKER_CACHE_PATH, AI_CHECKER_CACHE_TTL and
+    AI_CHECKER_CACHE_MAX_ENTRIES. Returns None when caching is disabled.
+    """
+    path = os.environ.get('AI_CHECKER_CACHE_PATH')
+    if not path:
+        return None
+    return ResponseCache(
+        path,
+        ttl=float(os.environ.get('AI_CHECKER_CACHE_TTL', '3600')),
+        max_entries=int(os.environ.get('AI_CHECKER_CACHE_MAX_ENTRIES', '10000'))
+    )
+
+if __name__ == '__main__':
+    cache = cache_from_env()
+    if cache is None:
+        print(json.dumps({'error': 'AI_CHECKER_CACHE_PATH is not set'}), file=sys.stderr)
+        sys.exit(1)
+
+    if len(sys.argv) > 1 and sys.argv[1] == 'clear':
+        cache.clear()
+    print(json.dumps(cache.stats()))
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Backfill the visibility_daily_rollup table from existing checks
+Aggregates checks into (projectId, day, engine, keyword) counters and upserts
+them into Supabase, or writes them to a JSONL file
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+from batch_writer import BatchWriter
+from checks_io import JsonlWriter, iter_checks
+
+ROLLUP_TABLE = 'visibility_daily_rollup'
+ROLLUP_KEY = ('projectId', 'day', 'engine', 'keyword')
+ROLLUP_SOURCE_COLUMNS = 'id,projectId,engine,keyword,presence,position,citationsCount,timestamp'
+
+def check_day(timestamp):
+    """UTC calendar day of a check timestamp, matching the SQL trigger"""
+    moment = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return moment.date().isoformat()
+
+def compute_rollups(checks):
+    """Aggregate checks into rollup rows keyed by project, day, engine and keyword"""
+    rollups = {}
+    for check in checks:
+        key = (check['projectId'], check_day(check['timestamp']), check['engine'], check['keyword'])
+        row = rollups.get(key)
+        if row is None:
+            row = rollups[key] = {
+                **dict(zip(ROLLUP_KEY, key)),
+                'total': 0, 'present': 0, 'positionSum': 0, 'positionCount': 0, 'citations': 0
+            }
+
+        row['total'] += 1
+        if check.get('presence'):
+            row['present'] += 1
+        if check.get('position') is not None:
+            row['positionSum'] += check['position']
+            row['positionCount'] += 1
+        row['citations'] += check.get('citationsCount') or 0
+    return rollups
+
+def iter_supabase_checks(client, project_id=None, page_size=1000):
+    """Page through visibility_checks, fetching only the rollup columns"""
+    offset = 0
+    while True:
+        query = client.table('visibility_checks').select(ROLLUP_SOURCE_COLUMNS)
+        if project_id:
+            query = query.eq('projectId', project_id)
+        rows = query.order('id').range(offset, offset + page_size - 1).execute().data
+        yield from rows
+        if len(rows) < page_size:
+            break
+        offset += page_size
+
+def supabase_upsert(client, table=ROLLUP_TABLE):
+    """Insert function for BatchWriter that replaces existing rollup rows"""
+    def upsert(rows):
+        client.table(table).upsert(rows, on_conflict=','.join(ROLLUP_KEY)).execute()
+    return upsert
+
+def _supabase_client():
+    url = os.environ.get('NEXT_PUBLIC_SUPABASE_URL')
+    key = os.environ.get('SUPABASE_SERVICE_ROLE_KEY') or os.environ.get('NEXT_PUBLIC_SUPABASE_ANON_KEY')
+    if not url or not key:
+        print("❌ Error: Supabase credentials not found in environment")
+        sys.exit(1)
+
+    from supabase import create_client
+    return create_client(url, key)
+
+def main():
+    parser = argparse.ArgumentParser(description='Backfill visibility_daily_rollup')
+    parser.add_argument('source', nargs='?',
+                        help='seed_data.json, .jsonl or .db source (default: read visibility_checks from Supabase)')
+    parser.add_argument('--project', help='Only roll up this projectId')
+    parser.add_argument('--output', help='Write rollup rows to this JSONL file instead of Supabase')
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    client = None
+    if args.source is None or args.output is None:
+        client = _supabase_client()
+
+    if args.source:
+        checks = iter_checks(args.source)
+        if args.project:
+            checks = (c for c in checks if c['projectId'] == args.project)
+    else:
+        checks = iter_supabase_checks(client, args.project)
+
+    started = time.perf_counter()
+    rollups = compute_rollups(checks)
+
+    if args.output:
+        writer = JsonlWriter(args.output)
+        writer.write_rows(list(rollups.values()))
+        writer.close()
+        failures = []
+    else:
+        with BatchWriter(supabase_upsert(client), args.batch_size) as writer:
+            writer.add_many(rollups.values())
+        failures = writer.failures
+
+    for failure in failures:
+        print(f"❌ {json.dumps(failure['row'])}: {failure['error']}", file=sys.stderr)
+    print(f"✅ Wrote {len(rollups) - len(failures)} rollup rows in {time.perf_counter() - started:.2f}s")
+
+if __name__ == '__main__':
+    main()
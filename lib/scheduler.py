@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Incremental check scheduler
+Plans which keyword/engine pairs a run should check from their history:
+pairs whose results keep changing are due often, stable ones rarely and
+never-checked ones first, within each project's daily budget of LLM calls
+
+Usage:
+  scheduler.py < request.json                 # {"project": {...}, "engines": [...], "history": [...]}
+  scheduler.py seed_data.json --now 2025-01-15T09:00:00   # preview a plan for the seed project
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+from checks_io import iter_checks, parse_timestamp, read_project
+
+DEFAULT_ENGINES = ['ChatGPT', 'Perplexity', 'Gemini', 'Claude']
+
+# Shortest and longest gap between two checks of a pair
+MIN_INTERVAL_HOURS = float(os.environ.get('CHECKS_MIN_INTERVAL_HOURS', '24'))
+MAX_INTERVAL_HOURS = float(os.environ.get('CHECKS_MAX_INTERVAL_HOURS', str(14 * 24)))
+# Position moves up to this many words are not counted as a change
+POSITION_TOLERANCE = int(os.environ.get('CHECKS_POSITION_TOLERANCE', '5'))
+# LLM calls per project per UTC day; 0 means unlimited
+DEFAULT_DAILY_BUDGET = int(os.environ.get('CHECKS_DAILY_BUDGET', '0'))
+
+def changed(previous, current):
+    """Whether a check's outcome differs from the one before it"""
+    if bool(previous.get('presence')) != bool(current.get('presence')):
+        return True
+    if previous.get('position') is None or current.get('position') is None:
+        return False
+    return abs(previous['position'] - current['position']) > POSITION_TOLERANCE
+
+class PairStats:
+    """Check history of one keyword/engine pair"""
+
+    __slots__ = ('checks', 'changes', 'last_checked', 'last_check')
+
+    def __init__(self):
+        self.checks = 0
+        self.changes = 0
+        self.last_checked = None
+        self.last_check = None
+
+    def add(self, check, moment):
+        if self.last_check is not None and changed(self.last_check, check):
+            self.changes += 1
+        self.checks += 1
+        self.last_checked = moment
+        self.last_check = check
+
+    @property
+    def change_rate(self):
+        # Smoothed so a pair with a short history is not taken to be stable
+        return (self.changes + 1) / (max(self.checks - 1, 0) + 2)
+
+    def interval_hours(self):
+        """Hours until the pair is due again; inversely proportional to its change rate"""
+        hours = MIN_INTERVAL_HOURS / self.change_rate
+        return min(max(hours, MIN_INTERVAL_HOURS), MAX_INTERVAL_HOURS)
+
+def pair_stats(dated, keywords, engines):
+    """PairStats per (keyword, engine) of the project from time-sorted (moment, check) pairs"""
+    stats = {(keyword, engine): PairStats() for keyword in keywords for engine in engines}
+    for moment, check in dated:
+        pair = stats.get((check['keyword'], check['engine']))
+        if pair is not None:
+            pair.add(check, moment)
+    return stats
+
+def plan_run(project, history, engines=None, now=None, budget=None):
+    """
+    Choose the pairs to check now.
+
+    A pair is due once interval_hours have passed since its last check.
+    Due pairs are ranked never-checked first, then by how overdue they are
+    weighted by change rate, and cut at the remaining daily budget. Each
+    engine check counts as one call; engines backed by the same model share
+    a call, so actual spend can be lower.
+    """
+    engines = engines or DEFAULT_ENGINES
+    now = now or datetime.now(timezone.utc)
+    keywords = list(dict.fromkeys(project.get('keywords') or []))
+
+    dated = [(parse_timestamp(check['timestamp']), check) for check in history]
+    dated = sorted((item for item in dated if item[0] <= now), key=lambda item: item[0])
+
+    if budget is None:
+        budget = project.get('dailyCheckBudget') or DEFAULT_DAILY_BUDGET
+    # Budgets are per UTC day
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    spent = sum(1 for moment, _ in dated if moment >= midnight)
+    remaining = max(budget - spent, 0) if budget else None
+
+    due = []
+    not_due = 0
+    next_due = None
+    for (keyword, engine), stats in pair_stats(dated, keywords, engines).items():
+        if stats.last_checked is None:
+            due.append((float('inf'), keyword, engine, stats, None))
+            continue
+
+        interval = stats.interval_hours()
+        elapsed = (now - stats.last_checked).total_seconds() / 3600
+        if elapsed >= interval:
+            due.append((elapsed / interval * stats.change_rate, keyword, engine, stats, interval))
+        else:
+            not_due += 1
+            due_at = stats.last_checked + timedelta(hours=interval)
+            next_due = due_at if next_due is None else min(next_due, due_at)
+
+    due.sort(key=lambda item: item[0], reverse=True)
+    selected = due if remaining is None else due[:remaining]
+
+    by_keyword = {}
+    pairs = []
+    for priority, keyword, engine, stats, interval in selected:
+        by_keyword.setdefault(keyword, []).append(engine)
+        pairs.append({
+            'keyword': keyword,
+            'engine': engine,
+            'reason': 'new' if stats.last_checked is None else 'due',
+            'changeRate': round(stats.change_rate, 3),
+            'intervalHours': round(interval, 1) if interval is not None else None,
+            'lastChecked': stats.last_checked.isoformat() if stats.last_checked else None
+        })
+
+    # Say why a run came out empty, since callers otherwise only see planned == 0
+    reason = None
+    if not selected:
+        if not keywords:
+            reason = 'The project has no keywords'
+        elif due:
+            reason = f'The daily check budget ({budget}) is spent'
+        elif next_due is not None:
+            reason = f'No keyword/engine pair is due before {next_due.isoformat()}'
+        else:
+            reason = 'No keyword/engine pair is due'
+
+    return {
+        'projectId': project.get('id'),
+        'plannedAt': now.isoformat(),
+        # Keyword order follows the project so runs stay predictable
+        'keywords': [
+            {'keyword': keyword, 'engines': [e for e in engines if e in by_keyword[keyword]]}
+            for keyword in keywords if keyword in by_keyword
+        ],
+        'pairs': pairs,
+        'planned': len(selected),
+        'due': len(due),
+        'notDue': not_due,
+        'overBudget': len(due) - len(selected),
+        'budget': {'daily': budget or None, 'spent': spent, 'remaining': remaining},
+        'nextDueAt': next_due.isoformat() if next_due else None,
+        'reason': reason
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Plan an incremental visibility check run')
+    parser.add_argument('source', nargs='?',
+                        help='seed_data.json to plan for (default: JSON request on stdin)')
+    parser.add_argument('--budget', type=int, help='Override the daily budget of LLM calls')
+    parser.add_argument('--now', type=parse_timestamp, help='Plan as of this ISO timestamp')
+    args = parser.parse_args()
+
+    if args.source is None:
+        request = json.load(sys.stdin)
+        now = parse_timestamp(request['now']) if request.get('now') else args.now
+        plan = plan_run(request['project'], request.get('history') or [],
+                        request.get('engines'), now, request.get('budget', args.budget))
+        print(json.dumps(plan))
+        return
+
+    project = read_project(args.source)
+    if project is None:
+        print("❌ Error: the source has no project block; pass a seed_data.json file")
+        sys.exit(1)
+
+    history = (c for c in iter_checks(args.source) if c['projectId'] == project['id'])
+    plan = plan_run(project, history, now=args.now, budget=args.budget)
+    print(json.dumps(plan, indent=2))
+    print(f"📅 {plan['planned']} checks planned, {plan['due']} due, {plan['notDue']} not due, "
+          f"{plan['overBudget']} over budget", file=sys.stderr)
+    if plan['reason']:
+        print(f"💤 {plan['reason']}", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
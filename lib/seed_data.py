@@ -1,14 +1,48 @@
 #!/usr/bin/env python3
 """
 Seed data generator for AEO Tracker
-Generates 14 days of realistic visibility check data for demo project
+Generates 14 days of realistic visibility check data for demo project, or
+millions of synthetic checks for N projects, M keywords and D days for load
+testing (NumPy-vectorized, streamed to JSONL or a Parquet dataset)
+
+Usage:
+  python3 lib/seed_data.py                     # demo project -> seed_data.json
+  python3 lib/seed_data.py --projects 50 --keywords 200 --days 90 --seed 7 --output load.jsonl
+  python3 lib/seed_data.py --projects 50 --days 365 --format parquet --output load_checks/
 """
 
+import argparse
 import json
-from datetime import datetime, timedelta
+import sys
+import time
+from datetime import date, datetime, timedelta
 import random
 import uuid
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+ENGINES = ['ChatGPT', 'Perplexity', 'Gemini', 'Claude']
+
+# Visibility boosts used by both generators
+ENGINE_BOOST = {'ChatGPT': 0.2, 'Perplexity': 0.15}
+KEYWORD_BOOST_TERMS = ('best', 'premium')
+KEYWORD_BOOST = 0.15
+
+KEYWORD_MODIFIERS = [
+    'best', 'affordable', 'premium', 'custom', 'eco-friendly', 'smart', 'commercial',
+    'industrial', 'innovative', 'wholesale', 'durable', 'compact'
+]
+KEYWORD_TOPICS = [
+    'widgets', 'widgets for home', 'widget supplier', 'widget manufacturer',
+    'widgets online store', 'widget installation service', 'widgets for small business',
+    'widget accessories', 'widget repair services', 'widget designs'
+]
+BRAND_PREFIXES = ['Acme', 'Globex', 'Initech', 'Umbrella', 'Stark', 'Wayne', 'Hooli', 'Vandelay']
+BRAND_SUFFIXES = ['Widgets', 'Widget Works', 'Widget Co', 'Widget Labs']
+
 def generate_seed_data():
     # Sample project
     project = {
@@ -49,15 +83,12 @@ def generate_seed_data():
                 # Higher visibility for some keywords/engines
                 base_visibility = random.random()
                 
-                # ChatGPT tends to have better visibility in this simulation
-                if engine == 'ChatGPT':
-                    base_visibility += 0.2
-                elif engine == 'Perplexity':
-                    base_visibility += 0.15
+                # ChatGPT and Perplexity tend to have better visibility in this simulation
+                base_visibility += ENGINE_BOOST.get(engine, 0.0)
                 
                 # Some keywords perform better
-                if 'best' in keyword or 'premium' in keyword:
-                    base_visibility += 0.15
+                if any(term in keyword for term in KEYWORD_BOOST_TERMS):
+                    base_visibility += KEYWORD_BOOST
                 
                 presence = base_visibility > 0.5
                 
@@ -118,7 +149,302 @@ def generate_seed_data():
         'checks': checks
     }
 
-if __name__ == '__main__':
+def synthetic_keywords(count):
+    """count distinct keywords built from modifier/topic pairs"""
+    keywords = []
+    for round_number in range(count // (len(KEYWORD_MODIFIERS) * len(KEYWORD_TOPICS)) + 1):
+        for topic in KEYWORD_TOPICS:
+            for modifier in KEYWORD_MODIFIERS:
+                keyword = f'{modifier} {topic}'
+                keywords.append(f'{keyword} {round_number + 1}' if round_number else keyword)
+    return keywords[:count]
+
+def random_uuids(rng, count):
+    """Version 4 UUID strings drawn from rng, so ids are reproducible for a seed"""
+    return _format_uuids(rng.integers(0, 256, size=(count, 16), dtype=np.uint8))
+
+def _format_uuids(raw):
+    """Version 4 UUID strings from a (count, 16) uint8 array of random bytes"""
+    count = len(raw)
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+    h = raw.tobytes().hex()
+    return [f'{h[i:i + 8]}-{h[i + 8:i + 12]}-{h[i + 12:i + 16]}-{h[i + 16:i + 20]}-{h[i + 20:i + 32]}'
+            for i in range(0, 32 * count, 32)]
+
+def synthetic_projects(count, keywords_per_project, rng, competitors_per_project=2):
+    """Project dicts with generated brands, competitors and keywords"""
+    brands = [f'{prefix} {suffix}' for suffix in BRAND_SUFFIXES for prefix in BRAND_PREFIXES]
+    keywords = synthetic_keywords(keywords_per_project)
+    projects = []
+    for index, project_id in enumerate(random_uuids(rng, count)):
+        brand = brands[index % len(brands)]
+        if index >= len(brands):
+            brand = f'{brand} {index // len(brands) + 1}'
+        others = [b for b in brands if b != brands[index % len(brands)]]
+        picks = rng.choice(len(others), size=min(competitors_per_project, len(others)), replace=False)
+        projects.append({
+            'id': project_id,
+            'name': brand,
+            'domain': brand.lower().replace(' ', '') + '.com',
+            'brand': brand,
+            'competitors': [others[i] for i in picks],
+            'keywords': list(keywords)
+        })
+    return projects
+
+def _snippet_table(project):
+    """
+    Answer snippets for every (keyword, presence, competitor subset), indexed
+    by (keyword * 2 + presence) << len(competitors) | subset bitmask
+    """
+    competitors = project['competitors']
+    snippets = []
+    for keyword in project['keywords']:
+        for presence in (False, True):
+            for mask in range(1 << len(competitors)):
+                snippet = f"When looking for {keyword}, "
+                if presence:
+                    snippet += f"{project['brand']} is a leading provider offering quality solutions. "
+                else:
+                    snippet += "there are several options available in the market. "
+                mentioned = [c for bit, c in enumerate(competitors) if mask >> bit & 1]
+                if mentioned:
+                    snippet += f"Other notable providers include {', '.join(mentioned)}. "
+                snippet += "Consider factors like quality, price, and customer service when making your decision."
+                snippets.append(snippet)
+    return np.array(snippets, dtype=object)
+
+def _row_draws(key, start, count, per_row):
+    """
+    per_row raw 64-bit draws for each of rows start..start+count of a Philox
+    stream. Philox is counter-based, so it jumps straight to the first row and
+    a row gets the same values however the grid is chunked.
+    """
+    first = start * per_row
+    bit_generator = np.random.Philox(key=key)
+    # Each counter step yields four draws
+    bit_generator.advance(first // 4)
+    skip = first % 4
+    return bit_generator.random_raw(skip + count * per_row)[skip:].reshape(count, per_row)
+
+def _uniform(draws):
+    """Doubles in [0, 1) from raw 64-bit draws"""
+    return (draws >> np.uint64(11)) * (1.0 / (1 << 53))
+
+def sample_check_columns(project, days, end, keys, start, stop, snippets=None):
+    """
+    Columns for rows start..stop of a project's day x keyword x engine grid.
+
+    Every row takes a fixed number of uniforms from the project's value
+    stream (keys[0]) and two draws from its id stream (keys[1]), so output
+    depends on the seed only, not on the chunking. Presence comes from the
+    engine and keyword boosts, then positions, citations, URL counts and a
+    competitor bitmask, which index precomputed snippet and list tables.
+    """
+    keywords = project['keywords']
+    competitors = project['competitors']
+    rows = np.arange(start, stop)
+    count = len(rows)
+
+    engine_index = rows % len(ENGINES)
+    keyword_index = rows // len(ENGINES) % len(keywords)
+    day_index = rows // (len(ENGINES) * len(keywords))
+
+    # Columns: presence, position, citations, URL gate, URL count, mention
+    # gate, second of the hour, then one per competitor
+    u = _uniform(_row_draws(keys[0], start, count, 7 + len(competitors)))
+
+    engine_boost = np.array([ENGINE_BOOST.get(e, 0.0) for e in ENGINES])
+    keyword_boost = np.array([
+        KEYWORD_BOOST if any(term in k for term in KEYWORD_BOOST_TERMS) else 0.0 for k in keywords
+    ])
+    presence = u[:, 0] + engine_boost[engine_index] + keyword_boost[keyword_index] > 0.5
+
+    position = (u[:, 1] * 50).astype(np.int64) + 1
+    citations = np.where(presence, (u[:, 2] * 5).astype(np.int64) + 1, 0)
+    url_count = np.where(presence & (u[:, 3] > 0.3), (u[:, 4] * 3).astype(np.int64), 0)
+
+    mentions = (u[:, 7:] < 0.5) & (u[:, 5] > 0.6)[:, None]
+    competitor_mask = mentions @ (1 << np.arange(len(competitors)))
+
+    anchor = np.datetime64(datetime.combine(end, datetime.min.time()) + timedelta(hours=12), 's')
+    timestamp = (anchor - (days - 1 - day_index) * np.timedelta64(1, 'D')
+                 + (u[:, 6] * 3600).astype(np.int64) * np.timedelta64(1, 's'))
+
+    if snippets is None:
+        snippets = _snippet_table(project)
+    snippet_index = (keyword_index * 2 + presence) << len(competitors) | competitor_mask
+    ids = _row_draws(keys[1], start, count, 2).view(np.uint8).reshape(count, 16)
+    return {
+        'id': _format_uuids(ids),
+        'engine': engine_index,
+        'keyword': keyword_index,
+        'position': position,
+        'presence': presence,
+        'answerSnippet': snippets[snippet_index],
+        'citationsCount': citations,
+        'urlCount': url_count,
+        'competitorMask': competitor_mask,
+        'timestamp': timestamp
+    }
+
+def iter_check_columns(projects, days, end=None, seed=None, chunk_size=100000):
+    """
+    Yield (project, columns) chunks covering every project's full grid.
+    The same seed gives the same checks whatever the chunk_size.
+    """
+    end = end or date.today()
+    streams = np.random.SeedSequence(seed).spawn(len(projects))
+    for project, stream in zip(projects, streams):
+        state = stream.generate_state(4, np.uint64)
+        keys = (state[:2], state[2:])
+        snippets = _snippet_table(project)
+        total = days * len(project['keywords']) * len(ENGINES)
+        for start in range(0, total, chunk_size):
+            yield project, sample_check_columns(project, days, end, keys, start,
+                                                min(start + chunk_size, total), snippets)
+
+def _list_tables(project):
+    domain = project['domain']
+    urls = [f'https://{domain}/products', f'https://{domain}/about']
+    competitors = project['competitors']
+    return (
+        [urls[:n] for n in range(3)],
+        [[c for bit, c in enumerate(competitors) if mask >> bit & 1]
+         for mask in range(1 << len(competitors))]
+    )
+
+def columns_to_checks(project, columns):
+    """Expand a column chunk into check dicts shaped like seed_data.json"""
+    url_lists, competitor_lists = _list_tables(project)
+    keywords = project['keywords']
+    timestamps = np.datetime_as_string(columns['timestamp'], unit='s').tolist()
+    return [
+        {
+            'id': check_id,
+            'projectId': project['id'],
+            'engine': ENGINES[engine],
+            'keyword': keywords[keyword],
+            'position': position if presence else None,
+            'presence': presence,
+            'answerSnippet': snippet,
+            'citationsCount': citations,
+            'observedUrls': url_lists[url_count],
+            'competitorsMentioned': competitor_lists[mask],
+            'timestamp': timestamp
+        }
+        for check_id, engine, keyword, position, presence, snippet, citations, url_count, mask, timestamp
+        in zip(columns['id'], columns['engine'].tolist(), columns['keyword'].tolist(),
+               columns['position'].tolist(), columns['presence'].tolist(),
+               columns['answerSnippet'].tolist(), columns['citationsCount'].tolist(),
+               columns['urlCount'].tolist(), columns['competitorMask'].tolist(), timestamps)
+    ]
+
+def columns_to_record_batch(project, columns, schema):
+    """Build an Arrow record batch straight from a column chunk"""
+    import pyarrow as pa
+
+    url_lists, competitor_lists = _list_tables(project)
+    count = len(columns['id'])
+    timestamp = columns['timestamp'].astype('datetime64[us]')
+    arrays = {
+        'id': pa.array(columns['id'], type=pa.string()),
+        'projectId': pa.array([project['id']] * count, type=pa.string()),
+        'day': pa.array(timestamp.astype('datetime64[D]'), type=pa.date32()),
+        'engine': pa.DictionaryArray.from_arrays(
+            pa.array(columns['engine'], type=pa.int32()), pa.array(ENGINES)),
+        'keyword': pa.DictionaryArray.from_arrays(
+            pa.array(columns['keyword'], type=pa.int32()), pa.array(project['keywords'])),
+        'position': pa.array(columns['position'], type=pa.int32(), mask=~columns['presence']),
+        'presence': pa.array(columns['presence'], type=pa.bool_()),
+        'citationsCount': pa.array(columns['citationsCount'], type=pa.int32()),
+        'observedUrls': pa.array([url_lists[n] for n in columns['urlCount'].tolist()],
+                                 type=pa.list_(pa.string())),
+        'competitorsMentioned': pa.array([competitor_lists[m] for m in columns['competitorMask'].tolist()],
+                                         type=pa.list_(pa.string())),
+        'answerHash': pa.nulls(count, type=pa.string()),
+        'timestamp': pa.array(timestamp, type=pa.timestamp('us', tz='UTC')),
+        'answerSnippet': pa.array(columns['answerSnippet'].tolist(), type=pa.string()),
+    }
+    return pa.RecordBatch.from_arrays([arrays[field.name] for field in schema], schema=schema)
+
+def write_synthetic_checks(projects, days, output, file_format='jsonl', end=None, seed=None,
+                           chunk_size=100000, progress=None):
+    """Stream generated checks to a JSONL file or a Parquet dataset; returns the row count"""
+    total = 0
+    started = time.perf_counter()
+    chunks = iter_check_columns(projects, days, end, seed, chunk_size)
+
+    def report(count):
+        nonlocal total
+        total += count
+        if progress:
+            progress(total, time.perf_counter() - started)
+
+    if file_format == 'parquet':
+        from export_parquet import checks_schema, write_batches
+
+        schema = checks_schema()
+
+        def batches():
+            for project, columns in chunks:
+                yield columns_to_record_batch(project, columns, schema)
+                report(len(columns['id']))
+
+        write_batches(batches(), output, schema, 'parquet', chunk_size)
+    else:
+        from checks_io import JsonlWriter
+
+        writer = JsonlWriter(output)
+        try:
+            for project, columns in chunks:
+                writer.write_rows(columns_to_checks(project, columns))
+                report(len(columns['id']))
+        finally:
+            writer.close()
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate AEO Tracker seed or load-test data')
+    parser.add_argument('--projects', type=int, default=1)
+    parser.add_argument('--keywords', type=int, default=15, help='Keywords per project')
+    parser.add_argument('--days', type=int, default=14)
+    parser.add_argument('--seed', type=int, help='Random seed for reproducible output')
+    parser.add_argument('--end', type=date.fromisoformat, help='Last day (YYYY-MM-DD, default today)')
+    parser.add_argument('--format', choices=['jsonl', 'parquet'], default='jsonl')
+    parser.add_argument('--output', help='JSONL file or Parquet dataset directory')
+    parser.add_argument('--projects-output', help='Also write the project rows to this JSONL file')
+    parser.add_argument('--chunk-size', type=int, default=100000)
+    args = parser.parse_args()
+
+    if args.output is None:
+        write_demo_seed()
+        return
+
+    if np is None:
+        print("❌ Error: numpy is not installed (pip install numpy)")
+        sys.exit(1)
+
+    projects = synthetic_projects(args.projects, args.keywords, np.random.default_rng(args.seed))
+    if args.projects_output:
+        with open(args.projects_output, 'w', encoding='utf-8') as f:
+            f.writelines(json.dumps(project) + '\n' for project in projects)
+
+    def progress(total, elapsed):
+        print(f"\r🌱 {total} checks generated ({total / elapsed:,.0f} rows/sec)", end='', file=sys.stderr)
+
+    started = time.perf_counter()
+    # Separate stream from the project sampling so check data only depends on the seed
+    seed = None if args.seed is None else args.seed + 1
+    total = write_synthetic_checks(projects, args.days, args.output, args.format, args.end,
+                                   seed, args.chunk_size, progress)
+    print(file=sys.stderr)
+    print(f"✅ Generated {total} visibility checks for {len(projects)} projects "
+          f"in {time.perf_counter() - started:.2f}s")
+    print(f"💾 Saved to: {args.output}")
+
+def write_demo_seed():
     seed_data = generate_seed_data()
     print(json.dumps(seed_data, indent=2))
     
@@ -131,3 +457,6 @@ if __name__ == '__main__':
     print(f"🔍 Engines: ChatGPT, Perplexity, Gemini, Claude")
     print(f"📅 Time range: 14 days")
     print(f"💾 Saved to: /app/seed_data.json")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,261 @@
+// Persistent pool of `python3 lib/ai_checker.py --worker` processes, or of
+// workers forked by `ai_checker.py --zygote` when AI_CHECKER_ZYGOTE_SOCKET is set.
+// The same pool runs the single `job_queue.py serve` process behind job status,
+// next to a separate `job_queue.py worker` process that drains the queue.
+import { spawn } from 'child_process'
+import net from 'net'
+import path from 'path'
+
+const DEFAULT_POOL_SIZE = parseInt(process.env.AI_CHECKER_POOL_SIZE || '4')
+const DEFAULT_TIMEOUT_MS = parseInt(process.env.AI_CHECKER_TIMEOUT_MS || '60000')
+const ZYGOTE_SOCKET = process.env.AI_CHECKER_ZYGOTE_SOCKET
+const JOB_QUEUE_TIMEOUT_MS = parseInt(process.env.CHECKS_QUEUE_TIMEOUT_MS || '10000')
+const JOB_QUEUE_WORKERS = parseInt(process.env.CHECKS_QUEUE_WORKERS || '4')
+const JOB_QUEUE_RESTART_MS = 5000
+
+class PythonWorker {
+  constructor(scriptPath, args, onExit, socketPath) {
+    this.pending = new Map()
+    this.buffer = ''
+    this.alive = true
+    this.onExit = onExit
+    this.pid = null
+
+    if (socketPath) {
+      this.connect(socketPath)
+    } else {
+      this.spawn(scriptPath, args)
+    }
+  }
+
+  spawn(scriptPath, args) {
+    this.process = spawn('python3', [scriptPath, ...args], {
+      stdio: ['pipe', 'pipe', 'pipe'],
+      // Lets the worker report its spawn-to-ready time when metrics are on
+      env: { ...process.env, AI_CHECKER_SPAWNED_AT: String(Date.now() / 1000) }
+    })
+
+    this.pid = this.process.pid
+    this.input = this.process.stdin
+    this.process.stdout.on('data', (data) => this.handleData(data))
+
+    this.process.stderr.on('data', (data) => {
+      console.error(`[${path.basename(scriptPath, '.py')} ${this.process.pid}] ${data.toString().trimEnd()}`)
+    })
+
+    this.process.on('error', (err) => this.shutdown(err))
+    this.process.on('exit', (code, signal) => {
+      this.shutdown(new Error(`Python worker exited (code ${code}, signal ${signal})`))
+    })
+  }
+
+  // The zygote forks an already-imported worker for each connection; its
+  // stderr goes to the zygote's and its pid arrives with the ready line
+  connect(socketPath) {
+    this.socket = net.createConnection(socketPath)
+    this.input = this.socket
+    this.socket.on('data', (data) => this.handleData(data))
+    this.socket.on('error', (err) => this.shutdown(err))
+    this.socket.on('close', () => {
+      this.shutdown(new Error('Python worker connection closed'))
+    })
+  }
+
+  kill() {
+    if (this.process) {
+      this.process.kill('SIGKILL')
+      return
+    }
+    if (this.pid) {
+      try {
+        process.kill(this.pid, 'SIGKILL')
+      } catch (e) {
+        // Already gone
+      }
+    }
+    this.socket.destroy()
+  }
+
+  handleData(data) {
+    this.buffer += data.toString()
+    let newline = this.buffer.indexOf('\n')
+
+    while (newline !== -1) {
+      const line = this.buffer.slice(0, newline).trim()
+      this.buffer = this.buffer.slice(newline + 1)
+      newline = this.buffer.indexOf('\n')
+      if (!line) continue
+
+      let message
+      try {
+        message = JSON.parse(line)
+      } catch (e) {
+        console.error(`Failed to parse Python worker output: ${line}`)
+        continue
+      }
+
+      if (message.ready) {
+        this.pid = message.pid
+        continue
+      }
+
+      const entry = this.pending.get(message.id)
+      if (!entry) continue
+      this.pending.delete(message.id)
+      clearTimeout(entry.timer)
+
+      if (message.error) {
+        entry.reject(new Error(`Python worker failed: ${message.error}`))
+      } else {
+        entry.resolve(message.result)
+      }
+    }
+  }
+
+  send(id, payload, timeoutMs) {
+    return new Promise((resolve, reject) => {
+      const timer = setTimeout(() => {
+        this.pending.delete(id)
+        reject(new Error(`Python worker timed out after ${timeoutMs}ms`))
+        // A stuck worker cannot be trusted with the rest of its queue
+        this.kill()
+      }, timeoutMs)
+
+      this.pending.set(id, { resolve, reject, timer })
+      this.input.write(JSON.stringify({ id, ...payload }) + '\n')
+    })
+  }
+
+  shutdown(err) {
+    if (!this.alive) return
+    this.alive = false
+
+    for (const entry of this.pending.values()) {
+      clearTimeout(entry.timer)
+      entry.reject(err)
+    }
+    this.pending.clear()
+    this.onExit(this)
+  }
+}
+
+export class PythonWorkerPool {
+  constructor({
+    size = DEFAULT_POOL_SIZE,
+    timeoutMs = DEFAULT_TIMEOUT_MS,
+    script = 'ai_checker.py',
+    args = ['--worker'],
+    socketPath = ZYGOTE_SOCKET
+  } = {}) {
+    this.size = Math.max(1, size)
+    this.timeoutMs = timeoutMs
+    this.scriptPath = path.join(process.cwd(), 'lib', script)
+    this.args = args
+    this.socketPath = socketPath
+    this.workers = []
+    this.queue = []
+    this.nextId = 1
+  }
+
+  spawnWorker() {
+    const worker = new PythonWorker(this.scriptPath, this.args, (dead) => {
+      // Crashed workers are dropped here and replaced on demand
+      this.workers = this.workers.filter(w => w !== dead)
+      this.drain()
+    }, this.socketPath)
+    this.workers.push(worker)
+    return worker
+  }
+
+  idleWorker() {
+    const idle = this.workers.find(w => w.alive && w.pending.size === 0)
+    if (idle) return idle
+    if (this.workers.length < this.size) return this.spawnWorker()
+    return null
+  }
+
+  // Hand queued requests to idle workers, one in flight per worker, so the
+  // timeout only covers time spent actually running the check
+  drain() {
+    while (this.queue.length > 0) {
+      const worker = this.idleWorker()
+      if (!worker) return
+
+      const { payload, resolve, reject } = this.queue.shift()
+      worker.send(this.nextId++, payload, this.timeoutMs)
+        .then(resolve, reject)
+        .finally(() => this.drain())
+    }
+  }
+
+  request(payload) {
+    return new Promise((resolve, reject) => {
+      this.queue.push({ payload, resolve, reject })
+      this.drain()
+    })
+  }
+
+  close() {
+    for (const worker of this.workers) {
+      worker.input.end()
+    }
+    this.workers = []
+  }
+}
+
+// Keep one pool per server process, surviving Next.js dev hot reloads
+export function getCheckerPool() {
+  if (!globalThis.__aiCheckerPool) {
+    globalThis.__aiCheckerPool = new PythonWorkerPool()
+  }
+  return globalThis.__aiCheckerPool
+}
+
+// The queue's check workers run in their own `job_queue.py worker` process,
+// so a timed-out status request, which gets the serve process killed, never
+// takes in-flight checks down with it. The process is restarted if it exits
+// and asked to finish its current checks (SIGTERM) when the server stops.
+function startJobQueueWorkers() {
+  if (JOB_QUEUE_WORKERS <= 0 || globalThis.__jobQueueWorkers) return
+  const scriptPath = path.join(process.cwd(), 'lib', 'job_queue.py')
+
+  const start = () => {
+    const child = spawn('python3', [scriptPath, 'worker', String(JOB_QUEUE_WORKERS)], {
+      stdio: ['ignore', 'ignore', 'pipe']
+    })
+    globalThis.__jobQueueWorkers = child
+    child.stderr.on('data', (data) => {
+      console.error(`[job_queue worker ${child.pid}] ${data.toString().trimEnd()}`)
+    })
+
+    let restarted = false
+    const restart = (reason) => {
+      if (restarted) return
+      restarted = true
+      console.error(`Job queue workers stopped (${reason}); restarting in ${JOB_QUEUE_RESTART_MS}ms`)
+      setTimeout(start, JOB_QUEUE_RESTART_MS).unref()
+    }
+    child.on('error', (err) => restart(err.message))
+    child.on('exit', (code, signal) => restart(`code ${code}, signal ${signal}`))
+  }
+
+  start()
+  process.once('exit', () => globalThis.__jobQueueWorkers.kill('SIGTERM'))
+}
+
+// One long-lived job queue process answers submit/status requests, each a
+// single SQLite read or write; it runs no checks, so killing it on a
+// timeout loses nothing
+export function getJobQueuePool() {
+  startJobQueueWorkers()
+  if (!globalThis.__jobQueuePool) {
+    globalThis.__jobQueuePool = new PythonWorkerPool({
+      size: 1,
+      timeoutMs: JOB_QUEUE_TIMEOUT_MS,
+      script: 'job_queue.py',
+      args: ['serve'],
+      socketPath: null
+    })
+  }
+  return globalThis.__jobQueuePool
+}
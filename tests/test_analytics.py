@@ -0,0 +1,88 @@
+import os
+from collections import Counter, defaultdict
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from analytics import CheckTable
+from checks_io import iter_checks
+
+SEED_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'seed_data.json')
+
+
+def check(day, engine='ChatGPT', keyword='best crm', presence=True, position=None, competitors=()):
+    return {'projectId': 'p1', 'engine': engine, 'keyword': keyword, 'presence': presence,
+            'position': position, 'citationsCount': int(presence),
+            'competitorsMentioned': list(competitors), 'timestamp': day}
+
+
+def test_summary_and_share_of_voice_match_a_row_scan(tmp_path):
+    checks = list(iter_checks(SEED_PATH))
+    table = CheckTable.from_checks(checks, chunk_size=100)
+    table.save(str(tmp_path / 'table'))
+    table = CheckTable.load(str(tmp_path / 'table'))
+
+    totals, present, positions = Counter(), Counter(), defaultdict(list)
+    mentions = defaultdict(Counter)
+    for c in checks:
+        key = (c['keyword'], c['engine'])
+        totals[key] += 1
+        present[key] += c['presence']
+        if c['position'] is not None:
+            positions[key].append(c['position'])
+        mentions[c['engine']]['brand'] += c['presence']
+        mentions[c['engine']].update(c['competitorsMentioned'])
+
+    rows = table.summary(('keyword', 'engine'))
+    assert len(rows) == len(totals)
+    for row in rows:
+        key = (row['keyword'], row['engine'])
+        assert row['total'] == totals[key]
+        assert row['visibility'] == round(100 * present[key] / totals[key], 2)
+        assert row['avgPosition'] == (round(sum(positions[key]) / len(positions[key]), 2)
+                                      if positions[key] else None)
+
+    for row in table.share_of_voice():
+        counts = mentions[row['engine']]
+        assert row['mentions'] == sum(counts.values())
+        assert row['brand'] == round(100 * counts['brand'] / row['mentions'], 2)
+        assert row['competitors'] == {name: round(100 * n / row['mentions'], 2)
+                                      for name, n in counts.items() if name != 'brand'}
+
+
+def test_rolling_and_day_over_day():
+    table = CheckTable.from_checks([
+        check('2025-03-01T10:00:00', position=2),
+        check('2025-03-01T12:00:00Z', presence=False),
+        # 01:00 at +05:00 is still 2025-03-01 in UTC
+        check('2025-03-02T01:00:00+05:00', position=4, competitors=['Rival']),
+        check('2025-03-04T09:00:00', engine='Claude', position=1),
+    ])
+
+    daily = {(r['engine'], r['day']): r for r in table.day_over_day()}
+    assert daily['ChatGPT', '2025-03-01'] == {
+        'engine': 'ChatGPT', 'day': '2025-03-01', 'total': 3, 'visibility': 66.67,
+        'visibilityDelta': None, 'avgPosition': 3.0, 'avgPositionDelta': None}
+    assert set(daily) == {('ChatGPT', '2025-03-01'), ('Claude', '2025-03-04')}
+
+    rolling = {(r['engine'], r['day']): r for r in table.rolling(window=2, days=3)}
+    assert rolling['ChatGPT', '2025-03-02']['total'] == 3
+    assert ('ChatGPT', '2025-03-03') not in rolling
+    assert rolling['Claude', '2025-03-04']['visibility'] == 100.0
+
+    assert table.summary(project='other') == []
+    assert table.heatmap(end='2025-03-01') == {
+        'keywords': ['best crm'], 'engines': ['ChatGPT'], 'visibility': [[66.67]]}
+
+
+def test_parquet_dataset_loads_like_the_source(tmp_path):
+    pytest.importorskip('pyarrow')
+    from export_parquet import export_checks
+
+    export_checks([SEED_PATH], str(tmp_path / 'dataset'))
+    table = CheckTable.from_parquet(str(tmp_path / 'dataset'))
+    source = CheckTable.from_sources([SEED_PATH])
+    assert len(table) == len(source)
+    assert table.summary(('engine', 'day')) == source.summary(('engine', 'day'))
+    assert table.share_of_voice() == source.share_of_voice()
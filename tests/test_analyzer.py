@@ -0,0 +1,127 @@
+from analyzer import ResponseAnalyzer, trie_pattern
+
+import re
+
+
+def test_brand_presence_and_citations():
+    analyzer = ResponseAnalyzer('Acme', ['Widget Pro'])
+    result = analyzer.analyze('Acme is great. Many people choose acme over others.')
+
+    assert result['presence'] is True
+    assert result['citations_count'] == 2
+    assert result['position'] == 1
+
+
+def test_brand_absent():
+    result = ResponseAnalyzer('Acme').analyze('There are several options available.')
+
+    assert result['presence'] is False
+    assert result['position'] is None
+    assert result['citations_count'] == 0
+
+
+def test_word_boundary_rejects_partial_words():
+    analyzer = ResponseAnalyzer('Acme')
+
+    assert analyzer.analyze('Acmes and Acmeco are different companies')['presence'] is False
+    assert analyzer.analyze('Try Acme, Acme! or (Acme).')['citations_count'] == 3
+
+
+def test_substring_matching_without_word_boundary():
+    result = ResponseAnalyzer('Acme', word_boundary=False).analyze('Acmes are popular')
+
+    assert result['presence'] is True
+    assert result['position'] == 1
+
+
+def test_multi_word_brand_gets_position():
+    result = ResponseAnalyzer('Acme Widgets').analyze('For home use, Acme Widgets is a leading provider.')
+
+    assert result['presence'] is True
+    assert result['position'] == 4
+
+
+def test_brand_aliases_count_once_per_mention():
+    analyzer = ResponseAnalyzer('Acme Widgets', brand_aliases=['Acme', 'AW'])
+    result = analyzer.analyze('Acme Widgets leads. Acme also sells parts, and AW ships fast.', include_mentions=True)
+
+    assert result['citations_count'] == 3
+    assert [m['alias'] for m in result['mentions']] == ['Acme Widgets', 'Acme', 'AW']
+
+
+def test_longer_alias_falls_back_to_prefix_alias_at_boundary():
+    analyzer = ResponseAnalyzer('Acme', brand_aliases=['Acme Widgets'])
+    mentions = analyzer.find_mentions('Acme Widgetsmith is new')
+
+    assert len(mentions) == 1
+    assert mentions[0]['alias'] == 'Acme'
+
+
+def test_competitor_aliases_and_hits():
+    analyzer = ResponseAnalyzer(
+        'Acme',
+        ['Widget Pro', 'Best Widgets Co'],
+        competitor_aliases={'Best Widgets Co': ['BWC']}
+    )
+    result = analyzer.analyze('Widget Pro and BWC compete. BWC is cheaper than Widget Pro.')
+
+    assert result['competitors_mentioned'] == ['Widget Pro', 'Best Widgets Co']
+    assert result['competitor_hits'] == {'Widget Pro': 2, 'Best Widgets Co': 2}
+
+
+def test_mentions_have_exact_offsets_and_word_indexes():
+    answer = 'Top picks:\n  1. Widget Pro\n  2. Acme Widgets'
+    mentions = ResponseAnalyzer('Acme Widgets', ['Widget Pro']).find_mentions(answer)
+
+    assert [(m['kind'], m['name']) for m in mentions] == [
+        ('competitor', 'Widget Pro'),
+        ('brand', 'Acme Widgets'),
+    ]
+    for mention in mentions:
+        assert answer[mention['start']:mention['end']] == mention['alias']
+    assert [m['word'] for m in mentions] == [4, 7]
+
+
+def test_case_insensitive_match_keeps_original_text():
+    mentions = ResponseAnalyzer('acme').find_mentions('ACME rocks')
+
+    assert mentions[0]['alias'] == 'ACME'
+    assert mentions[0]['name'] == 'acme'
+
+
+def test_term_shared_by_brand_and_competitor_credits_both():
+    result = ResponseAnalyzer('Acme', ['Acme']).analyze('Acme wins')
+
+    assert result['presence'] is True
+    assert result['competitors_mentioned'] == ['Acme']
+
+
+def test_extracts_urls():
+    result = ResponseAnalyzer('Acme').analyze('See https://acme.com/products and http://example.org.')
+
+    assert result['observed_urls'] == ['https://acme.com/products', 'http://example.org.']
+
+
+def test_empty_terms_and_answers():
+    analyzer = ResponseAnalyzer('')
+
+    assert analyzer.analyze('anything')['presence'] is False
+    result = ResponseAnalyzer('  ', ['', ' ', 'Globex'], brand_aliases=['\t']).analyze('a Globex b')
+    assert (result['presence'], result['competitors_mentioned']) == (False, ['Globex'])
+    assert list(ResponseAnalyzer('Acme').analyze_many(['', None, 'Acme']))[2]['presence'] is True
+
+
+def test_trie_pattern_matches_longest_term():
+    pattern = re.compile(trie_pattern(['ab', 'abc', 'b']))
+
+    assert pattern.match('abcd').group(0) == 'abc'
+    assert pattern.match('abd').group(0) == 'ab'
+    assert pattern.match('b').group(0) == 'b'
+
+
+def test_analyze_many_reuses_pattern():
+    analyzer = ResponseAnalyzer('Acme', ['Widget Pro'])
+    results = list(analyzer.analyze_many(['Acme', 'Widget Pro', 'nothing']))
+
+    assert [r['presence'] for r in results] == [True, False, False]
+    assert results[1]['competitors_mentioned'] == ['Widget Pro']
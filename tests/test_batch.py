@@ -0,0 +1,89 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import ai_checker
+import engines
+from engines import MockEngine, register_engine
+from rate_limiter import RateLimiter
+
+
+class CountingEngine(MockEngine):
+    """Mock engine recording upstream calls and peak concurrency; "broken" keywords fail"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lock = threading.Lock()
+        self.calls = []
+        self.in_flight = 0
+        self.peak = 0
+
+    def send(self, keyword):
+        with self.lock:
+            self.calls.append(keyword)
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            time.sleep(0.05)
+            if keyword.startswith('broken'):
+                raise ValueError(f'upstream rejected {keyword}')
+            return self.answer(keyword)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    monkeypatch.delenv('AI_CHECKER_CACHE_PATH', raising=False)
+    monkeypatch.delenv('AI_CHECKER_BLOB_DIR', raising=False)
+    monkeypatch.setattr(ai_checker, '_response_cache_loaded', False)
+    monkeypatch.setattr(ai_checker, '_blob_store_loaded', False)
+    limiter = RateLimiter(str(tmp_path / 'limits.db'), default_rate=1000)
+    engine = CountingEngine('ChatGPT', model='mock-counting', brands=['Acme', 'Globex'],
+                            max_concurrency=100, limiter=limiter)
+    register_engine('ChatGPT', engine)
+    yield engine
+    engines.close_engines()
+    limiter.close()
+
+
+def run_batch(jobs, **options):
+    async def collect():
+        return [item async for item in ai_checker.check_visibility_batch(jobs, **options)]
+    return asyncio.run(collect())
+
+
+def test_batch_caps_concurrency_and_reports_every_job_by_id(engine):
+    jobs = [{'id': i, 'keyword': f'crm {i}', 'brand': 'Acme', 'engine': 'ChatGPT'}
+            for i in range(12)]
+    items = run_batch(jobs, max_concurrency=3)
+
+    assert engine.peak == 3
+    assert sorted(engine.calls) == sorted(job['keyword'] for job in jobs)
+    # Items come back in completion order, so callers match them up by id
+    by_id = {item['id']: item for item in items}
+    assert sorted(by_id) == list(range(12))
+    for job in jobs:
+        item = by_id[job['id']]
+        assert item['job'] is job
+        expected = ai_checker.get_analyzer('Acme', []).analyze(engine.answer(job['keyword']))
+        assert item['result']['presence'] == expected['presence']
+
+
+def test_batch_coalesces_duplicates_and_isolates_failures(engine):
+    jobs = [{'id': 'a', 'keyword': 'best crm', 'brand': 'Acme', 'engine': 'ChatGPT'},
+            {'id': 'b', 'keyword': 'best crm', 'brand': 'Globex', 'engine': 'ChatGPT'},
+            {'id': 'c', 'keyword': 'broken crm', 'brand': 'Acme', 'engine': 'ChatGPT'},
+            {'id': 'd', 'keyword': 'crm pricing', 'brand': 'Acme', 'engine': 'ChatGPT'}]
+    items = {item['id']: item for item in run_batch(jobs, max_concurrency=4)}
+
+    assert sorted(engine.calls) == ['best crm', 'broken crm', 'crm pricing']
+    assert items['c']['error'] == 'upstream rejected broken crm'
+    assert 'result' not in items['c']
+    assert all('result' in items[i] for i in 'abd')
+    # The shared answer is analyzed per job, for that job's brand
+    answer = engine.answer('best crm')
+    assert items['b']['result']['presence'] == ('Globex' in answer)
@@ -0,0 +1,79 @@
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from batch_writer import BatchWriter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROWS = [{'keyword': 'best crm'}, {'keyword': None}, {'keyword': 'crm pricing'},
+        {'keyword': 'crm tools'}, {'keyword': 'sales software'}]
+
+
+class Table:
+    """Insert target that rejects a whole insert when any row lacks a keyword"""
+
+    def __init__(self):
+        self.rows = []
+        self.calls = 0
+
+    def insert(self, rows):
+        self.calls += 1
+        if any(row['keyword'] is None for row in rows):
+            raise ValueError('null value in column "keyword"')
+        self.rows.extend(rows)
+
+
+def test_bad_row_is_reported_and_good_rows_are_written():
+    table = Table()
+    with BatchWriter(table.insert, batch_size=3) as writer:
+        writer.add_many(ROWS)
+    summary = writer.close()
+
+    assert table.rows == [ROWS[0], ROWS[2], ROWS[3], ROWS[4]]
+    assert summary == {'inserted': 4, 'failures': [
+        {'row': ROWS[1], 'error': 'null value in column "keyword"'}]}
+    # One rejected batch of three retried row by row, then one clean batch of two
+    assert (writer.flushes, table.calls) == (2, 5)
+
+
+# Fake supabase-js client with the same rule, driving lib/batch-writer.js
+JS_TEST = """
+import { BatchWriter } from '%s'
+
+const stored = []
+const supabase = {
+  from: () => ({
+    insert: (rows) => {
+      const result = rows.some((row) => row.keyword === null)
+        ? { data: null, error: { message: 'null value in column "keyword"' } }
+        : (stored.push(...rows), { data: rows, error: null })
+      const query = Promise.resolve(result)
+      query.select = () => Object.assign(Promise.resolve(result), {
+        single: async () => ({ data: result.data && result.data[0], error: result.error })
+      })
+      return query
+    }
+  })
+}
+
+const writer = new BatchWriter(supabase, 'visibility_checks', { batchSize: 3 })
+for (const row of JSON.parse(process.argv[1])) writer.add(row)
+const { inserted, failures } = await writer.close()
+console.log(JSON.stringify({ stored, inserted, failures }))
+"""
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason='needs node')
+def test_js_writer_reports_the_bad_row_and_writes_the_rest():
+    script = JS_TEST % os.path.join(ROOT, 'lib', 'batch-writer.js')
+    output = subprocess.run(['node', '--input-type=module', '-e', script, json.dumps(ROWS)],
+                            capture_output=True, text=True, check=True).stdout
+    result = json.loads(output)
+
+    good = [row for row in ROWS if row['keyword'] is not None]
+    assert sorted(r['keyword'] for r in result['stored']) == sorted(r['keyword'] for r in good)
+    assert sorted(r['keyword'] for r in result['inserted']) == sorted(r['keyword'] for r in good)
+    assert result['failures'] == [{'row': ROWS[1], 'error': 'null value in column "keyword"'}]
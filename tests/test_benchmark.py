@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+from benchmark import configure_fake_llm, percentile, run_scenario
+from fake_llm import FakeLLMServer
+from http_client import HttpPool, HttpStatusError
+
+
+@pytest.fixture
+def environ():
+    saved = dict(os.environ)
+    yield
+    os.environ.clear()
+    os.environ.update(saved)
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([], 50) is None
+
+
+def test_fake_llm_answers_and_injects_errors():
+    with FakeLLMServer(brands=['Acme']) as server:
+        pool = HttpPool(server.url)
+        body = pool.post_json('/chat/completions', {
+            'model': 'gpt-4o-mini', 'messages': [{'role': 'user', 'content': 'best crm'}]
+        })
+        assert 'best crm' in body['choices'][0]['message']['content']
+
+        server.error_rate = 1.0
+        with pytest.raises(HttpStatusError) as error:
+            pool.post_json('/chat/completions', {'model': 'm', 'messages': [{'content': 'x'}]})
+        assert error.value.status_code in (429, 503)
+        pool.close()
+    assert (server.requests, server.errors) == (2, 1)
+
+
+def test_check_visibility_scenario_against_fake_llm(environ, tmp_path):
+    with FakeLLMServer(latency=0.01, error_rate=0.05) as server:
+        configure_fake_llm(server, str(tmp_path / 'limits.db'), concurrency=8)
+        result = run_scenario('check_visibility', 'small', {'concurrency': 8})
+
+    assert 'error' not in result
+    assert result['items'] == 100
+    assert result['p50Ms'] <= result['p99Ms']
+    assert result['peakRssMb'] > 0
+    # Injected errors are retried, never dropped
+    assert server.requests - server.errors == 100
@@ -0,0 +1,49 @@
+import os
+
+import pytest
+
+import blob_store
+from blob_store import BlobStore, answer_hash
+
+ANSWER = 'Here are some of the best options for best crm.\n1. Acme ' + 'é' * 200_000
+
+
+def blob_files(root):
+    return sorted(name for _, _, names in os.walk(root) for name in names)
+
+
+def test_put_get_round_trip_and_dedup(tmp_path):
+    store = BlobStore(str(tmp_path / 'blobs'))
+    digest = store.put(ANSWER)
+    assert digest == answer_hash(ANSWER)
+    assert store.put(ANSWER) == digest
+    assert store.put('another answer') != digest
+
+    assert store.get(digest) == ANSWER
+    assert len(blob_files(store.root)) == 2
+    assert sorted(store.iter_hashes()) == sorted([digest, answer_hash('another answer')])
+    with pytest.raises(KeyError):
+        store.get(answer_hash('missing'))
+
+
+def test_zlib_is_used_without_zstandard(tmp_path, monkeypatch):
+    monkeypatch.setattr(blob_store, 'zstandard', None)
+    store = BlobStore(str(tmp_path / 'blobs'))
+    assert store.codec == 'zlib'
+    digest = store.put(ANSWER)
+    assert blob_files(store.root) == [digest[2:] + '.zz']
+    assert os.path.getsize(store._path(digest, 'zlib')) < len(ANSWER)
+    assert store.get(digest) == ANSWER
+
+    with pytest.raises(RuntimeError):
+        BlobStore(str(tmp_path / 'blobs'), codec='zstd')
+
+
+def test_zlib_blobs_stay_readable_from_a_zstd_store(tmp_path):
+    pytest.importorskip('zstandard')
+    digest = BlobStore(str(tmp_path / 'blobs'), codec='zlib').put(ANSWER)
+    store = BlobStore(str(tmp_path / 'blobs'))
+    assert store.codec == 'zstd'
+    assert store.put(ANSWER) == digest
+    assert blob_files(store.root) == [digest[2:] + '.zz']
+    assert store.get(digest) == ANSWER
@@ -0,0 +1,168 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import ai_checker
+import engines
+from engines import ChatCompletionsEngine, MockEngine, engine_from_env, register_engine
+from rate_limiter import RateLimiter
+
+
+@pytest.fixture
+def limiter(tmp_path):
+    limiter = RateLimiter(str(tmp_path / 'limits.db'), default_rate=1000)
+    yield limiter
+    limiter.close()
+
+
+@pytest.fixture
+def mock_engines(limiter):
+    names = ['ChatGPT', 'Perplexity', 'Gemini', 'Claude']
+    for name in names:
+        register_engine(name, MockEngine(name, model=f'mock-{name.lower()}', latency=0.2,
+                                         brands=['Acme', 'Globex'], limiter=limiter))
+    yield names
+    engines.close_engines()
+
+
+class ChatHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    connections = set()
+
+    def do_POST(self):
+        ChatHandler.connections.add(self.client_address)
+        request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        keyword = request['messages'][-1]['content']
+        body = json.dumps({'choices': [{'message': {'content': f"{request['model']}: {keyword}"}}]})
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body.encode('utf-8'))
+
+    def log_message(self, *args):
+        pass
+
+
+def test_mock_answers_are_deterministic_per_engine():
+    chatgpt = MockEngine('ChatGPT', brands=['Acme', 'Globex', 'Initech'])
+    assert chatgpt.answer('best crm') == MockEngine('ChatGPT', brands=['Acme', 'Globex', 'Initech']).answer('best crm')
+    answers = {MockEngine(name, brands=['Acme', 'Globex', 'Initech']).answer(keyword)
+               for name in ['ChatGPT', 'Claude'] for keyword in ['best crm', 'crm tools', 'sales software']}
+    assert len(answers) == 6
+
+
+def test_engines_resolve_from_env(monkeypatch):
+    for name in ['OPENAI_API_KEY', 'PERPLEXITY_API_KEY', 'GEMINI_API_KEY', 'ANTHROPIC_API_KEY',
+                 'AI_CHECKER_MOCK_ENGINES']:
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv('EMERGENT_LLM_KEY', 'test-key')
+    monkeypatch.setenv('ANTHROPIC_API_KEY', 'anthropic-key')
+    monkeypatch.setenv('AI_CHECKER_GEMINI_MODEL', 'gemini-test')
+    monkeypatch.setenv('AI_CHECKER_CLAUDE_TIMEOUT', '12')
+
+    claude = engine_from_env('Claude')
+    assert (claude.kind, claude.key, claude.timeout) == ('chat_completions', ('anthropic', 'claude-3-5-haiku-latest'), 12.0)
+    assert engine_from_env('Gemini').key == ('gemini', 'gemini-test')
+    # No Perplexity key and no Emergent route: falls back to the default model
+    assert engine_from_env('Perplexity').key == ('openai', 'gpt-4o-mini')
+
+    monkeypatch.setenv('AI_CHECKER_MOCK_ENGINES', 'all')
+    assert engine_from_env('Claude').kind == 'mock'
+
+
+def test_engines_are_queried_in_parallel(mock_engines):
+    started = time.perf_counter()
+    results = ai_checker.check_visibility_engines('best crm', 'Acme', ['Globex'], mock_engines)
+    elapsed = time.perf_counter() - started
+
+    assert set(results) == set(mock_engines)
+    # Four engines at 0.1-0.3s each finish in about the slowest one
+    assert elapsed < 0.6
+    for name, result in results.items():
+        expected = ai_checker.analyze_answer(engines.get_engine(name).answer('best crm'), 'Acme', ['Globex'])
+        assert result == expected
+
+
+def test_engines_sharing_a_model_share_one_call(limiter):
+    calls = []
+
+    class CountingEngine(MockEngine):
+        def send(self, keyword):
+            calls.append(self.name)
+            return super().send(keyword)
+
+    for name in ['ChatGPT', 'Perplexity']:
+        register_engine(name, CountingEngine(name, model='shared', limiter=limiter))
+    try:
+        results = ai_checker.check_visibility_engines('best crm', 'Acme', [], ['ChatGPT', 'Perplexity'])
+    finally:
+        engines.close_engines()
+    assert len(calls) == 1
+    assert results['ChatGPT'] == results['Perplexity']
+
+
+def test_chat_completions_reuses_connections(limiter):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ChatHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    engine = ChatCompletionsEngine('Claude', 'anthropic', 'claude-test',
+                                   f'http://127.0.0.1:{server.server_port}/v1', 'key', limiter=limiter)
+    try:
+        answers = [engine.query(f'keyword {i}') for i in range(20)]
+    finally:
+        engine.close()
+        server.shutdown()
+        server.server_close()
+
+    assert answers == [f'claude-test: keyword {i}' for i in range(20)]
+    assert engine.client.opened == 1
+    assert len(ChatHandler.connections) == 1
+
+
+class BrokenEngine(MockEngine):
+    def send(self, keyword):
+        raise ValueError('bad request')
+
+
+def test_one_failing_engine_keeps_the_others_answers(limiter):
+    register_engine('ChatGPT', MockEngine('ChatGPT', model='mock-chatgpt', brands=['Acme'],
+                                          limiter=limiter))
+    register_engine('Claude', BrokenEngine('Claude', model='mock-claude', limiter=limiter))
+    try:
+        results = ai_checker.check_visibility_engines('best crm', 'Acme', [], ['ChatGPT', 'Claude'])
+    finally:
+        engines.close_engines()
+
+    assert results['Claude'] == {'error': 'bad request'}
+    assert results['ChatGPT']['presence'] is True
+
+
+def test_llmchat_is_created_per_query_without_carrying_history(monkeypatch, limiter):
+    created = []
+
+    class FakeChat:
+        def __init__(self, api_key, session_id, system_message):
+            self.session_id = session_id
+            self.messages = [{'role': 'system', 'content': system_message}]
+            created.append(self)
+
+        def with_model(self, provider, model):
+            return self
+
+        def send_message(self, message):
+            self.messages.append({'role': 'user', 'content': message.text})
+            answer = f'{len(self.messages)} messages'
+            self.messages.append({'role': 'assistant', 'content': answer})
+            return type('Response', (), {'text': answer})()
+
+    monkeypatch.setattr(engines, 'LlmChat', FakeChat)
+    monkeypatch.setattr(engines, 'UserMessage', lambda text: type('Message', (), {'text': text})())
+    engine = engines.LlmChatEngine('ChatGPT', 'openai', 'gpt-4o-mini', 'key', limiter=limiter)
+
+    assert [engine.send(f'keyword {i}') for i in range(5)] == ['2 messages'] * 5
+    assert len(created) == 5
+    assert len({chat.session_id for chat in created}) == 5
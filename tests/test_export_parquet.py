@@ -0,0 +1,37 @@
+import os
+from collections import Counter
+
+import pytest
+
+pa = pytest.importorskip('pyarrow')
+import pyarrow.dataset as ds
+
+from checks_io import iter_checks, parse_timestamp
+from export_parquet import export_checks
+
+SEED_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'seed_data.json')
+
+
+def test_export_round_trips_with_hive_partitions_and_typed_columns(tmp_path):
+    checks = list(iter_checks(SEED_PATH))
+    output = tmp_path / 'dataset'
+    assert export_checks([SEED_PATH], str(output), chunk_size=100) == len(checks)
+
+    partitions = {(c['projectId'], parse_timestamp(c['timestamp']).date().isoformat())
+                  for c in checks}
+    written = {(project.name, day.name) for project in output.iterdir() for day in project.iterdir()}
+    assert written == {(f'projectId={p}', f'day={d}') for p, d in partitions}
+    assert all(day.glob('part-*.parquet') for project in output.iterdir() for day in project.iterdir())
+
+    table = ds.dataset(str(output), format='parquet', partitioning='hive').to_table()
+    assert table.num_rows == len(checks)
+    assert pa.types.is_dictionary(table.schema.field('engine').type)
+    assert pa.types.is_dictionary(table.schema.field('keyword').type)
+    assert table.schema.field('observedUrls').type == pa.list_(pa.string())
+    assert table.schema.field('competitorsMentioned').type == pa.list_(pa.string())
+
+    rows = table.select(['id', 'engine', 'competitorsMentioned']).to_pylist()
+    assert Counter(row['engine'] for row in rows) == Counter(c['engine'] for c in checks)
+    by_id = {c['id']: c for c in checks}
+    for row in rows:
+        assert row['competitorsMentioned'] == (by_id[row['id']].get('competitorsMentioned') or [])
@@ -0,0 +1,39 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from format_csv import convert
+
+CHECK = {'id': '1', 'projectId': 'p1', 'engine': 'ChatGPT', 'keyword': 'best crm',
+         'presence': True, 'position': 2, 'competitorsMentioned': ['Rival', 'Globex'],
+         'answerHash': 'abc123', 'timestamp': '2025-03-01T10:00:00'}
+
+
+def test_rows_are_formatted_for_supabase(tmp_path):
+    source = tmp_path / 'checks.jsonl'
+    source.write_text(json.dumps(CHECK) + '\n')
+    output = tmp_path / 'checks.csv'
+
+    assert convert([str(source)], str(output)) == 1
+    header, row = output.read_text().splitlines()
+    assert header == ('id,projectId,engine,keyword,position,presence,answerSnippet,citationsCount,'
+                      'observedUrls,competitorsMentioned,answerHash,timestamp')
+    assert row == '1,p1,ChatGPT,best crm,2,true,,0,{},"{""Rival"",""Globex""}",abc123,2025-03-01T10:00:00'
+
+
+def test_no_file_is_left_without_checks_or_after_a_failure(tmp_path):
+    empty = tmp_path / 'empty.jsonl'
+    empty.write_text('')
+    output = tmp_path / 'checks.csv'
+    assert convert([str(empty)], str(output)) == 0
+    assert not output.exists()
+
+    source = tmp_path / 'checks.jsonl'
+    source.write_text(json.dumps(CHECK) + '\n')
+    with pytest.raises(FileNotFoundError):
+        convert([str(source), str(tmp_path / 'missing.jsonl')], str(output))
+    assert not output.exists()
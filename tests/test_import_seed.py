@@ -0,0 +1,144 @@
+import os
+import uuid
+
+import pytest
+
+psycopg = pytest.importorskip('psycopg')
+
+from checks_io import iter_checks, read_project
+from import_seed import CheckLoader, upsert_projects
+
+SEED_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'seed_data.json')
+DATABASE_URL = os.environ.get('TEST_DATABASE_URL')
+
+pytestmark = pytest.mark.skipif(not DATABASE_URL, reason='TEST_DATABASE_URL is not set')
+
+SCHEMA = """
+CREATE TABLE projects (
+  id UUID PRIMARY KEY,
+  "userId" UUID NOT NULL,
+  name TEXT NOT NULL,
+  domain TEXT NOT NULL,
+  brand TEXT NOT NULL,
+  competitors TEXT[] DEFAULT '{}',
+  keywords TEXT[] DEFAULT '{}',
+  "createdAt" TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  "updatedAt" TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+CREATE TABLE visibility_checks (
+  id UUID PRIMARY KEY,
+  "projectId" UUID NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+  engine TEXT NOT NULL,
+  keyword TEXT NOT NULL,
+  position INTEGER,
+  presence BOOLEAN NOT NULL DEFAULT false,
+  "answerSnippet" TEXT,
+  "citationsCount" INTEGER DEFAULT 0,
+  "observedUrls" TEXT[] DEFAULT '{}',
+  "competitorsMentioned" TEXT[] DEFAULT '{}',
+  "answerHash" TEXT,
+  timestamp TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  "createdAt" TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+"""
+
+
+@pytest.fixture
+def conn():
+    schema = f'import_test_{uuid.uuid4().hex[:8]}'
+    with psycopg.connect(DATABASE_URL, autocommit=True) as conn:
+        conn.execute(f'CREATE SCHEMA {schema}')
+        conn.execute(f'SET search_path TO {schema}')
+        conn.execute(SCHEMA)
+        upsert_projects(conn, [read_project(SEED_PATH)], str(uuid.uuid4()))
+        try:
+            yield conn
+        finally:
+            conn.execute(f'DROP SCHEMA {schema} CASCADE')
+
+
+def count(conn):
+    return conn.execute('SELECT COUNT(*) FROM visibility_checks').fetchone()[0]
+
+
+@pytest.mark.parametrize('copy_format', ['csv', 'binary'])
+def test_load_round_trips_checks(conn, copy_format):
+    loader = CheckLoader(conn, copy_format=copy_format)
+    loaded, skipped = loader.load('seed', iter_checks(SEED_PATH), chunk_size=200)
+
+    assert (loaded, skipped) == (840, 0)
+    first = next(iter_checks(SEED_PATH))
+    row = conn.execute(
+        'SELECT engine, keyword, position, presence, "observedUrls", "competitorsMentioned" '
+        'FROM visibility_checks WHERE id = %s', (first['id'],)
+    ).fetchone()
+    assert row == (first['engine'], first['keyword'], first['position'], first['presence'],
+                   first['observedUrls'], first['competitorsMentioned'])
+
+
+def test_reload_is_idempotent(conn):
+    loader = CheckLoader(conn)
+    loader.load('seed', iter_checks(SEED_PATH), chunk_size=300)
+    loaded, _ = loader.load('seed', iter_checks(SEED_PATH), chunk_size=300, resume=False)
+
+    assert loaded == 840
+    assert count(conn) == 840
+
+
+def test_interrupted_load_resumes_after_last_chunk(conn):
+    loader = CheckLoader(conn)
+
+    def interrupt(total, elapsed):
+        if total >= 300:
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        loader.load('seed', iter_checks(SEED_PATH), chunk_size=100, progress=interrupt)
+    assert count(conn) == 300
+
+    loaded, skipped = loader.load('seed', iter_checks(SEED_PATH), chunk_size=100)
+    assert (loaded, skipped) == (540, 300)
+    assert count(conn) == 840
+
+
+def rollup_sql(schema):
+    """The rollup table, functions and trigger from DATABASE_SETUP.md, without RLS"""
+    with open(os.path.join(os.path.dirname(SEED_PATH), 'DATABASE_SETUP.md'), encoding='utf-8') as f:
+        setup = f.read()
+    table = setup[setup.index('CREATE TABLE IF NOT EXISTS visibility_daily_rollup'):
+                  setup.index('ALTER TABLE visibility_daily_rollup')]
+    trigger = setup[setup.index('CREATE OR REPLACE FUNCTION rollup_visibility_apply'):
+                    setup.index('-- Optional one-off backfill')]
+    return table + trigger.replace('SET search_path = public', f'SET search_path = {schema}')
+
+
+def rollup_matches_checks(conn):
+    expected = conn.execute(
+        'SELECT "projectId", (timestamp AT TIME ZONE \'UTC\')::DATE, engine, keyword, COUNT(*), '
+        'COUNT(*) FILTER (WHERE presence), COALESCE(SUM(position), 0), COUNT(position), '
+        'COALESCE(SUM("citationsCount"), 0) FROM visibility_checks GROUP BY 1, 2, 3, 4 ORDER BY 1, 2, 3, 4'
+    ).fetchall()
+    actual = conn.execute(
+        'SELECT "projectId", day, engine, keyword, total, present, "positionSum", "positionCount", '
+        'citations FROM visibility_daily_rollup ORDER BY 1, 2, 3, 4'
+    ).fetchall()
+    return actual == expected
+
+
+def test_rollup_trigger_follows_upserts_and_deletes(conn):
+    schema = conn.execute('SELECT current_schema()').fetchone()[0]
+    conn.execute(rollup_sql(schema))
+    loader = CheckLoader(conn)
+    checks = list(iter_checks(SEED_PATH))
+    loader.load('seed', iter(checks), chunk_size=300)
+    assert rollup_matches_checks(conn)
+
+    # Reloading merges with ON CONFLICT DO UPDATE, which fires UPDATE triggers
+    changed = [{**c, 'presence': not c['presence'], 'position': None if c['presence'] else 3,
+                'engine': 'Claude' if i % 2 else c['engine']} for i, c in enumerate(checks[:100])]
+    loader.load('changed', iter(changed), chunk_size=50)
+    assert rollup_matches_checks(conn)
+
+    conn.execute('DELETE FROM visibility_checks WHERE id = ANY(%s)', ([c['id'] for c in checks[:40]],))
+    assert rollup_matches_checks(conn)
+    assert conn.execute('SELECT COUNT(*) FROM visibility_daily_rollup WHERE total <= 0').fetchone()[0] == 0
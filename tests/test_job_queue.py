@@ -0,0 +1,105 @@
+import io
+import json
+import time
+
+import ai_checker
+from job_queue import JobQueue, QueueFull, run_item, run_server
+
+PROJECT = {'id': 'p1', 'brand': 'Acme', 'keywords': ['best crm', 'crm pricing']}
+
+
+def test_status_moves_from_queued_to_done_with_a_cursor(tmp_path):
+    queue = JobQueue(str(tmp_path / 'jobs.db'))
+    job_id = queue.submit(PROJECT, ['ChatGPT'], user_id='u1')
+    assert queue.status(job_id)['status'] == 'queued'
+    assert queue.depth() == 2
+
+    job, seq, keyword, payload = queue.claim('w1')
+    assert (job, keyword, payload['engines']) == (job_id, 'best crm', ['ChatGPT'])
+    queue.finish(job, seq, 'w1', result=[{'engine': 'ChatGPT'}])
+    status = queue.status(job_id)
+    assert (status['status'], status['completed'], status['cursor']) == ('running', 1, 1)
+
+    job, seq, keyword, _ = queue.claim('w1')
+    queue.finish(job, seq, 'w1', error='boom')
+    status = queue.status(job_id, since=1)
+    assert (status['status'], status['completed'], status['failed']) == ('done', 1, 1)
+    assert [(r['keyword'], r['status'], r['error']) for r in status['results']] == [
+        ('crm pricing', 'failed', 'boom')]
+    assert queue.claim('w1') is None
+
+    assert queue.status(queue.submit({**PROJECT, 'keywords': []}))['status'] == 'done'
+    assert queue.status('missing') is None
+
+
+def test_expired_lease_is_requeued_and_the_old_worker_is_ignored(tmp_path):
+    queue = JobQueue(str(tmp_path / 'jobs.db'), lease_seconds=0.05)
+    job_id = queue.submit({**PROJECT, 'keywords': ['best crm']})
+
+    job, seq, _, _ = queue.claim('dead')
+    assert queue.claim('other') is None
+    time.sleep(0.1)
+    assert queue.claim('other')[:2] == (job, seq)
+
+    queue.finish(job, seq, 'dead', result=[])
+    assert queue.status(job_id)['completed'] == 0
+    queue.finish(job, seq, 'other', result=[])
+    assert queue.status(job_id)['status'] == 'done'
+
+
+def test_submit_is_refused_beyond_max_depth(tmp_path):
+    queue = JobQueue(str(tmp_path / 'jobs.db'), max_depth=3)
+    queue.submit(PROJECT)
+    try:
+        queue.submit(PROJECT)
+    except QueueFull:
+        pass
+    else:
+        raise AssertionError('expected QueueFull')
+    assert queue.depth() == 2
+
+
+def test_serve_answers_json_lines(tmp_path, monkeypatch):
+    monkeypatch.setenv('CHECKS_QUEUE_PATH', str(tmp_path / 'jobs.db'))
+    monkeypatch.setenv('CHECKS_QUEUE_MAX_DEPTH', '2')
+
+    def serve(*requests):
+        stdout = io.StringIO()
+        run_server(io.StringIO(''.join(json.dumps(r) + '\n' for r in requests)), stdout)
+        return [json.loads(line) for line in stdout.getvalue().splitlines()]
+
+    ready, submitted, full, unknown = serve(
+        {'id': 1, 'op': 'submit', 'project': PROJECT},
+        {'id': 2, 'op': 'submit', 'project': PROJECT},
+        {'id': 3, 'op': 'nope'})
+    assert ready['ready']
+    assert full == {'id': 2, 'result': {'error': 'Queue is full (2 pending checks)', 'queueFull': True}}
+    assert unknown['id'] == 3 and 'nope' in unknown['error']
+
+    job_id = submitted['result']['jobId']
+    _, status, stats, missing = serve(
+        {'id': 1, 'op': 'status', 'jobId': job_id, 'since': 0},
+        {'id': 2, 'op': 'stats'},
+        {'id': 3, 'op': 'status', 'jobId': 'missing'})
+    assert (status['result']['id'], status['result']['status']) == (job_id, 'queued')
+    assert stats['result'] == {'depth': 2, 'maxDepth': 2}
+    assert missing['result'] == {'error': 'Job not found'}
+
+
+def test_failed_engines_are_reported_without_dropping_the_other_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(ai_checker, 'check_visibility_engines', lambda *args: {
+        'ChatGPT': {'position': 1, 'presence': True, 'answer_snippet': 'Acme', 'citations_count': 1,
+                    'observed_urls': [], 'competitors_mentioned': []},
+        'Claude': {'error': 'HTTP 503'}})
+    rows, error = run_item('best crm', {'project': PROJECT, 'engines': ['ChatGPT', 'Claude']}, None)
+    assert [row['engine'] for row in rows] == ['ChatGPT']
+    assert error == 'Claude: HTTP 503'
+
+    queue = JobQueue(str(tmp_path / 'jobs.db'))
+    job_id = queue.submit({**PROJECT, 'keywords': ['best crm']})
+    job, seq, _, _ = queue.claim('w1')
+    queue.finish(job, seq, 'w1', result=rows, error=error)
+    status = queue.status(job_id)
+    assert (status['completed'], status['failed']) == (1, 0)
+    assert status['results'][0]['error'] == 'Claude: HTTP 503'
+    assert len(status['results'][0]['checks']) == 1
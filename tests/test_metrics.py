@@ -0,0 +1,77 @@
+import pytest
+
+import ai_checker
+import engines
+import metrics
+from engines import MockEngine, register_engine
+from metrics import Registry, render
+from rate_limiter import RateLimiter
+
+
+@pytest.fixture
+def enabled(monkeypatch, tmp_path):
+    path = str(tmp_path / 'metrics.db')
+    registry = Registry(path)
+    monkeypatch.setattr(metrics, 'ENABLED', True)
+    monkeypatch.setattr(metrics, 'registry', registry)
+    return registry
+
+
+@pytest.fixture
+def mock_engines(tmp_path):
+    limiter = RateLimiter(str(tmp_path / 'limits.db'), default_rate=1000)
+    for name in ['ChatGPT', 'Claude']:
+        register_engine(name, MockEngine(name, model=f'mock-{name.lower()}', latency=0.02,
+                                         brands=['Acme'], limiter=limiter))
+    yield
+    engines.close_engines()
+    limiter.close()
+
+
+def test_processes_flushing_to_one_file_are_summed(tmp_path):
+    path = str(tmp_path / 'metrics.db')
+    for seconds in (0.003, 0.2):
+        registry = Registry(path)
+        registry.observe('aeo_check_stage_seconds', seconds, stage='llm')
+        registry.count('aeo_checks_total', engine='ChatGPT', outcome='ok')
+        registry.flush()
+
+    text = render(path)
+    assert '# TYPE aeo_check_stage_seconds histogram' in text
+    assert 'aeo_check_stage_seconds_bucket{le="0.005",stage="llm"} 1' in text
+    assert 'aeo_check_stage_seconds_bucket{le="0.25",stage="llm"} 2' in text
+    assert 'aeo_check_stage_seconds_bucket{le="+Inf",stage="llm"} 2' in text
+    assert 'aeo_check_stage_seconds_count{stage="llm"} 2' in text
+    assert 'aeo_checks_total{engine="ChatGPT",outcome="ok"} 2' in text
+
+
+def test_results_carry_stage_timings(enabled, mock_engines):
+    results = ai_checker.check_visibility_engines('best crm', 'Acme', [], ['ChatGPT', 'Claude'])
+    for result in results.values():
+        timings = result['timings']
+        assert timings['llmMs'] >= 10
+        assert 'analysisMs' in timings
+        assert timings['totalMs'] >= timings['llmMs']
+
+    enabled.flush()
+    text = render(enabled.path)
+    assert 'aeo_check_stage_seconds_count{stage="llm"} 2' in text
+    assert 'aeo_llm_calls_total{engine="Claude"} 1' in text
+
+
+def test_disabled_metrics_leave_results_unchanged(mock_engines):
+    assert metrics.new_timings() is None
+    results = ai_checker.check_visibility_engines('best crm', 'Acme', [], ['ChatGPT', 'Claude'])
+    assert all('timings' not in result for result in results.values())
+
+
+def test_startup_counts_the_deferred_engine_imports(enabled, monkeypatch):
+    loaded = []
+    monkeypatch.setattr(ai_checker, 'IMPORT_SECONDS', 0.0)
+    monkeypatch.setattr(ai_checker, 'preload', lambda: loaded.append(True))
+    assert set(ai_checker.record_startup()) == {'import'}
+    assert loaded == [True]
+
+    monkeypatch.setattr(ai_checker, 'IMPORT_SECONDS', None)
+    assert ai_checker.record_startup() == {}
+    assert loaded == [True]
@@ -0,0 +1,187 @@
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from rate_limiter import (FATAL, RATE_LIMITED, TRANSIENT, CircuitOpen, LimiterTimeout, RateLimited,
+                          RateLimiter, classify_error)
+
+
+class FakeProvider:
+    """Serves at most rate calls per second and answers 429 with Retry-After beyond that"""
+
+    def __init__(self, rate, latency=0.0):
+        self.rate = rate
+        self.latency = latency
+        self.tokens = rate * 0.5
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+        self.served = 0
+        self.throttled = 0
+
+    def __call__(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate * 0.5, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                self.throttled += 1
+                raise RateLimited('429 Too Many Requests', retry_after=(1 - self.tokens) / self.rate)
+            self.tokens -= 1
+            self.served += 1
+        time.sleep(self.latency)
+        return 'answer'
+
+
+class HttpError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f'HTTP {status_code}')
+        self.status_code = status_code
+        self.response = type('Response', (), {'status_code': status_code, 'headers': headers or {}})()
+
+
+@pytest.fixture
+def limits_path(tmp_path):
+    return str(tmp_path / 'limits.db')
+
+
+def test_classify_error():
+    assert classify_error(HttpError(429, {'retry-after': '2'})) == (RATE_LIMITED, 2.0)
+    assert classify_error(HttpError(503)) == (TRANSIENT, None)
+    assert classify_error(TimeoutError()) == (TRANSIENT, None)
+    assert classify_error(HttpError(401)) == (FATAL, None)
+    assert classify_error(ValueError('bad request')) == (FATAL, None)
+
+
+def test_adapts_to_provider_limit_without_dropping_calls(limits_path):
+    provider = FakeProvider(rate=100, latency=0.005)
+    # Configured well above what the provider accepts
+    limiter = RateLimiter(limits_path, limits={'fake': 300}, max_concurrency=16)
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(16) as pool:
+        answers = list(pool.map(lambda _: limiter.call('fake', provider), range(300)))
+    elapsed = time.monotonic() - started
+
+    assert answers == ['answer'] * 300
+    assert provider.served == 300
+    assert provider.throttled > 0
+    # Sustained throughput stays close to the provider's 100 calls/sec
+    assert 300 / elapsed > 60
+    assert limiter.stats()['fake']['rate'] < 300
+
+
+def test_transient_errors_are_retried(limits_path):
+    failures = iter([HttpError(503), HttpError(502)])
+
+    def flaky():
+        error = next(failures, None)
+        if error:
+            raise error
+        return 'ok'
+
+    limiter = RateLimiter(limits_path, default_rate=100, retry_base=0.01)
+    assert limiter.call('fake', flaky) == 'ok'
+
+
+def test_fatal_errors_are_not_retried(limits_path):
+    calls = []
+
+    def unauthorized():
+        calls.append(1)
+        raise HttpError(401)
+
+    with pytest.raises(HttpError):
+        RateLimiter(limits_path, default_rate=100).call('fake', unauthorized)
+    assert len(calls) == 1
+
+
+def test_retry_backoff_stops_at_the_deadline(limits_path):
+    def down():
+        raise HttpError(503)
+
+    limiter = RateLimiter(limits_path, default_rate=100, max_wait=0.3, retry_base=10,
+                          retry_max=10, failure_threshold=100)
+    started = time.monotonic()
+    with pytest.raises(HttpError):
+        limiter.call('fake', down)
+    assert time.monotonic() - started < 1.0
+
+
+def test_attempts_are_cut_to_the_time_left(limits_path):
+    limiter = RateLimiter(limits_path, default_rate=100, max_wait=0.3, call_timeout=30,
+                          retry_base=0.01, failure_threshold=100)
+    started = time.monotonic()
+    with pytest.raises((TimeoutError, LimiterTimeout)):
+        limiter.call('fake', lambda: time.sleep(2))
+    assert time.monotonic() - started < 1.0
+    limiter.close()
+
+
+def test_timed_out_call_keeps_its_lease_until_it_returns(limits_path):
+    finished = threading.Event()
+
+    def slow():
+        time.sleep(0.3)
+        finished.set()
+        return 'late'
+
+    limiter = RateLimiter(limits_path, default_rate=100, max_concurrency=1, max_attempts=1,
+                          call_timeout=0.05)
+    with pytest.raises(TimeoutError):
+        limiter.call('fake', slow)
+    assert limiter.stats()['fake']['inFlight'] == 1
+
+    # The next call waits for the abandoned one instead of running beside it
+    assert limiter.call('fake', lambda: finished.is_set(), timeout=1) is True
+    assert limiter.stats()['fake']['inFlight'] == 0
+    limiter.close()
+
+
+def test_circuit_opens_then_recovers_after_probe(limits_path):
+    limiter = RateLimiter(limits_path, default_rate=100, failure_threshold=2, cooldown=0.3,
+                          max_attempts=2, retry_base=0.01, max_wait=0.1)
+
+    def down():
+        raise HttpError(503)
+
+    with pytest.raises(HttpError):
+        limiter.call('fake', down)
+    assert limiter.stats()['fake']['circuit'] == 'open'
+    with pytest.raises(CircuitOpen):
+        limiter.call('fake', lambda: 'ok')
+
+    time.sleep(0.35)
+    assert limiter.call('fake', lambda: 'ok') == 'ok'
+    assert limiter.stats()['fake']['circuit'] == 'closed'
+
+
+def _busy_worker(path, current, peak, lock):
+    limiter = RateLimiter(path, default_rate=1000, max_concurrency=2)
+
+    def work():
+        with lock:
+            current.value += 1
+            peak.value = max(peak.value, current.value)
+        time.sleep(0.02)
+        with lock:
+            current.value -= 1
+
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(lambda _: limiter.call('fake', work), range(8)))
+
+
+def test_concurrency_cap_holds_across_processes(limits_path):
+    context = multiprocessing.get_context('fork')
+    current, peak, lock = context.Value('i', 0), context.Value('i', 0), context.Lock()
+    processes = [context.Process(target=_busy_worker, args=(limits_path, current, peak, lock))
+                 for _ in range(3)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+
+    assert all(process.exitcode == 0 for process in processes)
+    assert peak.value == 2
@@ -0,0 +1,38 @@
+import json
+
+from blob_store import BlobStore
+from checks_io import iter_checks
+from reanalyze import reanalyze
+
+SNIPPET = 'Here are the best options for best crm. 1. Acme is popular.'
+FULL = SNIPPET + ' ' + 'Filler text. ' * 60 + '2. Globex is a strong alternative.'
+
+
+def write_checks(path, checks):
+    path.write_text(''.join(json.dumps(check) + '\n' for check in checks))
+
+
+def test_only_checks_with_a_full_answer_are_reanalyzed(tmp_path):
+    store = BlobStore(str(tmp_path / 'blobs'))
+    stored = {'id': '1', 'keyword': 'best crm', 'presence': False, 'competitorsMentioned': [],
+              'answerSnippet': FULL[:500], 'answerHash': store.put(FULL)}
+    snippet_only = {'id': '2', 'keyword': 'best crm', 'presence': False, 'competitorsMentioned': [],
+                    'answerSnippet': SNIPPET}
+    source = tmp_path / 'checks.jsonl'
+    write_checks(source, [stored, snippet_only])
+
+    output = tmp_path / 'out.jsonl'
+    total, skipped, _ = reanalyze(str(source), 'Acme', ['Globex'], output=str(output),
+                                  workers=1, blob_dir=store.root)
+    assert (total, skipped) == (1, 1)
+    rows = {row['id']: row for row in iter_checks(str(output))}
+    # Globex only appears past the 500-char snippet
+    assert rows['1']['competitorsMentioned'] == ['Globex']
+    assert rows['2'] == snippet_only
+
+    total, skipped, _ = reanalyze(str(source), 'Acme', ['Globex'], output=str(output),
+                                  workers=1, snippets=True)
+    assert (total, skipped) == (2, 0)
+    rows = {row['id']: row for row in iter_checks(str(output))}
+    assert rows['2']['presence'] is True
+    assert rows['1']['competitorsMentioned'] == []
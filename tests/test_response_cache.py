@@ -0,0 +1,45 @@
+import pytest
+
+import response_cache
+from response_cache import ResponseCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache, 'time', clock)
+    return clock
+
+
+def test_entries_expire_after_the_ttl(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / 'cache.db'), ttl=60)
+    cache.set(('openai', 'gpt', 'system', 'best crm'), 'answer')
+
+    clock.now += 59
+    assert cache.get(('openai', 'gpt', 'system', 'best crm')) == 'answer'
+    clock.now += 2
+    assert cache.get(('openai', 'gpt', 'system', 'best crm')) is None
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'entries': 0}
+
+
+def test_least_recently_read_entry_is_evicted(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / 'cache.db'), ttl=3600, max_entries=2)
+    cache.set(('a',), 'A')
+    clock.now += 1
+    cache.set(('b',), 'B')
+    clock.now += 1
+    assert cache.get(('a',)) == 'A'
+
+    clock.now += 1
+    cache.set(('c',), 'C')
+    assert cache.get(('b',)) is None
+    assert (cache.get(('a',)), cache.get(('c',))) == ('A', 'C')
+    assert cache.stats()['entries'] == 2
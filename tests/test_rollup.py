@@ -0,0 +1,38 @@
+from rollup import compute_rollups
+
+
+def check(engine, timestamp, presence=True, position=None, citations=0, keyword='best crm'):
+    return {'projectId': 'p1', 'engine': engine, 'keyword': keyword, 'presence': presence,
+            'position': position, 'citationsCount': citations, 'timestamp': timestamp}
+
+
+def test_rollups_count_mentions_and_positions_per_engine_and_day():
+    checks = [
+        check('ChatGPT', '2025-03-01T09:00:00Z', position=1, citations=2),
+        check('ChatGPT', '2025-03-01T18:00:00Z', position=4),
+        check('ChatGPT', '2025-03-01T20:00:00Z', presence=False),
+        # 23:30 at -02:00 is already the next UTC day
+        check('ChatGPT', '2025-03-01T23:30:00-02:00', position=2, citations=1),
+        check('Claude', '2025-03-01T10:00:00Z', presence=False, citations=None),
+        check('Claude', '2025-03-01T11:00:00Z', keyword='crm pricing', position=3),
+    ]
+    rollups = compute_rollups(checks)
+
+    assert sorted(rollups) == [
+        ('p1', '2025-03-01', 'ChatGPT', 'best crm'),
+        ('p1', '2025-03-01', 'Claude', 'best crm'),
+        ('p1', '2025-03-01', 'Claude', 'crm pricing'),
+        ('p1', '2025-03-02', 'ChatGPT', 'best crm'),
+    ]
+    chatgpt = rollups['p1', '2025-03-01', 'ChatGPT', 'best crm']
+    assert chatgpt == {'projectId': 'p1', 'day': '2025-03-01', 'engine': 'ChatGPT',
+                       'keyword': 'best crm', 'total': 3, 'present': 2,
+                       'positionSum': 5, 'positionCount': 2, 'citations': 2}
+    assert chatgpt['positionSum'] / chatgpt['positionCount'] == 2.5
+
+    late = rollups['p1', '2025-03-02', 'ChatGPT', 'best crm']
+    assert (late['total'], late['present'], late['positionSum'], late['citations']) == (1, 1, 2, 1)
+
+    missed = rollups['p1', '2025-03-01', 'Claude', 'best crm']
+    assert (missed['present'], missed['positionCount'], missed['citations']) == (0, 0, 0)
+    assert compute_rollups([]) == {}
@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta, timezone
+
+from scheduler import plan_run
+
+NOW = datetime(2025, 3, 1, 12, tzinfo=timezone.utc)
+PROJECT = {'id': 'p1', 'keywords': ['stable', 'volatile']}
+
+
+def history(keyword, engine, outcomes, last_days_ago=1):
+    """Daily checks ending last_days_ago days before NOW; outcomes are presence flags"""
+    start = NOW - timedelta(days=last_days_ago + len(outcomes) - 1)
+    return [
+        {'keyword': keyword, 'engine': engine, 'presence': present,
+         'position': 3 if present else None,
+         'timestamp': (start + timedelta(days=i)).isoformat()}
+        for i, present in enumerate(outcomes)
+    ]
+
+
+def test_unchecked_pairs_are_planned_first():
+    plan = plan_run(PROJECT, history('stable', 'ChatGPT', [True] * 10), ['ChatGPT', 'Gemini'],
+                    now=NOW, budget=2)
+
+    assert [(p['keyword'], p['engine']) for p in plan['pairs']][:2] == [
+        ('stable', 'Gemini'), ('volatile', 'ChatGPT')
+    ]
+    assert all(p['reason'] == 'new' for p in plan['pairs'])
+
+
+def test_volatile_pairs_are_due_before_stable_ones():
+    checks = (history('stable', 'ChatGPT', [True] * 20, last_days_ago=2)
+              + history('volatile', 'ChatGPT', [True, False] * 10, last_days_ago=2))
+    plan = plan_run(PROJECT, checks, ['ChatGPT'], now=NOW)
+
+    assert plan['keywords'] == [{'keyword': 'volatile', 'engines': ['ChatGPT']}]
+    assert plan['notDue'] == 1
+
+
+def test_stable_pairs_come_due_after_the_max_interval():
+    checks = history('stable', 'ChatGPT', [True] * 20, last_days_ago=15)
+    plan = plan_run({'id': 'p1', 'keywords': ['stable']}, checks, ['ChatGPT'], now=NOW)
+
+    assert plan['planned'] == 1
+
+
+def test_daily_budget_counts_checks_made_today():
+    checks = [{'keyword': 'other', 'engine': 'ChatGPT', 'presence': True, 'position': 1,
+               'timestamp': (NOW - timedelta(hours=1)).isoformat()}] * 3
+    plan = plan_run(PROJECT, checks, ['ChatGPT', 'Gemini'], now=NOW, budget=4)
+
+    assert plan['budget'] == {'daily': 4, 'spent': 3, 'remaining': 1}
+    assert plan['planned'] == 1
+    assert plan['overBudget'] == 3
+
+
+def test_empty_plans_say_why():
+    checks = history('stable', 'ChatGPT', [True] * 5, last_days_ago=0)
+    plan = plan_run({'id': 'p1', 'keywords': ['stable']}, checks, ['ChatGPT'], now=NOW)
+    assert plan['planned'] == 0
+    # A pair that never changed waits longer than the minimum interval
+    assert datetime.fromisoformat(plan['nextDueAt']) > NOW + timedelta(hours=24)
+    assert plan['reason'] == f"No keyword/engine pair is due before {plan['nextDueAt']}"
+
+    plan = plan_run(PROJECT, checks, ['ChatGPT'], now=NOW, budget=1)
+    assert (plan['due'], plan['reason']) == (1, 'The daily check budget (1) is spent')
+    assert plan_run({'id': 'p1', 'keywords': []}, [], now=NOW)['reason'] == 'The project has no keywords'
+    assert plan_run(PROJECT, [], ['ChatGPT'], now=NOW)['reason'] is None
@@ -0,0 +1,34 @@
+from datetime import date
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+import seed_data
+from seed_data import columns_to_checks, generate_seed_data, iter_check_columns, synthetic_projects
+
+
+def generate(projects, chunk_size):
+    return [check for project, columns in iter_check_columns(projects, 3, date(2025, 3, 1), 7, chunk_size)
+            for check in columns_to_checks(project, columns)]
+
+
+def test_output_depends_on_the_seed_not_the_chunk_size(monkeypatch):
+    projects = synthetic_projects(2, 10, np.random.default_rng(1))
+    tables = []
+    build = seed_data._snippet_table
+    monkeypatch.setattr(seed_data, '_snippet_table', lambda project: tables.append(1) or build(project))
+
+    checks = generate(projects, 100000)
+    assert len(checks) == 2 * 3 * 10 * len(seed_data.ENGINES)
+    assert generate(projects, 7) == checks
+    assert generate(projects, 1) == checks
+    # Snippet tables are built once per project, not once per chunk
+    assert len(tables) == 3 * len(projects)
+
+
+def test_demo_generator_uses_the_shared_boosts(monkeypatch):
+    monkeypatch.setattr(seed_data, 'ENGINE_BOOST', {'Gemini': 1.0, 'Claude': -1.0})
+    checks = generate_seed_data()['checks']
+    assert all(c['presence'] for c in checks if c['engine'] == 'Gemini')
+    assert not any(c['presence'] for c in checks if c['engine'] == 'Claude')
@@ -0,0 +1,60 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+LIB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lib')
+
+
+def test_checker_import_defers_heavy_modules():
+    code = ("import sys, ai_checker; "
+            "print(sorted(m for m in ('asyncio', 'httpx', 'http.client', 'inspect', "
+            "'emergentintegrations') if m in sys.modules))")
+    output = subprocess.run([sys.executable, '-c', code], cwd=LIB, capture_output=True,
+                            text=True, check=True).stdout
+    assert output.strip() == '[]'
+
+
+def _connect(path, deadline):
+    while True:
+        try:
+            conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            conn.connect(path)
+            return conn
+        except (FileNotFoundError, ConnectionRefusedError):
+            conn.close()
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='zygote mode needs fork')
+def test_zygote_forks_a_worker_per_connection(tmp_path):
+    path = str(tmp_path / 'checker.sock')
+    env = {**os.environ, 'AI_CHECKER_MOCK_ENGINES': 'all', 'AI_CHECKER_MOCK_BRANDS': 'Acme',
+           'AI_CHECKER_LIMITS_PATH': str(tmp_path / 'limits.db')}
+    zygote = subprocess.Popen([sys.executable, os.path.join(LIB, 'ai_checker.py'), '--zygote', path],
+                              env=env, stderr=subprocess.DEVNULL)
+    try:
+        pids = set()
+        for _ in range(2):
+            with _connect(path, time.monotonic() + 10) as conn, conn.makefile('rw') as stream:
+                ready = json.loads(stream.readline())
+                assert ready['ready'] and ready['pid'] != zygote.pid
+                pids.add(ready['pid'])
+
+                stream.write(json.dumps({'id': 1, 'keyword': 'best crm', 'brand': 'Acme',
+                                         'engines': ['ChatGPT']}) + '\n')
+                stream.flush()
+                response = json.loads(stream.readline())
+                assert response['id'] == 1
+                assert response['result']['ChatGPT']['presence'] in (True, False)
+        assert len(pids) == 2
+    finally:
+        zygote.terminate()
+        zygote.wait(10)
+    assert not os.path.exists(path)